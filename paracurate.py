@@ -40,11 +40,29 @@ def main():
                         help='skip operations if results already exist')
     parser.add_argument('-J', '--omit-json', action='store_false', dest='save_json',
                         help='omit saving judgment list results as JSON')
+    parser.add_argument('--compact-json', action='store_true',
+                        help='save JSON results without indentation')
+    json_write_group = parser.add_mutually_exclusive_group()
+    json_write_group.add_argument('--json-checkpoints', action='store_true',
+                                  help='save JSON results of every batch after each phase, instead of once segregated')
+    json_write_group.add_argument('--defer-json-writes', action='store_true',
+                                  help='hold JSON results in memory and save them at the end, instead of once segregated')
+    parser.add_argument('--defer-merges', action='store_true',
+                        help='only log merge requests for duplicate judgments, to be applied offline')
+    parser.add_argument('--http-cache', action='store_true',
+                        help='cache search pages and resolved document URLs under the output directory')
+    parser.add_argument('--http-cache-ttl', type=float, default=24,
+                        help='hours after which cached search pages expire')
+    parser.add_argument('--http-cache-size', type=float, default=256,
+                        help='maximum size of the response cache, in MiB')
+    for name, description in ( ( 'io', 'disk I/O' ), ( 'cpu', 'CPU-bound work' ), ( 'api', 'extraction API calls' ) ):
+        parser.add_argument(f'--{name}-workers', type=int, default=None, metavar='WORKERS',
+                            help=f'number of workers shared by all phases for {description}')
 
     retriever_group = parser.add_argument_group(
         "retrieval options", "options to control the search and scrape phase of the pipeline"
     )
-    retriever_group.add_argument('queries', help='queries to use for searching judgments', nargs='*', default='')
+    retriever_group.add_argument('queries', help='queries to use for searching judgments', nargs='*', default=[''])
     retriever_group.add_argument('-c', '--courts', nargs='*', default=['DHC'],
                                  choices=search_and_scrape.get_retriever_names(),
                                  help='court website(s) to use to scrape judgments')
@@ -58,8 +76,25 @@ def main():
                                  help='load judgments from this date', default=None, nargs='?')
     retriever_group.add_argument('--end-date'  , type=datetime.date.fromisoformat,
                                  help='load judgments upto this date', default=None, nargs='?')
+    retriever_group.add_argument('--window-days', type=int, default=None,
+                                 help='days spanned by each date window when searching by date ranges (SC), '
+                                      'defaulting to the maximum allowed by the website')
+    retriever_group.add_argument('--window-limit', type=int, default=500,
+                                 help='result count at which a date window is split further, as results may be truncated')
+    retriever_group.add_argument('--window-workers', type=int, default=None,
+                                 help='number of date windows to search concurrently')
+    retriever_group.add_argument('--incremental', action='store_true',
+                                 help='stop searching at pages of judgments known from earlier crawls, '
+                                      'and search date ranges from the latest date seen before')
+    retriever_group.add_argument('--incremental-pages', type=int, default=2,
+                                 help='consecutive pages without new judgments after which an incremental search stops')
     retriever_group.add_argument('--document-dir', default='judgments',
                                  help='output directory to store judgments')
+    retriever_group.add_argument('--content-store', action='store_true',
+                                 help='store documents by content digest, under directories named by digest prefixes')
+    retriever_group.add_argument('--court-url', nargs='*', dest='court_urls', default=[],
+                                 type=lambda value: tuple(value.split('=', maxsplit=1)), metavar='COURT=URL',
+                                 help='alternate base URL for a court website, such as a local mock server')
 
     extractor_group = parser.add_argument_group(
         "extractor options", "options to control the extraction phase of the pipeline"
@@ -68,6 +103,10 @@ def main():
                                  default=extract.get_extractor_names(),
                                  choices=extract.get_extractor_names(),
                                  help='extractor(s) to use for mining content from the judgment')
+    extractor_group.add_argument('--compress-artifacts', nargs='*', dest='compress_artifacts', default=[],
+                                 type=lambda value: tuple(value.split('=', maxsplit=1)), metavar='EXTRACTOR=FORMAT',
+                                 help=('save artifacts of an extractor compressed, in one of the formats: ' +
+                                       ', '.join(utils.fs.COMPRESSION_EXTENSIONS)))
     for extractor in extract.get_extractor_names():
         for args, kwargs in extract.get_option_args(extractor):
             extractor_group.add_argument(*args, **kwargs)
@@ -82,12 +121,27 @@ def main():
                                 'filters(s) to use for filtering paragraphs from the '
                                 'judgment, applied in conjunction')
                              )
+    filter_group.add_argument('--segregate-workers', type=int, default=None, metavar='WORKERS',
+                              help=('number of worker processes (the shared CPU pool) to segregate and '
+                                    'filter documents over, instead of a thread per extractor'))
     for _filter in segregate.get_filters():
         for args, kwargs in _filter.get_option_args():
             filter_group.add_argument(*args, **kwargs)
 
     args = parser.parse_args()
 
+    args.court_urls = dict(args.court_urls)
+    utils.executors.EXECUTORS.configure(
+        io=args.io_workers, cpu=args.cpu_workers, api=args.api_workers, prefetch=args.window_workers
+    )
+    args.compress_artifacts = dict(args.compress_artifacts)
+
+    for extractor, compression in args.compress_artifacts.items():
+        if compression not in utils.fs.COMPRESSION_EXTENSIONS:
+            print(parser.prog, ": error: unsupported compression for ", extractor, ": ", compression, sep='',
+                  file=sys.stderr, flush=True)
+            sys.exit(1)
+
     if not any(query for query in args.queries) and 'SC' not in args.courts:
         print(parser.prog, ": error: specify at least one query", sep='',
               file=sys.stderr, flush=True)
@@ -95,7 +149,10 @@ def main():
 
     pipeline = utils.Pipeline(
         preprocessing={
-            'data_indexes': preprocess.load_indexes
+            'data_indexes'  : preprocess.load_indexes,
+            'document_cache': preprocess.create_document_cache,
+            'merge_log'     : preprocess.open_merge_log,
+            'response_cache': preprocess.open_response_cache
         },
         phases=[
             search_and_scrape.search_and_scrape,
@@ -104,7 +161,11 @@ def main():
             segregate.segregate
         ],
         postprocessing={
-            '_': postprocess.merge_judgments
+            '_'              : postprocess.merge_judgments,
+            'saved_documents': postprocess.save_documents,
+            'response_stats' : postprocess.close_response_cache,
+            '_retrievers'    : postprocess.shutdown_retrievers,
+            'executor_stats' : postprocess.shutdown_executors
         }
     )
     pipeline.execute(parser.prog, args)
@@ -1,6 +1,17 @@
 import os
 import logging
 import datetime
+import importlib
+
+class LazyFileHandler(logging.FileHandler):
+    """ File handler which creates the log directory and file only when the first record is emitted. """
+
+    def __init__(self, filename, mode="a", encoding=None) -> None:
+        super().__init__(filename, mode, encoding=encoding, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
 
 logger = logging.getLogger(__name__)
 
@@ -8,9 +19,8 @@ console_handler = logging.StreamHandler()
 console_handler.setLevel(logging.CRITICAL)
 
 LOG_DIR = os.path.join("data", "logs")
-os.makedirs(LOG_DIR, exist_ok=True)
 
-file_handler = logging.FileHandler(
+file_handler = LazyFileHandler(
     os.path.join(LOG_DIR, f"{datetime.datetime.now().isoformat('_', timespec='seconds').replace(':','-')}.log"),
     "a+", encoding="utf-8"
 )
@@ -27,8 +37,6 @@ logger.setLevel(logging.DEBUG)
 logger.addHandler(console_handler)
 logger.addHandler(file_handler)
 
-from . import utils, retrievers, extractors, segregators, filters
-
 def enable_verbose_logs():
     """ Enables logging over the stream STDERR handler. """
     console_handler.setLevel(logging.DEBUG)
@@ -45,6 +53,12 @@ def make_logger(name):
     logger.addHandler(file_handler)
     return logger
 
-__all__ = [ "utils", "retrievers", "extractors", "segregators", "filters" ]
+def __getattr__(name):
+    """ Imports subpackages on first access, deferring the import of their dependencies. """
+    if name in __all__:
+        return importlib.import_module(f".{name}", __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+__all__ = [ "utils", "registry", "retrievers", "extractors", "segregators", "filters" ]
 __author__ = "Kinshuk Vasisht"
 __version__ = "1.0.0"
\ No newline at end of file
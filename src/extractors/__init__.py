@@ -1,10 +1,17 @@
 from .. import logger as root_logger
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
+# pylint: disable-next=wrong-import-position
+from ..registry import lazy_exports
+# pylint: disable-next=wrong-import-position
 from .base import Extractor
-from .parsr import ParsrExtractor
-from .adobe import AdobeAPIExtractor
-from .pdfminer import PdfminerHighLevelTextExtractor
+
+# Extractors are imported on first access, as their dependencies are expensive to load.
+__getattr__ = lazy_exports(__name__, {
+    'ParsrExtractor'                : '.parsr',
+    'AdobeAPIExtractor'             : '.adobe',
+    'PdfminerHighLevelTextExtractor': '.pdfminer'
+})
 
 __version__ = "1.0.0"
 __author__  = "Kinshuk Vasisht"
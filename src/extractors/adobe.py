@@ -18,6 +18,7 @@ from adobe.pdfservices.operation.pdfops.options.extractpdf.extract_pdf_options i
 from adobe.pdfservices.operation.pdfops.options.extractpdf.extract_element_type import ExtractElementType
 from adobe.pdfservices.operation.exception.exceptions import ServiceApiException, ServiceUsageException, SdkException
 
+from .. import utils
 from ..utils import log_time
 from . import logger as root_logger
 from .base import Extractor
@@ -68,7 +69,7 @@ class AdobeAPIExtractor(Extractor):
         paragraph_starter_regex = regex.compile(r"(?ui)^\p{Z}*\p{N}+\p{Z}*\.")
         header_path_regex = regex.compile(r"(?u)\/H\d+")
 
-        with open(output_file, 'w+', encoding='utf-8') as file:
+        with utils.fs.open_file(output_file, 'w', encoding='utf-8') as file:
             for element in elements:
                 if 'Text' in element:
                     if 'Table' in element['Path']:
@@ -144,13 +145,14 @@ class AdobeAPIExtractor(Extractor):
             content (any): Extracted content to be saved.
             path (str): Destination path to save the file.
         """
-        if path.endswith('.txt'):
+        base_path, _ = utils.fs.split_compression(path)
+        if base_path.endswith('.txt'):
             self.save_as_text(
                 content, path,
-                format_wrt_layout=path.endswith(".processed.txt")
+                format_wrt_layout=base_path.endswith(".processed.txt")
             )
-        elif path.endswith('.json'):
-            with open(path, 'w+', encoding='utf-8') as file:
+        elif base_path.endswith('.json'):
+            with utils.fs.open_file(path, 'w', encoding='utf-8') as file:
                 json.dump(content, file, ensure_ascii=False, indent=4)
         else:
             super().save_to_file(content, path)
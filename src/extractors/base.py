@@ -3,6 +3,7 @@ import os
 import abc
 import itertools
 
+from .. import utils
 from . import logger as root_logger
 
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
@@ -10,6 +11,9 @@ logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 class Extractor(abc.ABC):
     """ Abstract class to represent an extractor for extracting content from PDF documents. """
 
+    # Compression format for saved artifacts (one of `utils.fs.COMPRESSION_EXTENSIONS`), or None to save them as is.
+    compression = None
+
     def load_pdf(self, pdf_reference: str | io.IOBase):
         """ Load PDF files into pdf objects or files. """
         if isinstance(pdf_reference, str):
@@ -24,7 +28,7 @@ class Extractor(abc.ABC):
             content (any): Extracted content to be saved.
             path (str): Destination path to save the file.
         """
-        with open(path, 'wb', encoding=None) as file:
+        with utils.fs.open_file(path, 'wb') as file:
             file.write(content.encode() if isinstance(content, str) else content)
 
     def extract_to_file(self, pdf_reference: str | io.IOBase, output_dir=None, skip_existing=False):
@@ -48,12 +52,13 @@ class Extractor(abc.ABC):
             base = os.path.basename(path)
             if output_dir is not None:
                 path = os.path.join(output_dir, base)
-            paths[i] = ( base, path )
+            paths[i] = ( base, utils.fs.with_compression(path, self.compression) )
         _paths = paths[0][1] if len(paths) == 1 else [ path[1] for path in paths ]
 
-        # If set to skip existing, skip existing.
-        if skip_existing and any(os.path.exists(path) for _, path in paths):
-            return _paths
+        # If set to skip existing, skip existing (saved compressed or not).
+        if skip_existing and any(utils.fs.find_variant(path) for _, path in paths):
+            existing = [ utils.fs.find_variant(path) or path for _, path in paths ]
+            return existing[0] if len(existing) == 1 else existing
 
         # Otherwise, extract content and save files.
         extracted_paths = []
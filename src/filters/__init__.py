@@ -1,13 +1,24 @@
 from .. import logger as root_logger
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
+# pylint: disable-next=wrong-import-position
+from ..registry import lazy_exports
+# pylint: disable-next=wrong-import-position
 from .base import Filter
-from .sent_count_filter import SentenceCountFilter
+# pylint: disable-next=wrong-import-position
+from .analysis import Analysis, AnalysisCache
+
+# Filters are imported on first access, as their dependencies are expensive to load.
+__getattr__ = lazy_exports(__name__, {
+    'SentenceCountFilter': '.sent_count_filter'
+})
 
 __version__ = "1.0.0"
 __author__  = "Kinshuk Vasisht"
 __all__     = [
     "Filter",
+    "Analysis",
+    "AnalysisCache",
     "SentenceCountFilter",
     "logger"
 ]
\ No newline at end of file
@@ -0,0 +1,128 @@
+import hashlib
+import threading
+import functools
+import collections
+
+import regex
+
+from . import logger as root_logger
+
+logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
+
+# Punkt tokenizer used for sentence artifacts.
+SENTENCE_TOKENIZER = "tokenizers/punkt/english.pickle"
+
+@functools.cache
+def load_tokenizer(path):
+    """ Loads a sentence tokenizer, once per process for every path. Punkt data is downloaded if missing. """
+    # pylint: disable-next=import-outside-toplevel
+    import nltk.data
+
+    if path.startswith("tokenizers/punkt"):
+        try:
+            nltk.data.find("tokenizers/punkt")
+        except LookupError:
+            nltk.download("punkt")
+    return nltk.data.load(path)
+
+@functools.cache
+def load_stopwords():
+    """ Loads the set of English stopwords, once per process. Stopwords are downloaded if missing. """
+    # pylint: disable-next=import-outside-toplevel
+    import nltk.data, nltk.corpus
+
+    try:
+        nltk.data.find("corpora/stopwords")
+    except LookupError:
+        nltk.download("stopwords")
+    return frozenset(nltk.corpus.stopwords.words("english"))
+
+_letter_regex = regex.compile(r"(?u)\p{L}")
+
+def tokenize_words(analysis):
+    """ Returns the word tokens of every sentence, as tokenized by NLTK. """
+    # pylint: disable-next=import-outside-toplevel
+    import nltk.tokenize
+    return [ nltk.tokenize.word_tokenize(sentence) for sentence in analysis['sentences'] ]
+
+def select_words(analysis):
+    """ Returns the tokens which are words (containing letters), excluding stopwords. """
+    stopwords = load_stopwords()
+    return [
+        token for tokens in analysis['tokens'] for token in tokens
+        if token.lower() not in stopwords and _letter_regex.search(token)
+    ]
+
+# Functions producing artifacts from the analysis of a paragraph, keyed by artifact name.
+# Producers may depend on other artifacts, which are computed (once) on demand.
+PRODUCERS = {
+    'sentences'     : lambda analysis: [ *load_tokenizer(SENTENCE_TOKENIZER).tokenize(analysis.text) ],
+    'tokens'        : tokenize_words,
+    'words'         : select_words,
+    'sentence_count': lambda analysis: len(analysis['sentences']),
+    'token_count'   : lambda analysis: sum(map(len, analysis['tokens'])),
+    'word_count'    : lambda analysis: len(analysis['words']),
+}
+
+class Analysis:
+    """ Artifacts of the analysis of a paragraph (such as sentences and tokens), computed when first needed. """
+
+    def __init__(self, text: str, cache: 'AnalysisCache') -> None:
+        self.text      = text
+        self.cache     = cache
+        self.artifacts = {}
+
+    def __contains__(self, name):
+        return name in self.artifacts
+
+    def __getitem__(self, name):
+        computed = name not in self.artifacts
+        if computed:
+            self.artifacts[name] = PRODUCERS[name](self)
+        with self.cache.lock:
+            self.cache.stats['computed' if computed else 'reused'] += 1
+        return self.artifacts[name]
+
+class AnalysisCache:
+    """ Cache of paragraph analyses keyed by a hash of the content, shared by all filters within a process,
+        so that a paragraph is tokenized once whatever the filters applied over it.
+        The cache holds the most recently used analyses, up to a maximum number. """
+
+    def __init__(self, max_entries=2**14) -> None:
+        """ Initializes an empty cache.
+
+        Args:
+            max_entries (int, optional): Maximum number of paragraph analyses to hold. Defaults to 16384.
+        """
+        self.max_entries = max_entries
+        self.analyses    = collections.OrderedDict()
+        self.lock        = threading.Lock()
+        self.stats       = collections.Counter()
+
+    @staticmethod
+    def make_key(text: str):
+        """ Returns the key for the analysis of a paragraph. """
+        return hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    def analyze(self, text: str) -> Analysis:
+        """ Returns the analysis of a paragraph, creating an empty one if not cached. """
+        key = self.make_key(text)
+        with self.lock:
+            if (analysis := self.analyses.get(key)) is not None:
+                self.analyses.move_to_end(key)
+                self.stats['hits'] += 1
+                return analysis
+            analysis = self.analyses[key] = Analysis(text, self)
+            self.stats['misses'] += 1
+            if len(self.analyses) > self.max_entries:
+                self.analyses.popitem(last=False)
+                self.stats['evictions'] += 1
+            return analysis
+
+    def clear(self):
+        """ Removes all cached analyses. """
+        with self.lock:
+            self.analyses.clear()
+
+# Analyses shared by filters in this process.
+ANALYSES = AnalysisCache()
@@ -1,8 +1,9 @@
 import abc
 import argparse
-import concurrent.futures
 
+from .. import utils
 from . import logger as root_logger
+from .analysis import ANALYSES, Analysis
 
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
@@ -10,6 +11,9 @@ class Filter(abc.ABC):
     """ Abstract class to represent a filter for selecting paragraphs. """
 
     name = "base"
+    # Names of artifacts from the shared analysis of paragraphs (see `analysis.PRODUCERS`) used by the filter.
+    # Filters declaring artifacts load paragraphs through `load_analysis`, so that filters share tokenization.
+    artifacts = ()
 
     def __init__(self) -> None:
         super().__init__()
@@ -49,18 +53,26 @@ class Filter(abc.ABC):
             self.options.update(options)
             self.refresh_state()
 
-    def load_options_from_args(self, args: argparse.Namespace):
-        """ Load options from an argparse Namespace variable.
+    @classmethod
+    def options_from_args(cls, args: argparse.Namespace) -> dict:
+        """ Returns the options for this filter from an argparse Namespace variable.
 
         Args:
             args (argparse.Namespace): Namespace containing parsed arguments.
         """
-        options = {
-            key[len(self.name)+1:] : value
+        return {
+            key[len(cls.name)+1:] : value
             for key, value in vars(args).items()
-            if key.startswith(self.name)
+            if key.startswith(cls.name)
         }
-        self.set_options(options)
+
+    def load_options_from_args(self, args: argparse.Namespace):
+        """ Load options from an argparse Namespace variable.
+
+        Args:
+            args (argparse.Namespace): Namespace containing parsed arguments.
+        """
+        self.set_options(self.options_from_args(args))
 
     @abc.abstractmethod
     def refresh_state(self):
@@ -83,6 +95,15 @@ class Filter(abc.ABC):
         """
         raise NotImplementedError
 
+    def load_analysis(self, analysis: Analysis):
+        """ Converts an analysed paragraph to the internal representation, using its shared artifacts.
+            By default, the paragraph is loaded from its text.
+
+        Args:
+            analysis (Analysis): The analysis of the paragraph, giving access to its artifacts by name.
+        """
+        return self.load(analysis.text)
+
     @abc.abstractmethod
     def decision(self, paragraph_rep):
         """ Returns a boolean indicating whether the filter accepts or rejects the paragraph.
@@ -95,8 +116,29 @@ class Filter(abc.ABC):
         """
         raise NotImplementedError
 
+    def evaluate_batch(self, paragraphs) -> list[bool]:
+        """ Decides whether to accept each of a batch of paragraphs, such as all paragraphs of a document.
+            Filters able to amortise work across paragraphs (such as by tokenizing in bulk, or computing
+            features as arrays) may override this. By default, paragraphs are loaded and decided one by one.
+
+        Args:
+            paragraphs (Sequence[str]): The paragraphs to evaluate, as a list or any other sequence
+                of strings (such as a NumPy or Arrow-backed column).
+
+        Returns:
+            Sequence[bool]: Mask of decisions, aligned with the paragraphs. Any sequence
+                of booleans (such as a NumPy array) may be returned.
+        """
+        # Runs inline when called from a worker of a shared executor, such as a filter task.
+        executor = utils.executors.EXECUTORS.get('io')
+        if self.artifacts:
+            reps = executor.map(self.load_analysis, [ *map(ANALYSES.analyze, paragraphs) ])
+        else:
+            reps = executor.map(self.load, paragraphs)
+        return [ *map(self.decision, reps) ]
+
     def evaluate(self, paragraphs: list, value = None) -> list[str]:
-        """ Filters paragraphs from a list of paragraphs.
+        """ Filters paragraphs from a list of paragraphs, using the decisions from `evaluate_batch`.
 
         Args:
             paragraphs (list): The list of paragraphs to evaluate.
@@ -105,14 +147,9 @@ class Filter(abc.ABC):
         Returns:
             list[Any]: List of accepted paragraphs.
         """
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            if value is not None:
-                paras = executor.map(value, paragraphs)
-            else:
-                paras = paragraphs
-            reps = executor.map(self.load, paras)
-            return [
-                para for para, decision in
-                zip(paragraphs, executor.map(self.decision, reps)) if decision
-            ]
+        paragraphs = list(paragraphs)
+        texts = [ *map(value, paragraphs) ] if value is not None else paragraphs
+        mask  = self.evaluate_batch(texts)
+        if len(mask) != len(paragraphs):
+            raise ValueError(f"{self.name}: got {len(mask)} decision(s) for {len(paragraphs)} paragraph(s)")
+        return [ para for para, decision in zip(paragraphs, mask) if decision ]
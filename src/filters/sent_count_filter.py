@@ -1,30 +1,26 @@
 import regex
-import nltk.data
-import nltk.corpus
-import nltk.tokenize
 
 from .base import Filter
+from .analysis import SENTENCE_TOKENIZER, load_tokenizer, load_stopwords
 
 class SentenceCountFilter(Filter):
     """ Filters paragraphs over number of sentences. """
 
     name = "sent_count"
+    artifacts = ( 'sentences', 'words' )
 
     def __init__(self) -> None:
         super().__init__()
 
-        try:
-            nltk.data.find("tokenizers/punkt")
-        except LookupError:
-            nltk.download("punkt")
+        # Deferred, as nltk is expensive to import and unused unless the filter is applied.
+        # pylint: disable-next=import-outside-toplevel
+        import nltk.tokenize
 
-        try:
-            nltk.data.find("corpora/stopwords")
-        except LookupError:
-            nltk.download("stopwords")
-
-        self.tokenizer = nltk.data.load("tokenizers/punkt/english.pickle")
-        self.stopwords = { *nltk.corpus.stopwords.words("english") }
+        self.tokenizer = load_tokenizer(SENTENCE_TOKENIZER)
+        self.stopwords = load_stopwords()
+        self.word_tokenize = nltk.tokenize.word_tokenize
+        self.letter_regex = regex.compile(r"(?u)\p{L}")
+        self.min_sents, self.min_words = 3, 30
 
     @classmethod
     def get_option_list(cls):
@@ -36,22 +32,64 @@ class SentenceCountFilter(Filter):
                     "bypass the sentence count requirement. Defaults to 30"
                  )),
             dict(name="tokenizer_path", default=None,
-                 help="path to the sentence tokenizer to use (must be compatible with NLTK)")
+                 help="path to the sentence tokenizer to use (must be compatible with NLTK)"),
+            dict(name="fast", action='store_true',
+                 help=(
+                    "count sentences and words incrementally, stopping as soon as either minimum is met "
+                    "(decisions are unchanged)"
+                 ))
         ]
 
     def refresh_state(self):
+        self.min_sents = int(self.options.get('min_sents', 3))
+        self.min_words = int(self.options.get('min_words', 30))
         if self.options['tokenizer_path'] is not None:
-            self.tokenizer = nltk.data.load(self.options['tokenizer_path'])
+            self.tokenizer = load_tokenizer(self.options['tokenizer_path'])
 
     def load(self, paragraph):
+        if self.options.get('fast'):
+            return self.count(paragraph)
         sentences = [ *self.tokenizer.tokenize(paragraph) ]
         words = [
-            word for sentence in sentences for word in nltk.tokenize.word_tokenize(sentence)
+            word for sentence in sentences for word in self.word_tokenize(sentence)
             if word.lower() not in self.stopwords and regex.search(r"(?ui)\p{L}+", word)
         ]
         return sentences, words
 
+    def load_analysis(self, analysis):
+        # A custom tokenizer gives sentences (and so words) of its own, which are not shared.
+        if self.options.get('tokenizer_path') is not None:
+            return self.load(analysis.text)
+        # Counting stops early, unless the words have been tokenized already.
+        if self.options.get('fast') and 'words' not in analysis:
+            return self.count(analysis.text)
+        return analysis['sentences'], analysis['words']
+
+    def count(self, paragraph):
+        """ Counts sentences and words (excluding stopwords) in a paragraph, sentence by sentence,
+            until either count reaches its minimum.
+
+        Returns:
+            tuple[int, int]: Counts of sentences and words, up to where counting stopped.
+        """
+        if hasattr(self.tokenizer, 'span_tokenize'):
+            sentences = ( paragraph[start:end] for start, end in self.tokenizer.span_tokenize(paragraph) )
+        else:
+            sentences = self.tokenizer.tokenize(paragraph)
+
+        num_sents, num_words = 0, 0
+        for sentence in sentences:
+            num_sents += 1
+            if num_sents >= self.min_sents: break
+            # Words are tokenized as when counted in full, so that decisions do not differ.
+            for word in self.word_tokenize(sentence):
+                if word.lower() not in self.stopwords and self.letter_regex.search(word):
+                    num_words += 1
+                    if num_words >= self.min_words: return num_sents, num_words
+        return num_sents, num_words
+
     def decision(self, paragraph_rep):
         sentences, words = paragraph_rep
-        return len(sentences) >= int(self.options['min_sents']) \
-            or len(words) >= int(self.options['min_words'])
\ No newline at end of file
+        if not isinstance(sentences, int):
+            sentences, words = len(sentences), len(words)
+        return sentences >= self.min_sents or words >= self.min_words
\ No newline at end of file
@@ -18,20 +18,14 @@ import sys
 import functools
 import traceback
 import collections
-import concurrent.futures
 
 from . import logger
-from .. import utils, extractors
+from .. import utils, registry
 
 # ==== Module Constants
 
-# Dictionary of available extractors.
-AVAILABLE_EXTRACTORS  = {
-    'pdfminer_text': extractors.PdfminerHighLevelTextExtractor,
-    'parsr'        : extractors.ParsrExtractor,
-    'parsr_custom' : extractors.ParsrExtractor,
-    'adobe_api'    : extractors.AdobeAPIExtractor
-}
+# Dictionary of available extractors, imported when first used.
+AVAILABLE_EXTRACTORS  = registry.EXTRACTORS
 
 # Dictionary of extractor initialization options.
 EXTRACTOR_OPTIONS = {
@@ -139,6 +133,9 @@ def extract(prog, args, judgment_batches, **_):
     # Initialize custom argument extractors:
     available_extractors = initialize_extractors(args)
     args.extractors = list(available_extractors.keys())
+    for extractor, compression in getattr(args, 'compress_artifacts', {}).items():
+        if extractor in available_extractors:
+            available_extractors[extractor].compression = compression
     logger.debug("available initialized extractors: %s", ','.join(args.extractors))
 
     # Process each batch one by one:
@@ -154,18 +151,18 @@ def extract(prog, args, judgment_batches, **_):
             # Execute all extractors concurrently:
             print("  : extracting from batch #", i, " ...", sep='')
             manager = utils.ProgressBarManager(size=20)
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                extract_dirs = executor.map(extract_task, (
-                    ExtractTaskArgs(
-                        manager, batch, available_extractors[extractor],
-                        extractor, output_dir, args.skip_existing)
-                    for extractor in args.extractors
-                ))
-                batch['extractions'] = {
-                    extractor: extract_dir
-                    for extractor, extract_dir in zip(args.extractors, extract_dirs)
-                }
-                print()
+            executor = utils.executors.EXECUTORS.get('api')
+            extract_dirs = executor.map(extract_task, (
+                ExtractTaskArgs(
+                    manager, batch, available_extractors[extractor],
+                    extractor, output_dir, args.skip_existing)
+                for extractor in args.extractors
+            ))
+            batch['extractions'] = {
+                extractor: extract_dir
+                for extractor, extract_dir in zip(args.extractors, extract_dirs)
+            }
+            print()
 
         except Exception as exc:
             print('error', flush=True)
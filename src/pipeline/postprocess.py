@@ -6,7 +6,11 @@
     This module provides postprocessing functions and associated utilities.
     These functions perform the following tasks:
 
-    - Merge judgment entries that refer to the same content together.
+    - Merge judgment entries that refer to the same content together, by compacting
+      the log of merge requests produced during de-duplication.
+    - Write back JSON documents modified over the course of the pipeline.
+    - Close the cache of HTTP responses, reporting its hit rate.
+    - Release resources held by retrievers, such as pools searching ahead of time.
 
     Author : Kinshuk Vasisht
     Version: 1.0.0
@@ -16,12 +20,11 @@
 
 import os
 import sys
-import json
 import traceback
 import collections
 
 from . import logger
-from .. import utils
+from .. import utils, registry, retrievers
 
 # ==== Helper Functions
 
@@ -53,47 +56,129 @@ def merge_entries(judgment: dict, entries):
     judgment.update(merged_keys)
     return judgment
 
-# ==== Main pipeline phase implementation
-
-def merge_judgments(prog, args, judgment_batches, **_):
-    """ Post-processing phase: Merge judgment objects together as one. """
+def compact_merge_log(prog, merge_log, document_cache, debug=False):
+    """ Applies pending merge requests from a merge request log, grouped by file.
+        Every affected file is loaded and written back whole, once for all of its requests,
+        before the consumed requests are removed from the log. Requests for files which
+        cannot be updated are retained for a later compaction, whereas requests for entries
+        no longer in their file (such as those pruned after the requests were logged) are
+        discarded, as they can never be applied.
 
-    if not args.save_json: return
-
-    print(prog, ": post-processing: merging judgments with same data ...")
+    Args:
+        prog (str): Program name, for error messages.
+        merge_log (MergeRequestLog): Log of merge requests to compact.
+        document_cache (DocumentCache): Cache to load and update JSON documents through.
+        debug (bool, optional): If true, prints tracebacks for errors. Defaults to False.
 
-    # Merge requests across batches.
-    all_requests = collections.defaultdict(list)
-    for batch in judgment_batches:
-        all_requests = utils.merge_dicts(all_requests, batch['merger_requests'])
+    Returns:
+        int: Number of entries updated.
+    """
+    if merge_log.rotate() is None: return 0
 
-    # Group requests with common indexes.
     print("  : grouping judgments as per indices ... ", sep='', end='', flush=True)
-    clustered_requests = collections.defaultdict(lambda: collections.defaultdict(list))
-    for json_file_path, entries in all_requests.items():
-        for entry in entries:
-            index, judgment = entry['index'], entry['data']
-            clustered_requests[json_file_path][index].append(judgment)
+    clustered_requests = merge_log.read_pending()
     print("done")
 
+    updated, failed_requests = 0, {}
     for json_file_path, merge_dict in clustered_requests.items():
         stem = os.path.basename(json_file_path)
         print("  : updating data in", stem, "... ", end='', flush=True)
         try:
-            with open(json_file_path, 'r+', encoding='utf-8') as file:
-                data = json.load(file)
-
-                for index, entries in utils.iter_progress(merge_dict.items()):
-                    data['data'][index] = merge_entries(data['data'][index], entries)
-
-                file.seek(0)
-                json.dump(data, file, indent=4, ensure_ascii=False)
-                file.truncate()
+            data, stale = document_cache.get(json_file_path), {}
+
+            for index, entries in utils.iter_progress(merge_dict.items()):
+                if not 0 <= index < len(data['data']):
+                    stale[index] = entries
+                    continue
+                data['data'][index] = merge_entries(data['data'][index], entries)
+
+            document_cache.mark_dirty(json_file_path)
+            document_cache.flush([ json_file_path ], evict=True)
+            updated += len(merge_dict) - len(stale)
+            if stale:
+                print("\b\bdone (discarded ", sum(map(len, stale.values())), " request(s) for missing entries)", sep='')
+                logger.warning("%s: discarded requests for missing entries: %s", json_file_path, stale)
+            else:
                 print("\b\bdone")
 
         except Exception as exc:
+            failed_requests[json_file_path] = merge_dict
             print("\b\berror")
             print(prog, ": error: ", exc, sep='', file=sys.stderr)
             logger.exception("error")
+            if debug:
+                traceback.print_exc()
+
+    merge_log.complete(failed_requests)
+    return updated
+
+# ==== Main pipeline phase implementation
+
+def merge_judgments(prog, args, _judgment_batches, document_cache, merge_log, **_):
+    """ Post-processing phase: Merge judgment objects together as one. """
+
+    if not args.save_json: return
+
+    if args.defer_merges:
+        print(prog, ": post-processing: deferring merge requests to ", merge_log.path, sep='')
+        return
+
+    print(prog, ": post-processing: merging judgments with same data ...")
+    compact_merge_log(prog, merge_log, document_cache, debug=args.debug)
+
+def save_documents(prog, args, _judgment_batches, document_cache, **_):
+    """ Post-processing phase: Write modified JSON documents from the document cache to disk. """
+
+    if not args.save_json: return 0
+
+    print(prog, ": post-processing: saving modified JSON documents ... ", sep='', end='', flush=True)
+    try:
+        count = document_cache.flush()
+        print("done (", count, " file(s))", sep='')
+        return count
+    except Exception as exc:
+        print("error")
+        print(prog, ": error: ", exc, sep='', file=sys.stderr)
+        logger.exception("error")
+        if args.debug:
+            traceback.print_exc()
+        return 0
+
+def close_response_cache(prog, args, _judgment_batches, response_cache=None, **_):
+    """ Post-processing phase: Report statistics for the cache of HTTP responses, and close it. """
+
+    if response_cache is None: return None
+
+    stats = dict(response_cache.stats)
+    print(prog, ": post-processing: response cache: ", stats.get('hits', 0), " hit(s), ",
+          stats.get('misses', 0), " miss(es) (hit rate: ", f"{response_cache.hit_rate():.1%}", "), ",
+          stats.get('evictions', 0), " eviction(s)", sep='')
+    logger.info("response cache: %s", ', '.join(f"{key}: {val}" for key, val in stats.items()))
+    retrievers.JudgmentRetriever.set_cache(None)
+    response_cache.close()
+    return stats
+
+def shutdown_retrievers(prog, args, _judgment_batches, **_):
+    """ Post-processing phase: Release resources held by retrievers used over the run, such as pools of workers. """
+
+    for name, retriever in list(registry.RETRIEVERS.loaded.items()):
+        try:
+            retriever.shutdown()
+        except Exception as exc:
+            print(prog, ": error: ", name, ": ", exc, sep='', file=sys.stderr)
+            logger.exception("error")
             if args.debug:
                 traceback.print_exc()
+
+def shutdown_executors(prog, args, _judgment_batches, **_):
+    """ Post-processing phase: Report metrics for the executors shared by the pipeline, and shut them down. """
+
+    metrics = utils.executors.EXECUTORS.metrics()
+    for name, stats in metrics.items():
+        logger.info("%s executor: %s", name, ', '.join(f"{key}: {val}" for key, val in stats.items()))
+        if args.debug:
+            print(prog, ": post-processing: ", name, " executor: ", stats['completed'], " task(s) over ",
+                  stats['workers'], " worker(s), peak queue depth: ", stats['peak_pending'],
+                  ", utilisation: ", f"{stats['utilisation']:.1%}", sep='')
+    utils.executors.EXECUTORS.shutdown()
+    return metrics
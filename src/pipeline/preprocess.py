@@ -8,6 +8,9 @@
 
     - Build indexes over judgments, storing case numbers and URLs of existing judgments for efficient retrieval
     - Build indexes over documents, storing file hashes of downloaded and processed files.
+    - Create the write-back cache for dataset JSON documents shared across phases.
+    - Open the append-only log for merge requests produced during de-duplication.
+    - Open the persistent cache of HTTP responses used by the retrievers, if enabled.
 
     Author : Kinshuk Vasisht
     Version: 1.0.0
@@ -18,35 +21,19 @@
 import os
 import sys
 import glob
+import json
 import typing
 import hashlib
 import traceback
 import threading
 import collections
-import concurrent.futures
-from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
-from .. import utils
+from .. import utils, retrievers
+from ..utils import remove_query_param
 from . import logger
 
 # ==== Helper functions
 
-def remove_query_param(url, key):
-    """ Removes a key from the query segment of a URL.
-
-    Args:
-        url (str): The URL to remove from.
-        key (str): The key to remove.
-
-    Returns:
-        str: The new URL with the reduced query segment.
-    """
-    url_res = urlparse(url)
-    query = parse_qs(url_res.query, keep_blank_values=True)
-    query.pop(key, None)
-    url_res = url_res._replace(query=urlencode(query, True))
-    return urlunparse(url_res)
-
 def chunk_reader(file_descriptor: typing.IO, chunk_size = 4096):
     """ Creates a generator over a file descriptor to read a file in chunks.
 
@@ -75,7 +62,8 @@ def file_digest(filepath, primary_chunk_only = False):
         bytes: The SHA1 digest of the file contents (complete or partial).
     """
     hash_object = hashlib.sha1()
-    with open(filepath, 'rb') as file:
+    # Compressed files are hashed by their content, so that the hash is independent of the compression.
+    with utils.fs.open_file(filepath, 'rb') as file:
         if primary_chunk_only:
             hash_object.update(file.read(1024))
         else:
@@ -109,10 +97,9 @@ class FileIndexStore:
         """
         group = os.path.basename(directory)
         files = glob.glob(file_glob, root_dir=directory)
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            file_index_infos = [ *executor.map(
-                self.get_indexing_info, (os.path.join(directory, file) for file in files),
-            ) ]
+        file_index_infos = [ *utils.executors.EXECUTORS.get('io').map(
+            self.get_indexing_info, (os.path.join(directory, file) for file in files),
+        ) ]
         for file, index_info in zip(files, file_index_infos):
             meta = metadata_map(file) if metadata_map else file
             self.load(os.path.join(directory, file), group, index_info, meta, callback)
@@ -129,7 +116,7 @@ class FileIndexStore:
         if not index_info.get('minhash', None):
             index_info['minhash'] = file_digest(filepath, primary_chunk_only=True)
         if not index_info.get('size', None):
-            index_info['size']    = os.stat(filepath).st_size
+            index_info['size']    = utils.fs.content_size(filepath)
         return index_info
 
     def load(self, filepath, group, index_info=None, meta=None, callback=None):
@@ -155,7 +142,7 @@ class FileIndexStore:
         if not index_info.get('minhash', None):
             index_info['minhash'] = file_digest(filepath, primary_chunk_only=True)
         if not index_info.get('size', None):
-            index_info['size']    = os.stat(filepath).st_size
+            index_info['size']    = utils.fs.content_size(filepath)
 
         with self.lock:
             if index_info['size'   ] not in self.data[group]['size'   ]:
@@ -188,7 +175,7 @@ class FileIndexStore:
         status = False
         if filepath is not None:
             if os.path.exists(filepath):
-                info['size'] = os.stat(filepath).st_size
+                info['size'] = utils.fs.content_size(filepath)
                 if info['size'] in self.data[group]['size']:
                     info['minhash'] = file_digest(filepath, primary_chunk_only=True)
                     if info['minhash'] in self.data[group]['minhash']:
@@ -260,7 +247,8 @@ class JudgmentIndexStore:
         if (case_no := judgment.get('case_number', judgment.get('case', None))) is not None:
             if (index := self.data[group]['case'].get(case_no, -1)) != -1:
                 return tuple(self.data[group]['data'][index].values())
-        elif (url := judgment.get('document_href', judgment.get('url', None))) is not None:
+        # Judgments with different case numbers may still refer to the same document, such as across queries.
+        if (url := judgment.get('document_href', judgment.get('url', None))) is not None:
             url = remove_query_param(url, 'ID')
             if (index := self.data[group]['urls'].get(url, -1)) != -1:
                 return tuple(self.data[group]['data'][index].values())
@@ -279,14 +267,142 @@ class JudgmentIndexStore:
         """
         return self.get(judgment, group)[0] is not None
 
+class MergeRequestLog:
+    """ Append-only log of merge requests, recording judgments to be merged with existing
+        entries in dataset JSON files. Requests are stored as JSON lines and applied in bulk
+        during compaction, which consumes all pending requests. """
+
+    def __init__(self, path, enabled=True) -> None:
+        """ Initializes the log over a file.
+
+        Args:
+            path (str): Path to the log file. Pending requests use the same path with a `.pending` suffix.
+            enabled (bool, optional): If false, appended requests are discarded. Defaults to True.
+        """
+        self.lock         = threading.Lock()
+        self.path         = path
+        self.pending_path = path + ".pending"
+        self.enabled      = enabled
+
+    def append(self, json_file_path, index, judgment):
+        """ Appends a request to merge a judgment into an entry in a JSON file.
+
+        Args:
+            json_file_path (str): Path to the JSON file containing the target entry.
+            index (int): Index of the target entry in the file's data.
+            judgment (dict): Judgment object to merge with the entry.
+        """
+        self.extend({ json_file_path: [ { 'index': index, 'data': judgment } ] })
+
+    def extend(self, merger_requests: dict):
+        """ Appends merge requests, as generated by the de-duplication steps.
+
+        Args:
+            merger_requests (dict[str, list[dict]]): Lists of requests (dicts with
+                'index' and 'data' keys), keyed by the path to the target JSON file.
+        """
+        if not self.enabled: return
+        lines = [
+            json.dumps({ 'json': json_file_path, **entry }, ensure_ascii=False) + '\n'
+            for json_file_path, entries in merger_requests.items()
+            for entry in entries
+        ]
+        if not lines: return
+        with self.lock:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.writelines(lines)
+
+    def rotate(self):
+        """ Moves all requests appended so far to the pending file, for compaction.
+            Requests left pending by an earlier, interrupted compaction are retained.
+
+        Returns:
+            str|None: Path to the pending file, or None if there are no pending requests.
+        """
+        with self.lock:
+            if os.path.exists(self.path):
+                if os.path.exists(self.pending_path):
+                    with open(self.path, 'r', encoding='utf-8') as src, \
+                         open(self.pending_path, 'a', encoding='utf-8') as dst:
+                        for line in src:
+                            dst.write(line)
+                    os.remove(self.path)
+                else:
+                    os.replace(self.path, self.pending_path)
+            return self.pending_path if os.path.exists(self.pending_path) else None
+
+    def read_pending(self):
+        """ Reads pending requests, grouped by target file and entry index.
+
+        Returns:
+            dict[str, dict[int, list[dict]]]: Judgments to merge, keyed by file and index.
+        """
+        requests = collections.defaultdict(lambda: collections.defaultdict(list))
+        if os.path.exists(self.pending_path):
+            with open(self.pending_path, 'r', encoding='utf-8') as file:
+                for line in file:
+                    if not line.strip(): continue
+                    entry = json.loads(line)
+                    requests[entry['json']][entry['index']].append(entry['data'])
+        return requests
+
+    def complete(self, failed_requests=None):
+        """ Marks pending requests as applied, retaining only failed requests for a later compaction.
+
+        Args:
+            failed_requests (dict[str, dict[int, list[dict]]], optional): Requests which could
+                not be applied, in the format returned by `read_pending()`. Defaults to None.
+        """
+        with self.lock:
+            if failed_requests:
+                with open(self.pending_path, 'w', encoding='utf-8') as file:
+                    for json_file_path, merge_dict in failed_requests.items():
+                        for index, judgments in merge_dict.items():
+                            for judgment in judgments:
+                                file.write(json.dumps({
+                                    'json': json_file_path, 'index': index, 'data': judgment
+                                }, ensure_ascii=False) + '\n')
+            elif os.path.exists(self.pending_path):
+                os.remove(self.pending_path)
+
 # === Main pipeline phase implementation
 
 def map_from_index(dict_index: dict):
     """ Mapping function to map a file prefix to associated entry from a dictionary. """
     def map_from_index_impl(file):
-        return dict_index.get(os.path.splitext(file)[0], None)
+        return dict_index.get(os.path.splitext(os.path.basename(utils.fs.split_compression(file)[0]))[0], None)
     return map_from_index_impl
 
+def create_document_cache(prog, args):
+    """ Pre-processing stage: Create the write-back cache for dataset JSON documents. """
+    del prog
+    return utils.fs.DocumentCache(
+        compact=getattr(args, 'compact_json', False), defer=getattr(args, 'defer_json_writes', False),
+        eager=getattr(args, 'json_checkpoints', False)
+    )
+
+def open_merge_log(prog, args):
+    """ Pre-processing stage: Open the append-only log of merge requests. """
+    del prog
+    json_dir = os.path.join(args.output_dir, "json")
+    if args.save_json:
+        os.makedirs(json_dir, exist_ok=True)
+    return MergeRequestLog(os.path.join(json_dir, "merge_requests.jsonl"), enabled=args.save_json)
+
+def open_response_cache(prog, args):
+    """ Pre-processing stage: Open the cache of HTTP responses shared by the retrievers, if enabled. """
+    del prog
+    if not getattr(args, 'http_cache', False): return None
+    # pylint: disable-next=import-outside-toplevel
+    from ..retrievers.cache import ResponseCache
+
+    cache = ResponseCache(
+        os.path.join(args.output_dir, "cache", "responses.sqlite3"),
+        ttl=args.http_cache_ttl * 3600, max_size=args.http_cache_size * 2**20
+    )
+    retrievers.JudgmentRetriever.set_cache(cache)
+    return cache
+
 def load_indexes(prog, args):
     """ Pre-processing stage: Load file and judgment indexes for detecting duplicates. """
     file_index     = FileIndexStore()
@@ -328,6 +444,12 @@ def load_indexes(prog, args):
                     output_dir, "*.pdf", map_from_index(json_index),
                     utils.show_indeterminate_progress()
                 )
+                # Documents in the content-addressed store, if any, belong to the same group.
+                if os.path.isdir(store_dir := os.path.join(output_dir, "objects")):
+                    file_index.load_directory(
+                        output_dir, os.path.join("objects", utils.fs.ContentStore(store_dir).glob(".pdf")),
+                        map_from_index(json_index), utils.show_indeterminate_progress()
+                    )
                 print("\b\bdone")
             except Exception as exc:
                 print("\b\berror")
@@ -342,7 +464,7 @@ def load_indexes(prog, args):
                     try:
                         print(f"  : loading hashes for {extractor} ... ", sep='', end = '', flush=True)
                         file_index.load_directory(
-                            extract_output_dir, "*.txt", map_from_index(json_index),
+                            extract_output_dir, "*.txt*", map_from_index(json_index),
                             utils.show_indeterminate_progress()
                         )
                         print("\b\bdone")
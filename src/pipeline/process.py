@@ -93,7 +93,7 @@ def deduplicate_by_content(file_index, extractor, batch, judgments, judgment_ind
 
 # ==== Module Functions
 
-def process(prog, args, judgment_batches, data_indexes, **_):
+def process(prog, args, judgment_batches, data_indexes, document_cache, merge_log, **_):
     """ Tertiary pipeline phase: process extracted text content. """
 
     file_index, _ = data_indexes
@@ -105,7 +105,7 @@ def process(prog, args, judgment_batches, data_indexes, **_):
         data = {}
         try:
             if args.save_json:
-                data = utils.fs.read_json(batch['json'])
+                data = document_cache.get(batch['json'])
             judgments = data.get('data', [])
             judgment_indexes = None
 
@@ -118,7 +118,7 @@ def process(prog, args, judgment_batches, data_indexes, **_):
                 unique_judgment_indexes, batch['indexes'], merger_requests = deduplicate_by_content(
                     file_index, extractor, batch, judgments, judgment_indexes
                 )
-                batch['merger_requests'] = utils.merge_dicts(batch['merger_requests'], merger_requests)
+                merge_log.extend(merger_requests)
                 judgment_indexes = unique_judgment_indexes
 
                 print("done")
@@ -149,11 +149,14 @@ def process(prog, args, judgment_batches, data_indexes, **_):
 
                 if args.save_json:
                     judgments = list(utils.filter_by_index(judgments, judgment_indexes))
-                    print("    updating filtered results to JSON ... ", end='', flush=True)
+                    print("    updating filtered results in the document cache ... ", end='', flush=True)
                     data['data'] = judgments
-                    utils.fs.write_json(batch['json'], data)
+                    document_cache.mark_dirty(batch['json'])
                     print("done")
 
+            if args.save_json:
+                document_cache.checkpoint(batch['json'])
+
         except Exception as exc:
             print('error', flush=True)
             print(prog, ": error: ", exc, sep='', file=sys.stderr, flush=True)
@@ -24,16 +24,22 @@ import datetime
 import traceback
 import collections
 
-from .. import utils, retrievers
+from .. import utils, registry
 from . import logger
 
 # ==== Module Constants
 
-# Dictionary of available court website retrievers.
-AVAILABLE_RETRIEVERS  = {
-    'DHC': retrievers.DHCJudgmentRetriever,
-    'SC' : retrievers.SCJudgmentRetriever
-}
+# Dictionary of available court website retrievers, imported when first used.
+AVAILABLE_RETRIEVERS  = registry.RETRIEVERS
+
+# ==== Type Declarations
+
+class NoJudgmentsFound(RuntimeError):
+    """ Raised when a search returns no judgments, holding the metadata of the results page. """
+
+    def __init__(self, metadata=None) -> None:
+        super().__init__("no judgments found")
+        self.metadata = metadata or {}
 
 # ==== Helper Functions
 
@@ -42,6 +48,25 @@ def now(timezone=None):
     timestamp = datetime.datetime.now(tz=timezone).isoformat()
     return timestamp[:timestamp.rfind('.')]
 
+def parse_judgment_date(date_string):
+    """ Parses the date of a judgment, as listed in search results. Returns None if the date is not recognized. """
+    for date_format in ( "%d/%m/%Y", "%d-%m-%Y", "%Y-%m-%d" ):
+        try:
+            return datetime.datetime.strptime(str(date_string).strip(), date_format).date()
+        except ValueError:
+            continue
+    return None
+
+def latest_date(judgments, metadata=None, default=None):
+    """ Returns the latest date among judgments and the date range of a search, in ISO 8601 format.
+        The end of the date range counts only up to the current date, as searches may span future dates. """
+    dates = [ parse_judgment_date(judgment.get('date')) for judgment in judgments ]
+    if metadata and (end_date := parse_judgment_date(metadata.get('end_date'))):
+        dates.append(min(end_date, datetime.date.today()))
+    dates = [ date.isoformat() for date in dates if date is not None ]
+    if default: dates.append(default)
+    return max(dates, default=None)
+
 # ==== Module Functions
 
 def get_retriever_names():
@@ -125,7 +150,9 @@ def deduplicate_files(file_index, court, judgments, judgment_files, meta_base=No
             unique_judgment_files.append(file)
             unique_judgments.append(judgment)
         else:
-            os.remove(file)
+            # Documents shared by judgments are downloaded once, and must not be removed as duplicates of themselves.
+            if info.get('match') != file:
+                os.remove(file)
             merger_requests[data['json']].append({
                 'index': data['index'],
                 'data': judgment
@@ -133,15 +160,39 @@ def deduplicate_files(file_index, court, judgments, judgment_files, meta_base=No
 
     return unique_judgments, unique_judgment_files, merger_requests
 
+def store_documents(store, judgments, judgment_files):
+    """ Moves downloaded documents into a content-addressed store, pointing judgments to the stored files.
+
+    Args:
+        store (utils.fs.ContentStore): Store to move documents into.
+        judgments (list): List of judgment metadata objects, updated with the stored paths and digests.
+        judgment_files (list): List of downloaded files, with None for failed downloads.
+
+    Returns:
+        list: Paths of the stored files, with None for failed downloads.
+    """
+    stored_files = []
+    for judgment, file in zip(judgments, judgment_files):
+        if file is not None:
+            file, digest, _ = store.add(file)
+            judgment.update(document_path=file, document_digest=digest)
+        stored_files.append(file)
+    return stored_files
+
 # ==== Main pipeline phase implementation
 
-def search_and_scrape(prog, args, data_indexes, **_):
+def search_and_scrape(prog, args, data_indexes, document_cache, merge_log, **_):
     """ Primary pipeline phase: Search and scrape judgments based on a given
         list of court websites and search parameters. """
 
     batches = []
     file_index, judgment_index = data_indexes
 
+    # Watermarks record the progress of earlier crawls, per court and query, for incremental runs.
+    watermark_path = os.path.join(args.output_dir, "json", "watermarks.json")
+    watermarks     = utils.fs.read_json(watermark_path) if os.path.exists(watermark_path) else {}
+    crawl_stamp    = now()
+
     # Process queries for each court one-by-one
     for court in args.courts:
 
@@ -152,13 +203,31 @@ def search_and_scrape(prog, args, data_indexes, **_):
         if args.save_json:
             os.makedirs(json_dir, exist_ok=True)
 
+        # Documents are optionally kept in a content-addressed store, under directories named by their digests.
+        store = None
+        if getattr(args, 'content_store', False):
+            store = utils.fs.ContentStore(os.path.join(output_dir, "objects"))
+
         retriever = AVAILABLE_RETRIEVERS[court]
+        if court in (args.court_urls or {}):
+            retriever.set_base_url(args.court_urls[court])
 
         print(prog, ': searching judgments from ', court, ' ... ', sep='', flush=True)
         # Process each query one-by-one
         for query in args.queries:
             num_pages, num_docs, current_page = 0, 0, args.page
 
+            # In incremental mode, stop at pages of known judgments, and search date ranges
+            # only from the latest date seen before, up to the current date.
+            watermark   = watermarks.get(court, {}).get(query) if args.incremental else None
+            start_date, end_date = args.start_date, args.end_date
+            if args.incremental:
+                today    = datetime.date.today()
+                end_date = min(end_date or today, today)
+                if watermark is not None and start_date is None and watermark.get('latest_date'):
+                    start_date = min(datetime.date.fromisoformat(watermark['latest_date']), end_date)
+            known_pages, newest_date = 0, None
+
             # Process all search results for a given query on a given court, or until specified limits are reached.
             while True:
                 try:
@@ -168,7 +237,11 @@ def search_and_scrape(prog, args, data_indexes, **_):
                     json_file      = f'judgments {utils.fs.pathsafe(json_filestem)}.json'
                     json_file_path = os.path.join(json_dir, json_file)
 
-                    merger_requests = collections.defaultdict(list)
+                    # Pages shift as new judgments are published, so results of earlier crawls are kept aside.
+                    if args.incremental and not args.skip_existing and os.path.exists(json_file_path):
+                        json_filestem  = f"{court} {query} page {current_page} {crawl_stamp}"
+                        json_file      = f'judgments {utils.fs.pathsafe(json_filestem)}.json'
+                        json_file_path = os.path.join(json_dir, json_file)
 
                     print('  : searching using ', ', '.join(f"{key} as {val}" for key,val in search_params.items()),
                           ' ... ', end='', sep='', flush=True)
@@ -178,10 +251,11 @@ def search_and_scrape(prog, args, data_indexes, **_):
                         print("skip")
                         print("    skipping search and downloading judgments (files exist)", sep='')
 
-                        data           = utils.fs.read_json(json_file_path)
+                        data           = document_cache.get(json_file_path)
                         judgments      = data['data']
                         metadata       = data['meta']['response']
                         judgment_files = [
+                            judgment['document_path'] if judgment.get('document_digest') else
                             os.path.join(output_dir, os.path.basename(judgment['document_path']))
                             for judgment in data['data'] if judgment['document_path'] is not None
                         ]
@@ -189,30 +263,35 @@ def search_and_scrape(prog, args, data_indexes, **_):
                     else:
                         judgments, metadata = retriever.get_judgments(
                             query, page=current_page,
-                            start_date=args.start_date,
-                            end_date=args.end_date
+                            start_date=start_date,
+                            end_date=end_date,
+                            window_days=args.window_days,
+                            window_limit=args.window_limit,
+                            workers=args.window_workers
                         )
 
                         if metadata is not None:
-                            current_page = metadata['page']
+                            current_page = metadata.get('page', current_page)
                             search_params['page'] = current_page
 
                         if not judgments:
-                            raise RuntimeError("no judgments found")
+                            raise NoJudgmentsFound(metadata)
                         else: print('done')
+                        newest_date = latest_date(judgments, metadata, default=newest_date)
 
                         # Select only those judgments not in the judgment index store.
                         print("  : filtering existing judgment entries (based on case numbers and URLs) ... ", end='')
                         unique_judgments, stats, new_merger_requests = deduplicate_judgments(
                             judgment_index, court, judgments, { 'json': json_file_path }
                         )
-                        merger_requests = utils.merge_dicts(merger_requests, new_merger_requests)
+                        merge_log.extend(new_merger_requests)
                         logger.info(
                             "de-duplication, step 1: total: %d, unique: %d (pruned: %s (case number: %d, URL: %d))",
                             len(judgments), len(unique_judgments), len(judgments) - len(unique_judgments),
                             stats['same_case_number_count'], stats['same_url_count']
                         )
                         judgments = unique_judgments
+                        known_pages = 0 if judgments else known_pages + 1
                         print('done')
 
                         # Remove entries if the requested limits are reached.
@@ -229,12 +308,15 @@ def search_and_scrape(prog, args, data_indexes, **_):
                         toc = timeit.default_timer()
                         print(f'done (~{toc-tic:.3}s)', flush=True)
 
+                        if store is not None:
+                            judgment_files = store_documents(store, judgments, judgment_files)
+
                         # Select only those judgments not in the file index store.
                         print("  : filtering existing judgment files (based on hashes) ... ", end='')
                         unique_judgments, unique_judgment_files, new_merger_requests = deduplicate_files(
                             file_index, court, judgments, judgment_files, { 'json': json_file_path }
                         )
-                        merger_requests = utils.merge_dicts(merger_requests, new_merger_requests)
+                        merge_log.extend(new_merger_requests)
                         logger.info(
                             "de-duplication, step 2: total: %d, unique: %d (pruned: %s)",
                             len(judgments), len(unique_judgments), len(judgments) - len(unique_judgments)
@@ -253,18 +335,17 @@ def search_and_scrape(prog, args, data_indexes, **_):
                     })
 
                     batch = {
-                        'judgments'      : judgment_files,
-                        'params'         : search_params,
-                        'merger_requests': merger_requests
+                        'judgments': judgment_files,
+                        'params'   : search_params
                     }
 
-                    # Save results if specified.
-                    if args.save_json:
+                    # Save results if specified, omitting pages without new judgments in incremental mode.
+                    if args.save_json and not (args.incremental and known_pages):
                         # Save only when results are newly retrieved.
                         if not os.path.exists(json_file_path) or not args.skip_existing:
                             current_timestamp = now()
 
-                            print('  : saving judgment search results to ', json_file,
+                            print('  : caching judgment search results for ', json_file,
                                     ' ... ', sep='', end='', flush=True)
                             result = {
                                 'meta': {
@@ -280,21 +361,30 @@ def search_and_scrape(prog, args, data_indexes, **_):
                                     'saved_total'   : num_docs + len(judgments),
                                     'generated_at'  : current_timestamp
                                 }
-                            utils.fs.write_json(json_file_path, result)
+                            document_cache.put(json_file_path, result)
                             print('done')
 
                         batch['json'] = json_file_path
 
+                    # Results are held for later phases, unless checkpointed after every phase.
+                    document_cache.checkpoint(json_file_path)
+
                     num_docs += len(judgments)
                     num_pages += 1
 
-                    batches.append(batch)
+                    if not (args.incremental and known_pages):
+                        batches.append(batch)
 
                     if metadata:
                         current_page = metadata.get('page_next', None)
                     else:
                         current_page += 1
 
+                except NoJudgmentsFound as exc:
+                    print('none', flush=True)
+                    num_pages   += 1
+                    current_page = exc.metadata.get('page_next', None)
+
                 except Exception as exc:
                     print('error', flush=True)
                     print(prog, ": error: ", exc, sep='', file=sys.stderr, flush=True)
@@ -312,6 +402,22 @@ def search_and_scrape(prog, args, data_indexes, **_):
                     break
                 if args.pages is not None and num_pages >= args.pages:
                     break
+                if args.incremental and known_pages >= args.incremental_pages:
+                    print("  : stopping after ", known_pages, " page(s) of known judgments", sep='', flush=True)
+                    break
+
+            retriever.end_search(query)
+
+            # Record the crawl, for later incremental runs.
+            if args.save_json and num_pages > 0:
+                previous = watermarks.get(court, {}).get(query, {})
+                dates    = [ date for date in ( previous.get('latest_date'), newest_date ) if date ]
+                watermarks.setdefault(court, {})[query] = {
+                    'latest_date': max(dates, default=None),
+                    'crawled_at' : crawl_stamp,
+                    'pages'      : num_pages
+                }
+                utils.fs.write_json(watermark_path, watermarks)
 
     print()
     return batches
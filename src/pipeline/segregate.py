@@ -18,26 +18,19 @@
 import sys
 import json
 import functools
+import threading
 import traceback
 import collections
-import concurrent.futures
 
 from . import logger
-from .. import utils, segregators, filters
+from .. import utils, registry
 
 # ==== Module Constants
 
-# Dictionary of segregator associations for extractors.
-AVAILABLE_SEGREGATORS = {
-    'pdfminer_text': None,
-    'parsr'        : None,
-    'parsr_custom' : None,
-    'adobe_api'    : segregators.AdobeJSONSegregator
-}
-# Dictionary of available filters.
-AVAILABLE_FILTERS     = {
-    'sent_count': filters.SentenceCountFilter
-}
+# Dictionary of segregator associations for extractors, imported when first used.
+AVAILABLE_SEGREGATORS = registry.SEGREGATORS
+# Dictionary of available filters, imported when first used.
+AVAILABLE_FILTERS     = registry.FILTERS
 
 # ==== Type Declarations
 
@@ -51,6 +44,18 @@ FilterTaskArgs = collections.namedtuple(
     "FilterTaskArgs",
     [ 'manager', 'paragraphs', 'filter', 'extractor' ]
 )
+# pylint-disable-next-line: invalid-name
+DocumentTaskArgs = collections.namedtuple(
+    "DocumentTaskArgs",
+    [ 'extractor', 'files', 'filter_options' ]
+)
+
+# ==== Filter Instances
+
+# Filter instances shared by all batches and threads, keyed by filter name and options.
+# Worker processes forked after filters are first built inherit them, instead of building them again.
+_filter_instances = {}
+_filter_lock      = threading.Lock()
 
 # ==== Helper Functions
 
@@ -103,32 +108,150 @@ def filter_task(args: FilterTaskArgs):
             )
     return paragraphs
 
+def get_filter(filter_name, options):
+    """ Returns a filter instance with the given options, built once per process for every set of options.
+
+    Args:
+        filter_name (str): Name of the filter.
+        options (dict): Options for the filter.
+
+    Returns:
+        Filter: The filter instance.
+    """
+    key = ( filter_name, json.dumps(options, sort_keys=True, default=str) )
+    with _filter_lock:
+        if key not in _filter_instances:
+            _filter = AVAILABLE_FILTERS[filter_name]()
+            _filter.set_options(options)
+            _filter_instances[key] = _filter
+        return _filter_instances[key]
+
+def get_filter_options(args):
+    """ Returns the options of the requested filters, keyed by filter name, in the order of application. """
+    return {
+        filter_name: AVAILABLE_FILTERS[filter_name].options_from_args(args)
+        for filter_name in args.filters
+    }
+
+def preload_worker(extractors, filter_options):
+    """ Preloads the segregators and filter instances of a worker process, once when started.
+
+    Args:
+        extractors (list[str]): Extractors to load segregators for.
+        filter_options (dict[str, dict]): Options for filters to build, keyed by filter name.
+    """
+    for extractor in extractors:
+        # Looking up a segregator imports its module.
+        AVAILABLE_SEGREGATORS[extractor] # pylint: disable=pointless-statement
+    for filter_name, options in filter_options.items():
+        get_filter(filter_name, options)
+
+def document_task(args: DocumentTaskArgs):
+    """ Executes segregation and filtering for a single document, in a worker process. """
+    paragraphs = [ *AVAILABLE_SEGREGATORS[args.extractor].segregate_file(args.files) ]
+    for filter_name, options in args.filter_options.items():
+        paragraphs = get_filter(filter_name, options).evaluate(paragraphs, value=lambda x: x['content'])
+    return paragraphs
+
+def segregate_batch_in_processes(executor, batch, extractors, filter_options):
+    """ Segregates and filters the documents of a batch over a pool of worker processes.
+
+    Args:
+        executor (concurrent.futures.Executor): Pool of worker processes.
+        batch (dict): Batch to segregate extraction results for.
+        extractors (list[str]): Extractors to segregate results of.
+        filter_options (dict[str, dict]): Options for filters to apply, keyed by filter name, in order.
+
+    Returns:
+        dict[str, list]: Filtered paragraphs for every document, in batch order, keyed by extractor.
+    """
+    manager, bars, paragraphs = utils.ProgressBarManager(size=20), {}, {}
+    tasks = []
+    for extractor in extractors:
+        documents = batch['extractions'][extractor]
+        bars[extractor] = manager.add(limit=len(documents), render=True, prefix=f"{extractor[:20]:20}")
+        paragraphs[extractor] = []
+        tasks.extend(DocumentTaskArgs(extractor, files, filter_options) for files in documents)
+
+    # Results are returned in order of submission, and so in batch order.
+    for task, result in zip(tasks, executor.map(document_task, tasks)):
+        paragraphs[task.extractor].append(result)
+        limit = len(batch['extractions'][task.extractor])
+        width = len(str(limit))
+        manager.update(
+            bars[task.extractor], increment=1,
+            prefix=f"   {task.extractor[:20]:20}",
+            suffix=f"({len(paragraphs[task.extractor]):{width}} of {limit:{width}})"
+        )
+    print()
+    return paragraphs
+
+def segregate_batch_in_threads(batch, args, filter_options):
+    """ Segregates and filters the documents of a batch, with a thread per extractor.
+
+    Args:
+        batch (dict): Batch to segregate extraction results for.
+        args (argparse.Namespace): Arguments for the pipeline.
+        filter_options (dict[str, dict]): Options for filters to apply, keyed by filter name, in order.
+
+    Returns:
+        dict[str, list]: Filtered paragraphs for every document, in batch order, keyed by extractor.
+    """
+    executor = utils.executors.EXECUTORS.get('io')
+
+    # Execute segregators over extraction results.
+    manager = utils.ProgressBarManager(size=20)
+    paragraphs = {
+        extractor: paragraphs for extractor, paragraphs in
+        zip(args.extractors, executor.map(segregate_task, (
+            SegregateTaskArgs(manager, batch, extractor)
+            for extractor in args.extractors
+        )))
+    }
+    print()
+
+    # Execute all filters over the segregation results.
+    for filter_name, options in filter_options.items():
+        print("    applying ", filter_name, " filter over paragraphs ...", sep='', flush=True)
+
+        _filter = get_filter(filter_name, options)
+
+        manager = utils.ProgressBarManager(size=20)
+        paragraphs = {
+            extractor: paragraphs for extractor, paragraphs in
+            zip(args.extractors, executor.map(filter_task, (
+                FilterTaskArgs(manager, paragraphs[extractor], _filter, extractor)
+                for extractor in args.extractors
+            )))
+        }
+        print()
+
+    return paragraphs
+
 @utils.log_time(logger)
-def save_paragraphs(batch, extractors, filter_opts):
-    """ Saves paragraphs associated with batch into corresponding JSON file.
+def save_paragraphs(batch, extractors, filter_opts, document_cache):
+    """ Saves paragraphs associated with batch into corresponding JSON document.
 
     Args:
         batch (dict): Batch containing paragraph data
         extractors (list): List of requested extractors.
         filter_opts(dict): Options used while executing the filters.
+        document_cache (DocumentCache): Cache holding the JSON document for the batch.
     """
-    with open(batch['json'], 'r+', encoding='utf-8') as file:
-        data = json.load(file)
+    data = document_cache.get(batch['json'])
 
-        data['meta']['filters'] = filter_opts
+    data['meta']['filters'] = filter_opts
 
-        index = 0
-        for i in range(len(data['data'])):
-            if data['data'][i]['document_path'] is None: continue
-            data['data'][i]['paragraphs'] = {
-                extractor: batch['paragraphs'][extractor][index]
-                for extractor in extractors
-            }
-            index += 1
+    index = 0
+    for i in range(len(data['data'])):
+        if data['data'][i]['document_path'] is None: continue
+        data['data'][i]['paragraphs'] = {
+            extractor: batch['paragraphs'][extractor][index]
+            for extractor in extractors
+        }
+        index += 1
 
-        file.seek(0)
-        json.dump(data, file, ensure_ascii=False, indent=4)
-        file.truncate()
+    document_cache.mark_dirty(batch['json'])
 
 # ==== Module Functions
 
@@ -142,55 +265,49 @@ def get_filters():
     """ Returns a list of available retriever names. """
     return tuple(AVAILABLE_FILTERS.values())
 
-def segregate(prog, args, judgment_batches, **_):
+def segregate(prog, args, judgment_batches, document_cache, **_):
     """ Quartenary pipeline phase: Segregate processed text as paragraphs. """
 
     print(prog, ": segregating paragraphs from judgments ...", sep='', flush=True)
 
+    # Filters are built once for the run, and shared by all batches.
+    filter_opts = get_filter_options(args)
+    try:
+        for filter_name, options in filter_opts.items():
+            get_filter(filter_name, options)
+    except Exception as exc:
+        print(prog, ": error: ", exc, sep='', file=sys.stderr, flush=True)
+        logger.exception("error")
+        if args.debug:
+            traceback.print_exc()
+        return judgment_batches
+
+    # In process mode, documents are segregated and filtered over the shared pool of long-lived
+    # worker processes, each preloading the segregators and filters once when started. Forked
+    # workers inherit the filters already built, whereas spawned workers build them afresh.
+    workers, executor = getattr(args, 'segregate_workers', None), None
+    if workers:
+        utils.executors.EXECUTORS.configure(
+            initializers={ 'cpu': ( preload_worker, ( tuple(args.extractors), filter_opts ) ) }, cpu=workers
+        )
+        executor = utils.executors.EXECUTORS.get('cpu')
+
     # Process all batches one-by-one:
     for i, batch in enumerate(judgment_batches, 1):
         try:
             print("  : segregating from batch #", i, " ...", sep='', flush=True)
 
-
-            # Execute segregators over extraction results.
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                manager = utils.ProgressBarManager(size=20)
-                paragraphs = {
-                    extractor: paragraphs for extractor, paragraphs in
-                    zip(args.extractors, executor.map(segregate_task, (
-                        SegregateTaskArgs(manager, batch, extractor)
-                        for extractor in args.extractors
-                    )))
-                }
-                print()
-
-            # Execute all filters over the segregation results.
-            filter_opts = {}
-            for filter_name in args.filters:
-                print("    applying ", filter_name, " filter over paragraphs ...", sep='', flush=True)
-
-                _filter = AVAILABLE_FILTERS[filter_name]()
-                _filter.load_options_from_args(args)
-                filter_opts[filter_name] = _filter.options
-
-                with concurrent.futures.ThreadPoolExecutor() as executor:
-                    manager = utils.ProgressBarManager(size=20)
-                    paragraphs = {
-                        extractor: paragraphs for extractor, paragraphs in
-                        zip(args.extractors, executor.map(filter_task, (
-                            FilterTaskArgs(manager, paragraphs[extractor], _filter, extractor)
-                            for extractor in args.extractors
-                        )))
-                    }
-                print()
-
-            batch['paragraphs'] = paragraphs
+            if executor is not None:
+                batch['paragraphs'] = segregate_batch_in_processes(executor, batch, args.extractors, filter_opts)
+            else:
+                batch['paragraphs'] = segregate_batch_in_threads(batch, args, filter_opts)
 
             # Save results.
             if args.save_json:
                 print("  : saving paragraphs to JSON ... ", sep='', end='', flush=True)
-                save_paragraphs(batch, args.extractors, filter_opts)
+                save_paragraphs(batch, args.extractors, filter_opts, document_cache)
+                # Write the batch to disk once complete, unless deferred to the end of the run.
+                document_cache.checkpoint(batch['json'], final=True)
                 print("done")
 
         except Exception as exc:
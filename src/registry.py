@@ -0,0 +1,105 @@
+"""
+
+    registry
+    ~~~~~~~~
+
+    This module declares the components available to the pipeline (retrievers,
+    extractors, segregators and filters) by name. Components are referred to by
+    'module:attribute' strings and imported only when first used, so that
+    heavy dependencies of unused components are never loaded.
+
+"""
+
+import importlib
+import threading
+import collections.abc
+
+class Registry(collections.abc.Mapping):
+    """ Read-only mapping of component names to lazily imported objects. """
+
+    def __init__(self, entries: dict[str, str | None], package=__package__) -> None:
+        """ Initializes the registry with a set of declared components.
+
+        Args:
+            entries (dict[str, str | None]): References to components as 'module:attribute'
+                strings (relative to package), keyed by component name. None declares a name
+                without an associated component.
+            package (str, optional): Package to resolve relative module names against.
+                Defaults to the root package.
+        """
+        self.entries = dict(entries)
+        self.package = package
+        self.lock    = threading.RLock()
+        self.loaded  = {}
+
+    def register(self, name, reference):
+        """ Declares a new component, or replaces the reference of an existing one.
+
+        Args:
+            name (str): Name of the component.
+            reference (str|None): Reference to the component, as a 'module:attribute' string.
+        """
+        with self.lock:
+            self.entries[name] = reference
+            self.loaded.pop(name, None)
+
+    def __getitem__(self, name):
+        reference = self.entries[name]
+        if reference is None: return None
+        with self.lock:
+            if name not in self.loaded:
+                module_name, attribute = reference.split(':')
+                module = importlib.import_module(module_name, self.package)
+                self.loaded[name] = getattr(module, attribute)
+            return self.loaded[name]
+
+    def __iter__(self):
+        return iter(self.entries)
+
+    def __len__(self):
+        return len(self.entries)
+
+def lazy_exports(package, exports: dict[str, str]):
+    """ Creates a module-level `__getattr__` that imports exported names from submodules on first access.
+
+    Args:
+        package (str): Name of the package defining the exports.
+        exports (dict[str, str]): Relative submodule names, keyed by the exported name.
+
+    Returns:
+        (str) -> any: Function suitable for use as the module's `__getattr__`.
+    """
+    def module_getattr(name):
+        if (module_name := exports.get(name)) is not None:
+            return getattr(importlib.import_module(module_name, package), name)
+        raise AttributeError(f"module {package!r} has no attribute {name!r}")
+    return module_getattr
+
+# Dictionary of available court website retrievers.
+RETRIEVERS = Registry({
+    'DHC': '.retrievers.delhi_high_court:DHCJudgmentRetriever',
+    'SC' : '.retrievers.supreme_court:SCJudgmentRetriever'
+})
+
+# Dictionary of available extractors.
+EXTRACTORS = Registry({
+    'pdfminer_text': '.extractors.pdfminer:PdfminerHighLevelTextExtractor',
+    'parsr'        : '.extractors.parsr:ParsrExtractor',
+    'parsr_custom' : '.extractors.parsr:ParsrExtractor',
+    'adobe_api'    : '.extractors.adobe:AdobeAPIExtractor'
+})
+
+# Dictionary of segregator associations for extractors.
+SEGREGATORS = Registry({
+    'pdfminer_text': '.segregators.text:TextSegregator',
+    'parsr'        : '.segregators.text:TextSegregator',
+    'parsr_custom' : '.segregators.text:TextSegregator',
+    'adobe_api'    : '.segregators.adobe_json:AdobeJSONSegregator'
+})
+
+# Dictionary of available filters.
+FILTERS = Registry({
+    'sent_count': '.filters.sent_count_filter:SentenceCountFilter'
+})
+
+__all__ = [ "Registry", "lazy_exports", "RETRIEVERS", "EXTRACTORS", "SEGREGATORS", "FILTERS" ]
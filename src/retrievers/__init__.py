@@ -1,9 +1,15 @@
 from .. import logger as root_logger
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
-from .base import JudgmentRetriever
-from .supreme_court import SCJudgmentRetriever
-from .delhi_high_court import DHCJudgmentRetriever
+# pylint: disable-next=wrong-import-position
+from ..registry import lazy_exports
+
+# Retrievers are imported on first access, as their dependencies are expensive to load.
+__getattr__ = lazy_exports(__name__, {
+    'JudgmentRetriever'   : '.base',
+    'SCJudgmentRetriever' : '.supreme_court',
+    'DHCJudgmentRetriever': '.delhi_high_court'
+})
 
 __version__ = "1.0.0"
 __author__  = "Kinshuk Vasisht"
@@ -1,19 +1,121 @@
 import os
 import abc
 import asyncio
+import functools
 
 import aiohttp
+import requests
 
-from .utils import download_file
+from . import logger as root_logger
+from .utils import download_file, SingleFlight
+from ..utils import remove_query_param
+
+logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
 class JudgmentRetriever(abc.ABC):
     """ Abstract class to group methods related to retrieval of judgment documents from court websites. """
+    BASE_URL = None
+
+    # If true, responses are parsed with the fast (lxml) parsers, using bs4 only when these fail.
+    FAST_PARSING = True
+
+    # Cache of responses (`ResponseCache`) shared by searches and URL resolution. Disabled when None.
+    CACHE = None
+
+    # Run-wide record of document downloads, so that every document is resolved and downloaded once.
+    DOWNLOADS = SingleFlight()
+
+    @classmethod
+    def set_base_url(cls, base_url: str):
+        """ Points the retriever to a different host serving the court website, such as a mirror or a mock server. """
+        cls.BASE_URL = base_url.rstrip('/')
+
+    @classmethod
+    def set_cache(cls, cache):
+        """ Sets the response cache used by the retriever, and by its subclasses unless they set their own. """
+        cls.CACHE = cache
+
+    @classmethod
+    async def cache_get(cls, key):
+        """ Looks up the response cache from an event loop, without blocking it on the cache database. """
+        return await asyncio.get_running_loop().run_in_executor(None, cls.CACHE.get, key)
+
+    @classmethod
+    async def cache_put(cls, key, value: str, expires=True):
+        """ Stores a value in the response cache from an event loop, without blocking it on the cache database. """
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(cls.CACHE.put, key, value, expires=expires)
+        )
+
+    @classmethod
+    def request_text(cls, url: str, data=None, method='POST', ignored_params=(), validator=None):
+        """ Requests a page and returns its text, through the response cache if set.
+
+        Args:
+            url (str): URL to request.
+            data (dict, optional): Form parameters for the request. Defaults to None.
+            method (str, optional): HTTP method for the request. Defaults to 'POST'.
+            ignored_params (tuple[str], optional): Parameters which do not affect the response,
+                such as one-time tokens, excluded from the cache key. Defaults to ().
+            validator ((str) -> bool, optional): Checks if a response may be cached. Defaults to None.
+
+        Returns:
+            str: Text of the response.
+        """
+        key = None
+        if cls.CACHE is not None:
+            params = { key: val for key, val in (data or {}).items() if key not in ignored_params }
+            key    = cls.CACHE.make_key(method, url, params)
+            if (text := cls.CACHE.get(key)) is not None:
+                logger.debug("%s %s: cached", method, url)
+                return text
+
+        response = requests.request(method, url, data=data)
+        response.raise_for_status()
+        logger.debug("%s %s: HTTP %d", method, response.url, response.status_code)
+
+        if key is not None and (validator is None or validator(response.text)):
+            cls.CACHE.put(key, response.text)
+        return response.text
+
+    @classmethod
+    def parse_response(cls, text: str, parser, fallback_parser, validator=None):
+        """ Parses a response through a fast parser, falling back to a slower, more lenient
+            parser when the fast parser raises an error or its results fail validation.
+
+        Args:
+            text (str): Content of the response to parse.
+            parser ((str) -> tuple[list, dict]): Fast parser, returning judgments and metadata.
+            fallback_parser ((str) -> tuple[list, dict]): Parser to use when the fast parser fails.
+            validator ((list, dict) -> bool, optional): Checks the results of the fast parser. Defaults to None.
+
+        Returns:
+            tuple[list[dict[str]], dict[str]]: Judgments and metadata parsed from the response.
+        """
+        if cls.FAST_PARSING:
+            try:
+                judgments, metadata = parser(text)
+                if validator is None or validator(judgments, metadata):
+                    return judgments, metadata
+                logger.warning("%s: results failed validation, using fallback parser", parser.__name__)
+            except Exception: # pylint: disable=broad-except
+                logger.warning("%s: parsing failed, using fallback parser", parser.__name__, exc_info=True)
+        return fallback_parser(text)
+
     @classmethod
     @abc.abstractmethod
     def get_judgments(cls, query: str, *args, **kwargs) -> tuple[list[dict[str]], dict[str]]:
         """ Abstract method to retrieve judgment details for a given search query. """
         raise NotImplementedError
 
+    @classmethod
+    def end_search(cls, query: str):
+        """ Releases resources held for a search query once done with it, such as results fetched ahead of time. """
+
+    @classmethod
+    def shutdown(cls):
+        """ Releases resources held by the retriever over the run, such as pools of workers. """
+
     @classmethod
     async def preprocess_document_url(cls, url: str, session: aiohttp.ClientSession = None) -> str:
         """ Preprocesses the document URL, resolving any intermediate pages to the final click-to-download URL. """
@@ -30,16 +132,21 @@ class JudgmentRetriever(abc.ABC):
             callback ((str) -> None, optional): Optional callback to register file save events.
         """
         async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=False)) as session:
-            # Get download URLs for every document:
-            urls = await asyncio.gather(*(
-                cls.preprocess_document_url(judgment['document_href'], session)
-                for judgment in judgments
-            ))
+            async def save_document(judgment):
+                # Get the download URL for the document, and download it:
+                async def resolve_and_download():
+                    url = await cls.preprocess_document_url(judgment['document_href'], session)
+                    return await download_file(url, session=session, output_dir=output_dir, suppress_exc=True)
+
+                # Judgments referring to the same document (differing only in the ID) share a single download.
+                key  = ( remove_query_param(judgment['document_href'], 'ID'), os.path.abspath(output_dir) )
+                path = await cls.DOWNLOADS.run(key, resolve_and_download, valid=os.path.exists)
+                if path is not None and callback is not None:
+                    callback(os.path.basename(path))
+                return path
+
             # Download and return the paths to downloaded files:
-            paths = await asyncio.gather(*(
-                download_file(url, session=session, output_dir=output_dir, suppress_exc=True, callback=callback)
-                for url in urls
-            ))
+            paths = await asyncio.gather(*( save_document(judgment) for judgment in judgments ))
             # Update judgment objects with the downloaded paths, and return the paths:
             for path, judgment in zip(paths, judgments):
                 judgment['document_path'] = path
@@ -0,0 +1,114 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+import collections
+
+from . import logger as root_logger
+
+logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
+
+class ResponseCache:
+    """ Persistent cache of HTTP response texts, stored in an SQLite database.
+        Entries either expire after a TTL (such as search pages, which change over time) or never
+        expire (such as resolved document URLs). The cache is bounded in size, evicting the least
+        recently used entries first, and keeps hit and miss counts in `stats`. """
+
+    def __init__(self, path, ttl=None, max_size=None) -> None:
+        """ Opens (or creates) the cache database.
+
+        Args:
+            path (str): Path to the database file.
+            ttl (float, optional): Lifetime of expiring entries, in seconds. Defaults to None (no expiry).
+            max_size (int, optional): Maximum total size of cached values, in bytes. Defaults to None (unbounded).
+        """
+        self.path     = path
+        self.ttl      = ttl
+        self.max_size = max_size
+        self.stats    = collections.Counter()
+        self.lock     = threading.Lock()
+
+        if directory := os.path.dirname(path):
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL, expires REAL)"
+        )
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+        self.size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+
+    @staticmethod
+    def make_key(method: str, url: str, params=None):
+        """ Returns the key for a request, independent of the order of its parameters. """
+        request = json.dumps([ method.upper(), url, sorted((params or {}).items()) ], default=str)
+        return hashlib.sha256(request.encode()).hexdigest()
+
+    def get(self, key):
+        """ Returns the cached value for a key, or None if missing or expired. """
+        now = time.time()
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT value, size, expires FROM responses WHERE key = ?", ( key, )
+            ).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            value, size, expires = row
+            if expires is not None and expires <= now:
+                self.connection.execute("DELETE FROM responses WHERE key = ?", ( key, ))
+                self.size -= size
+                self.stats['expired'] += 1
+                self.stats['misses'] += 1
+                return None
+            self.connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", ( now, key ))
+            self.stats['hits'] += 1
+            return value
+
+    def put(self, key, value: str, expires=True):
+        """ Stores a value, evicting the least recently used entries if the cache grows beyond its size.
+
+        Args:
+            key (str): Key of the entry, as returned by `make_key`.
+            value (str): Value to cache.
+            expires (bool, optional): If false, the entry never expires. Defaults to True.
+        """
+        now, size = time.time(), len(value.encode())
+        expiry = now + self.ttl if expires and self.ttl is not None else None
+        with self.lock:
+            row = self.connection.execute("SELECT size FROM responses WHERE key = ?", ( key, )).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?)",
+                ( key, value, size, now, now, expiry )
+            )
+            self.size += size - (row[0] if row else 0)
+            self.stats['stores'] += 1
+            if self.max_size is not None and self.size > self.max_size:
+                self.evict(self.max_size)
+
+    def evict(self, max_size):
+        """ Removes the least recently used entries until the total size is within the limit.
+            Must be called with the lock held. """
+        rows = self.connection.execute("SELECT key, size FROM responses ORDER BY accessed")
+        keys = []
+        for key, size in rows:
+            if self.size <= max_size: break
+            keys.append(( key, ))
+            self.size -= size
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self.stats['evictions'] += len(keys)
+        logger.debug("evicted %d entries, size: %d bytes", len(keys), self.size)
+
+    def hit_rate(self):
+        """ Returns the fraction of lookups served from the cache. """
+        lookups = self.stats['hits'] + self.stats['misses']
+        return self.stats['hits'] / lookups if lookups else 0.0
+
+    def close(self):
+        """ Closes the cache database. """
+        with self.lock:
+            self.connection.close()
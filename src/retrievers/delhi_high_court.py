@@ -1,12 +1,14 @@
 import re
+import datetime
 from urllib.parse import urlparse, urlunparse
 
 import bs4
 import aiohttp
-import requests
+import lxml.etree
 
 from . import logger as root_logger
 from .base import JudgmentRetriever
+from .utils import element_string, element_text
 
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
@@ -16,6 +18,14 @@ class DHCJudgmentRetriever(JudgmentRetriever):
     BASE_URL             = f"http://{BASE_NETLOC}/FreeText"
     FREE_TEXT_SEARCH_URL = f"{BASE_URL}/GetSearchResult.do"
     SCRIPT_URL_REGEX     = re.compile(r"(?ui)window\.open\('([^']+)',")
+    SEARCH_FORM_REGEX    = re.compile(r"(?ui)<form[^>]+name\s*=\s*[\"']?globalForm")
+
+    @classmethod
+    def set_base_url(cls, base_url: str):
+        parsed_url = urlparse(base_url)
+        cls.BASE_NETLOC          = parsed_url.netloc
+        cls.BASE_URL             = f"{parsed_url.scheme}://{cls.BASE_NETLOC}/FreeText"
+        cls.FREE_TEXT_SEARCH_URL = f"{cls.BASE_URL}/GetSearchResult.do"
 
     @classmethod
     def make_absolute_url(cls, url):
@@ -23,33 +33,123 @@ class DHCJudgmentRetriever(JudgmentRetriever):
         return f"{cls.BASE_URL}/{url}"
 
     @classmethod
-    def get_judgments(cls, query: str, page: int | str = 0, *args, **kwargs):
+    def get_judgments(cls, query: str, page: int | str = 0, *args, start_date=None, end_date=None, **kwargs):
+        """ Returns judgments on a page of free text search results, within a date range if specified.
+            The website does not support date ranges, so results are filtered after parsing. """
         search_params = { 'search_name': query, 'PAGE_NO': page }
         logger.debug("request params: %s", ', '.join(f"{key} as {val}" for key,val in search_params.items()))
-        response = requests.post(cls.FREE_TEXT_SEARCH_URL, search_params)
-        response.raise_for_status()
-        logger.debug("%s %s: HTTP %d", response.request.method or "GET", response.url, response.status_code)
+        judgments, metadata = cls.parse_search_results(
+            cls.request_text(cls.FREE_TEXT_SEARCH_URL, search_params, validator=cls.is_valid_response)
+        )
+        if start_date is not None or end_date is not None:
+            judgments, metadata = cls.filter_by_date(judgments, metadata, start_date, end_date)
+        return judgments, metadata
+
+    @classmethod
+    def is_valid_response(cls, text: str):
+        """ Checks if a search response is a page of search results, rather than an error or maintenance page. """
+        return cls.SEARCH_FORM_REGEX.search(text) is not None
+
+    @classmethod
+    def parse_date(cls, date_string):
+        """ Parses the date of a judgment in DD/MM/YYYY format. Returns None if the date is invalid. """
+        try:
+            return datetime.datetime.strptime(date_string.strip(), "%d/%m/%Y").date()
+        except (AttributeError, ValueError):
+            return None
+
+    @classmethod
+    def filter_by_date(cls, judgments, metadata, start_date=None, end_date=None):
+        """ Selects judgments within a date range (inclusive), keeping those with unrecognized dates.
+            Results are ordered from the latest to the oldest, so once a page reaches past the
+            start of the range, no later page can have judgments within it, and paging stops.
+
+        Returns:
+            tuple[list[dict[str]], dict[str]]: Selected judgments, and metadata with
+                the count of excluded judgments as `entry_filtered`.
+        """
+        dates    = [ cls.parse_date(judgment['date']) for judgment in judgments ]
+        selected = [
+            judgment for judgment, date in zip(judgments, dates)
+            if date is None or ((start_date is None or date >= start_date) and (end_date is None or date <= end_date))
+        ]
+        metadata = { **metadata, 'entry_filtered': len(judgments) - len(selected) }
+        known_dates = [ date for date in dates if date is not None ]
+        if start_date is not None and known_dates and min(known_dates) < start_date:
+            logger.debug("page %s: results past %s, stopping", metadata.get('page'), start_date)
+            metadata.pop('page_next', None)
+        return selected, metadata
+
+    @classmethod
+    def parse_search_results(cls, text: str):
+        """ Parses a page of free text search results into judgments and page metadata. """
+        return cls.parse_response(
+            text, cls.parse_search_results_lxml, cls.parse_search_results_bs4, cls.validate_search_results
+        )
+
+    @classmethod
+    def validate_search_results(cls, judgments, metadata):
+        """ Checks parsed search results for consistency with the page metadata. """
+        if 'entry_start' in metadata and len(judgments) != metadata['entry_end'] - metadata['entry_start'] + 1:
+            return False
+        return all(judgment['case_number'] and judgment['document_href'] for judgment in judgments)
 
+    @classmethod
+    def parse_page_metadata(cls, metadata_text, page):
+        """ Returns page metadata from the summary of records on a search results page. """
+        start, end, total = ( int(x) for x in re.findall(r"\d+", metadata_text) )
+        metadata = {
+            'entry_start': start,
+            'entry_end'  : end,
+            'entry_total': total,
+            'page'       : int(page),
+            'page_total' : total // 10
+        }
+        logger.debug("page %d: %d to %d of %d records", metadata['page'], start, end, total)
+        if start > 1:
+            metadata['page_previous'] = metadata['page']-1
+        if end < total:
+            metadata['page_next'] = metadata['page']+1
+        return metadata
+
+    @classmethod
+    def parse_search_results_lxml(cls, text: str):
+        """ Parses search results using lxml and XPath queries. """
+        judgments, metadata = [], {}
+
+        page = lxml.etree.HTML(text)
+        if forms := page.xpath("//form[@name='globalForm']"):
+            if tables := forms[0].xpath("./table"):
+                table = tables[-1]
+                if metacells := table.xpath(".//td[@colspan='5']"):
+                    metadata.update(cls.parse_page_metadata(
+                        element_text(metacells[0]),
+                        page.xpath("//input[@id='Selected_page']")[0].get('value')
+                    ))
+                for row in table.xpath(".//tr[@bgcolor]"):
+                    cells = row.xpath(".//td")
+                    judgments.append({
+                        'case_number'  : element_string(cells[1]).strip(),
+                        'title'        : element_string(cells[2]).strip(),
+                        'date'         : element_string(cells[3]).strip(),
+                        'document_href': cls.make_absolute_url(cells[4].xpath(".//a")[0].attrib['href'])
+                    })
+
+        return judgments, metadata
+
+    @classmethod
+    def parse_search_results_bs4(cls, text: str):
+        """ Parses search results using BeautifulSoup. Slower, but lenient towards malformed pages. """
         judgments, metadata = [], {}
 
-        page = bs4.BeautifulSoup(response.text, features='lxml')
+        page = bs4.BeautifulSoup(text, features='lxml')
         if form := page.find('form', attrs={ 'name': 'globalForm' }):
             if tables := form('table', recursive=False):
                 table = tables[-1]
                 if metacell := table.find('td', colspan='5'):
-                    start, end, total = ( int(x) for x in re.findall(r"\d+", metacell.get_text()) )
-                    metadata.update(
-                        entry_start=start,
-                        entry_end=end,
-                        entry_total=total,
-                        page=int(page.find('input', id='Selected_page')['value']),
-                        page_total=total // 10
-                    )
-                    logger.debug("page %d: %d to %d of %d records", metadata['page'], start, end, total)
-                    if start > 1:
-                        metadata['page_previous'] = metadata['page']-1
-                    if end < total:
-                        metadata['page_next'] = metadata['page']+1
+                    metadata.update(cls.parse_page_metadata(
+                        metacell.get_text(), page.find('input', id='Selected_page')['value']
+                    ))
                 for row in table('tr', bgcolor=True):
                     cells = row('td')
                     judgments.append({
@@ -65,6 +165,13 @@ class DHCJudgmentRetriever(JudgmentRetriever):
     async def preprocess_document_url(cls, url: str, session: aiohttp.ClientSession) -> str:
         """ Processes a judgment document URL, resolving it into the actual file URL. """
         if cls.BASE_URL in url:
+            # Resolved URLs do not change, and are cached indefinitely.
+            if cls.CACHE is not None:
+                key = cls.CACHE.make_key('RESOLVE', url)
+                if (resolved_url := await cls.cache_get(key)) is not None:
+                    return resolved_url
+
+            source_url = url
             async with session.get(url) as response:
                 response.raise_for_status()
                 content = await response.text()
@@ -74,4 +181,7 @@ class DHCJudgmentRetriever(JudgmentRetriever):
             parsed_url = urlparse(url)
             parsed_url = parsed_url._replace(netloc=cls.BASE_NETLOC)
             url = urlunparse(parsed_url)
+
+            if cls.CACHE is not None and match:
+                await cls.cache_put(cls.CACHE.make_key('RESOLVE', source_url), url, expires=False)
         return url
\ No newline at end of file
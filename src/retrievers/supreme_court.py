@@ -1,12 +1,15 @@
 import datetime
-from importlib.metadata import metadata
+import threading
 
 import bs4
 import regex
 import requests
+import lxml.etree
 
 from . import logger as root_logger
+from ..utils import executors
 from .base import JudgmentRetriever
+from .utils import element_string, element_text, TokenPool
 
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
@@ -16,22 +19,75 @@ def format_date(date_object: datetime.date):
     """ Formats a date in DD-MM-YYYY format. """
     return '-'.join(date_object.isoformat().split('-')[::-1])
 
+class InvalidCaptchaError(RuntimeError):
+    """ Raised when the website rejects the captcha used for a search. """
+
+def make_endpoints(base_url: str):
+    """ Returns the URLs of endpoints used for searching judgments, relative to a base URL. """
+    return {
+        'captcha': f"{base_url}/php/captcha_num.php",
+        'judgments_by_date': f"{base_url}/php/v_judgments/getJBJ.php",
+        'judgments_by_text': f"{base_url}/php/v_judgments/get_Text_Free.php"
+    }
+
 class SCJudgmentRetriever(JudgmentRetriever):
     """ Aids in retrieval of judgment documents from the Supreme Court's website. """
     BASE_URL             = "https://main.sci.gov.in"
-    ENDPOINTS = {
-        'captcha': f"{BASE_URL}/php/captcha_num.php",
-        'judgments_by_date': f"{BASE_URL}/php/v_judgments/getJBJ.php",
-        'judgments_by_text': f"{BASE_URL}/php/v_judgments/get_Text_Free.php"
-    }
+    ENDPOINTS            = make_endpoints(BASE_URL)
+
+    # Maximum number of days spanned by a search, as allowed by the website.
+    WINDOW_DAYS          = 365
+    # Default number of date windows searched concurrently.
+    WORKERS              = 4
+    # Number of captchas fetched ahead of time, to replace rejected ones.
+    CAPTCHA_SPARES       = 1
+    # Number of times a search is retried with a new captcha, after the captcha is rejected.
+    CAPTCHA_RETRIES      = 3
+
+    _prefetched          = {}
+    _prefetch_lock       = threading.Lock()
+    _captcha_pools       = {}
+
+    @classmethod
+    def set_base_url(cls, base_url: str):
+        super().set_base_url(base_url)
+        cls.ENDPOINTS = make_endpoints(cls.BASE_URL)
 
     @classmethod
-    def generate_captcha(cls):
+    def generate_captcha(cls, url=None):
         """ Generates a fresh captcha string for use in search requests. """
-        response = requests.get(cls.ENDPOINTS['captcha'])
+        response = requests.get(url or cls.ENDPOINTS['captcha'])
         response.raise_for_status()
         return int(response.text)
 
+    @classmethod
+    def captcha_pool(cls):
+        """ Returns the pool of captchas shared by searches against the current captcha endpoint. """
+        url = cls.ENDPOINTS['captcha']
+        with cls._prefetch_lock:
+            if (pool := cls._captcha_pools.get(url)) is None:
+                pool = cls._captcha_pools[url] = TokenPool(
+                    lambda: cls.generate_captcha(url), spares=cls.CAPTCHA_SPARES
+                )
+            return pool
+
+    @classmethod
+    def is_valid_response(cls, text: str):
+        """ Checks if a search response was not a rejection of the captcha used. """
+        return text.strip() != 'invalid_key'
+
+    @classmethod
+    def request_search(cls, endpoint: str, search_params):
+        """ Requests search results, raising an `InvalidCaptchaError` if the captcha was rejected.
+            Cached responses are shared across captchas. """
+        logger.debug("request params: %s", ', '.join(f"{key} as {val}" for key,val in search_params.items()))
+        text = cls.request_text(
+            cls.ENDPOINTS[endpoint], search_params, ignored_params=( 'ansCaptcha', ), validator=cls.is_valid_response
+        )
+        if not cls.is_valid_response(text):
+            raise InvalidCaptchaError(f"captcha {search_params['ansCaptcha']} rejected by {cls.ENDPOINTS[endpoint]}")
+        return text
+
     @classmethod
     def get_judgments_by_text(cls, captcha, query: str, start_date, end_date):
         """ Return judgments by free text search. """
@@ -41,21 +97,66 @@ class SCJudgmentRetriever(JudgmentRetriever):
             'FT_from_date': format_date(start_date),
             'FT_to_date': format_date(end_date)
         }
-        logger.debug("request params: %s", ', '.join(f"{key} as {val}" for key,val in search_params.items()))
-        response = requests.post(cls.ENDPOINTS['judgments_by_text'], search_params)
-        response.raise_for_status()
-        logger.debug("%s %s: HTTP %d", response.request.method or "GET", response.url, response.status_code)
+        judgments, metadata = cls.parse_response(
+            cls.request_search('judgments_by_text', search_params), cls.parse_text_results_lxml, cls.parse_text_results_bs4, cls.validate_results
+        )
+        if metadata:
+            metadata.update(start_date=start_date.isoformat(), end_date=end_date.isoformat())
+        return judgments, metadata
 
+    @classmethod
+    def get_judgments_by_date(cls, captcha, start_date, end_date):
+        """ Return judgments between a given date range. """
+        search_params = {
+            'ansCaptcha': captcha,
+            'jorrop': 'J',
+            'JBJfrom_date': format_date(start_date),
+            'JBJto_date': format_date(end_date)
+        }
+        judgments, metadata = cls.parse_response(
+            cls.request_search('judgments_by_date', search_params), cls.parse_date_results_lxml, cls.parse_date_results_bs4, cls.validate_results
+        )
+        if metadata:
+            metadata.update(start_date=start_date.isoformat(), end_date=end_date.isoformat())
+        return judgments, metadata
+
+    @classmethod
+    def validate_results(cls, judgments, metadata):
+        """ Checks parsed search results for missing records or fields. """
+        if metadata.get('entry_total', 0) > 0 and not judgments:
+            return False
+        return all(judgment['case_number'] and judgment['document_href'] for judgment in judgments)
+
+    @classmethod
+    def parse_text_results_lxml(cls, text: str):
+        """ Parses free text search results using lxml and XPath queries. """
+        judgments, metadata = [], {}
+
+        page = lxml.etree.HTML(text)
+        if page is not None and (selects := page.xpath("//select")):
+            if options := selects[0].xpath(".//option"):
+                metadata.update(entry_total=len(options))
+                logger.debug("%d records", len(options))
+                for item in options:
+                    cells = item.attrib['value'].split(':')
+                    judgments.append({
+                        'case_number'  : cells[0].strip(),
+                        'title'        : element_text(item).strip(),
+                        'date'         : cells[2].strip(),
+                        'document_href': f"{cls.BASE_URL}/{cells[3]}"
+                    })
+
+        return judgments, metadata
+
+    @classmethod
+    def parse_text_results_bs4(cls, text: str):
+        """ Parses free text search results using BeautifulSoup. Slower, but lenient towards malformed pages. """
         judgments, metadata = [], {}
 
-        page = bs4.BeautifulSoup(response.text, features='lxml')
+        page = bs4.BeautifulSoup(text, features='lxml')
         if select := page.find('select'):
             if options := select('option'):
-                metadata.update(
-                    entry_total=len(options),
-                    start_date=start_date.isoformat(),
-                    end_date=end_date.isoformat()
-                )
+                metadata.update(entry_total=len(options))
                 logger.debug("%d records", len(options))
                 for item in options:
                     cells = item['value'].split(':')
@@ -69,93 +170,216 @@ class SCJudgmentRetriever(JudgmentRetriever):
         return judgments, metadata
 
     @classmethod
-    def get_judgments_by_date(cls, captcha, start_date, end_date):
-        """ Return judgments between a given date range. """
-        search_params = {
-            'ansCaptcha': captcha,
-            'jorrop': 'J',
-            'JBJfrom_date': format_date(start_date),
-            'JBJto_date': format_date(end_date)
+    def make_date_result(cls, diary_number, case_number, judgment_url, petitioner_name, respondent_name,
+                         petitioner_advocate, respondent_advocate, bench, judgment_by):
+        """ Returns a judgment from the fields of a record in the search results by date. """
+        return {
+            'diary_number': str(diary_number).strip(),
+            'case_number': str(case_number).strip(),
+            'by': str(judgment_by).strip(),
+            'bench': COMMA_SEPARATION.split(str(bench)),
+            'petitioner': {
+                'name': str(petitioner_name).strip(),
+                'advocate': str(petitioner_advocate).strip(),
+            },
+            'respondent': {
+                'name': str(respondent_name).strip(),
+                'advocate': str(respondent_advocate).strip()
+            },
+            'document_href': cls.BASE_URL + judgment_url
         }
-        logger.debug("request params: %s", ', '.join(f"{key} as {val}" for key,val in search_params.items()))
-        response = requests.post(cls.ENDPOINTS['judgments_by_date'], search_params)
-        response.raise_for_status()
 
-        page = bs4.BeautifulSoup(response.text, features='lxml')
+    @classmethod
+    def parse_date_results_lxml(cls, text: str):
+        """ Parses search results by date using lxml and XPath queries.
+            Every result is a record of eight rows, starting with a row for the diary number. """
+        judgments, metadata = [], {}
+
+        page = lxml.etree.HTML(text)
+        if page is not None and (tables := page.xpath("//table")):
+            if rows := tables[0].xpath("./tr[not(@style)]"):
+                metadata.update(entry_total=len(rows))
+                logger.debug("%d records", len(rows))
+                for row in rows:
+                    cells = row.xpath("./td")
+                    if len(cells) < 2: continue
+                    fields = [ element_string(cells[2]) ]
+
+                    record_rows = row.itersiblings('tr')
+                    cells = next(record_rows).xpath("./td")
+                    fields.extend(( element_string(cells[1]), cells[2].xpath("./a")[-1].attrib['href'] ))
+                    for _ in range(6):
+                        fields.append(element_string(next(record_rows).xpath("./td")[1]))
+
+                    judgments.append(cls.make_date_result(*fields))
+
+        return judgments, metadata
+
+    @classmethod
+    def parse_date_results_bs4(cls, text: str):
+        """ Parses search results by date using BeautifulSoup. Slower, but lenient towards malformed pages. """
         judgments, metadata = [], {}
+
+        page = bs4.BeautifulSoup(text, features='lxml')
         if table := page.find('table'):
             if rows := table('tr', style=False, recursive=False):
-                metadata.update(
-                    entry_total=len(rows),
-                    start_date=start_date.isoformat(),
-                    end_date=end_date.isoformat()
-                )
+                metadata.update(entry_total=len(rows))
                 logger.debug("%d records", len(rows))
                 for row in rows:
                     cells = row('td', recursive=False)
                     if len(cells) < 2: continue
-                    diary_number = str(cells[2].string).strip()
+                    fields = [ cells[2].string ]
 
                     row   = row.find_next_sibling('tr')
                     cells = row('td', recursive=False)
-                    case_number = str(cells[1].string).strip()
-                    judgment_url = cells[2]('a', recursive=False)[-1]['href']
+                    fields.extend(( cells[1].string, cells[2]('a', recursive=False)[-1]['href'] ))
+                    for _ in range(6):
+                        row = row.find_next_sibling('tr')
+                        fields.append(row('td', recursive=False)[1].string)
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    petitioner_name = str(cells[1].string).strip()
+                    judgments.append(cls.make_date_result(*fields))
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    respondent_name = str(cells[1].string).strip()
+        return judgments, metadata
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    petitioner_advocate = str(cells[1].string).strip()
+    @classmethod
+    def search(cls, query: str, start_date, end_date):
+        """ Searches judgments by text, or by date if the query is empty, using a captcha from the shared pool.
+            Rejected captchas are replaced and the search retried, up to `CAPTCHA_RETRIES` times. """
+        pool = cls.captcha_pool()
+        for attempt in range(cls.CAPTCHA_RETRIES + 1):
+            captcha = pool.acquire()
+            try:
+                if query:
+                    return cls.get_judgments_by_text(captcha, query, start_date, end_date)
+                return cls.get_judgments_by_date(captcha, start_date, end_date)
+            except InvalidCaptchaError:
+                logger.debug("captcha %s rejected (attempt %d)", captcha, attempt + 1)
+                pool.invalidate(captcha)
+                if attempt == cls.CAPTCHA_RETRIES:
+                    raise
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    respondent_advocate = str(cells[1].string).strip()
+    @classmethod
+    def search_window(cls, query: str, start_date, end_date, window_limit=None):
+        """ Searches judgments within a date window.
+            Windows with at least `window_limit` results may have been truncated by the website,
+            and are split in halves and searched again, until windows span a single day.
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    bench = COMMA_SEPARATION.split(str(cells[1].string))
+        Returns:
+            tuple[list[dict[str]], dict[str]]: Judgments in chronological order of windows, and metadata.
+        """
+        judgments, metadata = cls.search(query, start_date, end_date)
 
-                    row   = row.find_next_sibling('tr')
-                    cells = row('td', recursive=False)
-                    judgment_by = str(cells[1].string).strip()
+        if window_limit and len(judgments) >= window_limit and start_date < end_date:
+            middle = start_date + (end_date - start_date) // 2
+            logger.debug(
+                "%s to %s: %d results, splitting at %s", start_date, end_date, len(judgments), middle
+            )
+            judgments, metadata = cls.search_window(query, start_date, middle, window_limit)
+            later_judgments, later_metadata = cls.search_window(
+                query, middle + datetime.timedelta(days=1), end_date, window_limit
+            )
+            judgments = [ *judgments, *later_judgments ]
+            metadata  = {
+                'entry_total': metadata.get('entry_total', 0) + later_metadata.get('entry_total', 0),
+                'start_date' : start_date.isoformat(),
+                'end_date'   : end_date.isoformat()
+            }
+        return judgments, metadata
 
-                    judgments.append({
-                        'diary_number': diary_number,
-                        'case_number': case_number,
-                        'by': judgment_by,
-                        'bench': bench,
-                        'petitioner': {
-                            'name': petitioner_name,
-                            'advocate': petitioner_advocate,
-                        },
-                        'respondent': {
-                            'name': respondent_name,
-                            'advocate': respondent_advocate
-                        },
-                        'document_href': cls.BASE_URL + judgment_url
-                    })
+    @classmethod
+    def make_windows(cls, start_date, end_date, window_days=None):
+        """ Splits a date range into consecutive windows, in chronological order.
 
-        return judgments, metadata
+        Args:
+            start_date (datetime.date): Start of the range.
+            end_date (datetime.date): End of the range (inclusive).
+            window_days (int, optional): Number of days spanned by a window.
+                Defaults to `WINDOW_DAYS`, the maximum span the website allows.
+
+        Returns:
+            list[tuple[datetime.date, datetime.date]]: Start and end dates (inclusive) of every window.
+        """
+        span, windows = datetime.timedelta(days=window_days or cls.WINDOW_DAYS), []
+        while start_date <= end_date:
+            windows.append(( start_date, min(start_date + span - datetime.timedelta(days=1), end_date) ))
+            start_date += span
+        return windows
+
+    @classmethod
+    def prefetch_window(cls, query: str, window, window_limit=None):
+        """ Returns a future for the results of a window search, submitting the search if not already done. """
+        key = ( query, *window, window_limit )
+        with cls._prefetch_lock:
+            if key not in cls._prefetched:
+                cls._prefetched[key] = executors.EXECUTORS.get('prefetch').submit(
+                    cls.search_window, query, *window, window_limit
+                )
+            return cls._prefetched[key]
+
+    @classmethod
+    def cancel_prefetches(cls, query: str = None):
+        """ Cancels window searches issued ahead of time, for a query or all queries, and drops their results.
+            Searches already running are left to complete. Must be called with `_prefetch_lock` held.
+
+        Returns:
+            int: The number of searches dropped.
+        """
+        keys = [ key for key in cls._prefetched if query is None or key[0] == query ]
+        for key in keys:
+            cls._prefetched.pop(key).cancel()
+        return len(keys)
+
+    @classmethod
+    def end_search(cls, query: str):
+        with cls._prefetch_lock:
+            if count := cls.cancel_prefetches(query):
+                logger.debug("%r: dropped %d prefetched window(s)", query, count)
 
     @classmethod
-    def get_judgments(cls, query: str, start_date=None, end_date=None, *args, **kwargs):
+    def shutdown(cls):
+        # Searches run on the shared prefetch executor, shut down along with the other executors.
+        with cls._prefetch_lock:
+            cls.cancel_prefetches()
+
+    @classmethod
+    def get_judgments(cls, query: str, start_date=None, end_date=None, *args, page: int | str = 1,
+                      window_days=None, window_limit=None, workers=None, **kwargs):
+        """ Returns judgments for the date window at the given page, out of the windows splitting the date range.
+            Searches for upcoming windows are issued concurrently on the shared prefetch executor, up to
+            `workers` at a time, and their results are held until requested. """
         if end_date is None:
             if start_date is None:
                 end_date = datetime.datetime.now().date()
             else:
-                end_date = start_date + datetime.timedelta(days=364)
+                end_date = start_date + datetime.timedelta(days=cls.WINDOW_DAYS-1)
         if start_date is None:
-            start_date = end_date - datetime.timedelta(days=364)
+            start_date = end_date - datetime.timedelta(days=cls.WINDOW_DAYS-1)
+
+        windows = cls.make_windows(start_date, end_date, window_days)
+        page    = max(int(page or 1), 1)
+        if page > len(windows):
+            return [], { 'page': page, 'page_total': len(windows) }
 
-        captcha = cls.generate_captcha()
+        workers = workers or cls.WORKERS
+        future  = cls.prefetch_window(query, windows[page-1], window_limit)
+        for window in windows[page:page+workers-1]:
+            cls.prefetch_window(query, window, window_limit)
 
-        if query:
-            return cls.get_judgments_by_text(captcha, query, start_date, end_date)
-        else:
-            return cls.get_judgments_by_date(captcha, start_date, end_date)
\ No newline at end of file
+        try:
+            judgments, metadata = future.result()
+        finally:
+            with cls._prefetch_lock:
+                cls._prefetched.pop(( query, *windows[page-1], window_limit ), None)
+
+        metadata = {
+            **metadata,
+            'start_date': windows[page-1][0].isoformat(),
+            'end_date'  : windows[page-1][1].isoformat(),
+            'page'      : page,
+            'page_total': len(windows)
+        }
+        if page > 1:
+            metadata['page_previous'] = page - 1
+        if page < len(windows):
+            metadata['page_next'] = page + 1
+        return judgments, metadata
@@ -1,18 +1,180 @@
 import os
 import re
+import asyncio
+import threading
+import collections
 
 import aiohttp
 
 from . import logger as root_logger
+from ..utils import executors
 
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
+def normalize_whitespace_string(string):
+    """ Collapses whitespace-only strings the way bs4 does when building its tree. """
+    if string is not None and not string.strip():
+        return '\n' if '\n' in string else ' '
+    return string
+
+def element_string(element):
+    """ Returns the sole string within an lxml element, mirroring the `.string` property of bs4 tags.
+
+    Args:
+        element (lxml.etree._Element): Element to get the string of.
+
+    Returns:
+        str | None: The string, or None if the element has no children or more than one child.
+    """
+    while True:
+        if len(element) == 0:
+            return normalize_whitespace_string(element.text)
+        if len(element) > 1 or element.text or element[0].tail:
+            return None
+        element = element[0]
+
+def element_text(element):
+    """ Returns the text within an lxml element, mirroring the `get_text()` method of bs4 tags. """
+    return ''.join(normalize_whitespace_string(string) for string in element.itertext())
+
+class InvalidDocumentError(aiohttp.ClientPayloadError):
+    """ Raised when a downloaded document is not of the expected type, or is incomplete. """
+
+class AsyncFileWriter:
+    """ Writes a file from an event loop without blocking it. Data is buffered and written in batches
+        on the shared pool of I/O threads, with at most one write in flight per file, so that a slow
+        disk delays only the downloads waiting on it. """
+
+    def __init__(self, path, buffer_size=2**18, size_hint=None) -> None:
+        """ Initializes the writer. The file is created on entering the writer's context.
+
+        Args:
+            path (str): Path of the file to write.
+            buffer_size (int, optional): Size of data batched per write, in bytes. Defaults to 256 KiB.
+            size_hint (int, optional): Expected size of the file, used to preallocate space. Defaults to None.
+        """
+        self.path        = path
+        self.buffer_size = buffer_size
+        self.size_hint   = size_hint
+        self.size        = 0
+        self.buffer      = bytearray()
+        self.file        = None
+        self.pending     = None
+
+    async def run(self, function, *args):
+        """ Runs a blocking function on the I/O threads. """
+        return await asyncio.get_running_loop().run_in_executor(
+            executors.EXECUTORS.get('io'), function, *args
+        )
+
+    def open_file(self):
+        """ Creates the file, preallocating space if the size is known and the filesystem supports it. """
+        file = open(self.path, 'wb') # pylint: disable=consider-using-with
+        if self.size_hint and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(file.fileno(), 0, self.size_hint)
+            except OSError:
+                pass
+        return file
+
+    async def write(self, data: bytes):
+        """ Buffers data, writing the buffer out once full. """
+        self.buffer += data
+        self.size   += len(data)
+        if len(self.buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self):
+        """ Waits for the write in flight, and starts writing the buffered data. """
+        if self.pending is not None:
+            await self.pending
+        data, self.buffer = bytes(self.buffer), bytearray()
+        self.pending = asyncio.ensure_future(self.run(self.file.write, data))
+
+    async def __aenter__(self):
+        self.file = await self.run(self.open_file)
+        return self
+
+    async def __aexit__(self, exc_type, *_):
+        try:
+            if exc_type is None and self.buffer:
+                await self.flush()
+            if self.pending is not None:
+                await self.pending
+        finally:
+            await self.run(self.file.close)
+
+async def fetch_file(url: str, session: aiohttp.ClientSession, output_dir=".", skip_existing=False,
+                     chunk_size=4096, signature=b"%PDF-", max_chunk_size=2**20, preallocate=True) -> str:
+    """ Downloads a file in a single attempt, checking the first bytes against a signature before saving
+        anything, and the saved size against the declared length. Partially saved files are removed.
+        The size of reads adapts to the throughput: it grows while reads fill up, and shrinks when they do not. """
+    async with session.get(url) as response:
+        response.raise_for_status()
+        logger.debug("GET %s: HTTP %s", str(response.url), response.status)
+        if "Content-Disposition" in response.headers:
+            file_name = re.findall("filename=(.+)", response.headers["Content-Disposition"])[0]
+        else:
+            file_name = os.path.basename(response.url.path)
+        file_path = os.path.join(output_dir, file_name)
+
+        # The declared length applies to the decoded content only when the content is not compressed.
+        content_length = response.content_length
+        if response.headers.get("Content-Encoding", "identity") != "identity":
+            content_length = None
+
+        if skip_existing and os.path.exists(file_path):
+            if os.stat(file_path).st_size == content_length:
+                return file_path
+            else:
+                count = 1
+                base, ext = os.path.splitext(file_path)
+                while True:
+                    if not os.path.exists(f"{base}_({count}){ext}"):
+                        file_path = f"{base}_({count}){ext}"
+                        break
+                    count += 1
+
+        # Error pages and empty bodies are rejected before the file is created.
+        head = b""
+        while len(head) < len(signature or b"") or not head:
+            if not (chunk := await response.content.read(chunk_size)): break
+            head += chunk
+        if signature and not head.startswith(signature):
+            raise InvalidDocumentError(
+                f"GET {response.url}: unexpected content {head[:16]!r} ({response.content_type}), "
+                f"expected {signature!r}"
+            )
+
+        try:
+            size_hint = content_length if preallocate else None
+            async with AsyncFileWriter(file_path, size_hint=size_hint) as writer:
+                await writer.write(head)
+                read_size = chunk_size
+                while chunk := await response.content.read(read_size):
+                    await writer.write(chunk)
+                    if len(chunk) == read_size:
+                        read_size = min(read_size * 2, max_chunk_size)
+                    elif len(chunk) < read_size // 4:
+                        read_size = max(read_size // 2, chunk_size)
+            if content_length is not None and writer.size != content_length:
+                raise InvalidDocumentError(f"GET {response.url}: received {writer.size} of {content_length} bytes")
+        except BaseException:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise
+        logger.debug("Saved '%s' to '%s'", file_name, output_dir)
+        return file_path
+
 async def download_file(
     url: str, session: aiohttp.ClientSession,
     output_dir: str = ".", skip_existing=False,
-    suppress_exc=False, chunk_size=4096, callback=None
+    suppress_exc=False, chunk_size=4096, callback=None,
+    signature=b"%PDF-", retries=2, retry_delay=1.0,
+    max_chunk_size=2**20, preallocate=True
 ) -> (str | None):
     """ Downloads a file referred by a given URL into a specified output directory.
+        Failed downloads, including ones returning unexpected content, are retried with exponential backoff.
 
     Args:
         url (str): The URL to download the file from.
@@ -22,43 +184,157 @@ async def download_file(
         suppress_exc (bool, optional): If True, raised exceptions are suppressed and None is returned instead.
             Defaults to False.
         chunk_size (int, optional): Chunk size to retrieve at a a time, in bytes. Defaults to 4096 (bytes).
+            Chunks grow from this size up to `max_chunk_size` while the connection keeps up.
         callback ((str) -> None, optional): Optional callback to register file save events.
+        signature (bytes, optional): Expected leading bytes of the file. Defaults to the PDF signature,
+            `%PDF-`. If None, any content is accepted.
+        retries (int, optional): Number of times to retry a failed download. Defaults to 2.
+        retry_delay (float, optional): Delay before the first retry, in seconds. Defaults to 1.
+        max_chunk_size (int, optional): Maximum chunk size to retrieve at a time, in bytes. Defaults to 1 MiB.
+        preallocate (bool, optional): If true, space for the file is allocated upfront from the
+            declared length, where supported. Defaults to True.
 
     Returns:
         str: Path to the downloaded file.
 
     Raises:
         aiohttp.ClientError: Failure in completion of the request due to a client error.
+        InvalidDocumentError: The downloaded content did not match the signature or the declared length.
     """
-    try:
-        async with session.get(url) as response:
-            response.raise_for_status()
-            logger.debug("GET %s: HTTP %s", str(response.url), response.status)
-            if "Content-Disposition" in response.headers:
-                file_name = re.findall("filename=(.+)", response.headers["Content-Disposition"])[0]
-            else:
-                file_name = os.path.basename(response.url.path)
-            file_path = os.path.join(output_dir, file_name)
-            if skip_existing and os.path.exists(file_path):
-                if os.stat(file_path).st_size == int(response.headers['Content-Length']):
-                    return file_path
-                else:
-                    count = 1
-                    base, ext = os.path.splitext(file_path)
-                    while True:
-                        if not os.path.exists(f"{base}_({count}){ext}"):
-                            file_path = f"{base}_({count}){ext}"
-                            break
-                        count += 1
-            with open(file_path, 'wb') as file:
-                async for chunk in response.content.iter_chunked(n=chunk_size):
-                    file.write(chunk)
-            logger.debug("Saved '%s' to '%s'", file_name, output_dir)
+    for attempt in range(retries + 1):
+        try:
+            file_path = await fetch_file(
+                url, session, output_dir, skip_existing, chunk_size, signature, max_chunk_size, preallocate
+            )
             if callback is not None:
-                callback(file_name)
+                callback(os.path.basename(file_path))
             return file_path
-    except aiohttp.ClientError as exc:
-        if suppress_exc:
-            logger.exception("GET %s failed", url)
-            return None
-        else: raise exc
\ No newline at end of file
+        except aiohttp.ClientError as exc:
+            # Client errors (such as missing files) are not resolved by retrying.
+            retryable = not (isinstance(exc, aiohttp.ClientResponseError) and exc.status < 500)
+            if retryable and attempt < retries:
+                logger.warning("GET %s failed (%s), retrying (attempt %d)", url, exc, attempt + 1)
+                await asyncio.sleep(retry_delay * 2 ** attempt)
+            elif suppress_exc:
+                logger.exception("GET %s failed", url)
+                return None
+            else: raise exc
+
+class TokenPool:
+    """ Shares a token, such as a captcha, across concurrent requests, reusing it for as long as the
+        server accepts it. Replacement tokens are fetched ahead of time on the shared token executor, so
+        that a rejected token can be swapped without waiting for a round trip. """
+
+    def __init__(self, generator, spares=1):
+        """ Initializes the pool. Tokens are fetched lazily, on the first call to `acquire`.
+
+        Args:
+            generator (() -> object): Function fetching a fresh token.
+            spares (int, optional): Number of tokens to keep fetched ahead of time. Defaults to 1.
+        """
+        self.generator = generator
+        self.spares    = spares
+        self.token     = None
+        self.pending   = collections.deque()
+        self.stats     = collections.Counter()
+        self.lock      = threading.Lock()
+
+    def prefetch(self):
+        """ Submits fetches for spare tokens, up to the configured count. Must be called with the lock held. """
+        while len(self.pending) < self.spares:
+            self.pending.append(executors.EXECUTORS.get('tokens').submit(self.generator))
+
+    def acquire(self):
+        """ Returns the current token, replacing it with a spare (or freshly fetched) token if there is none.
+            Threads arriving while a replacement is fetched wait for and share the same replacement. """
+        with self.lock:
+            if self.token is not None:
+                self.stats['reused'] += 1
+                return self.token
+
+            token = None
+            while self.pending and token is None:
+                try:
+                    token = self.pending.popleft().result()
+                    self.stats['prefetched'] += 1
+                except Exception: # pylint: disable=broad-except
+                    logger.warning("token prefetch failed", exc_info=True)
+            if token is None:
+                token = self.generator()
+                self.stats['fetched'] += 1
+
+            self.token = token
+            self.prefetch()
+            return token
+
+    def invalidate(self, token):
+        """ Discards a token rejected by the server, unless it has already been replaced. """
+        with self.lock:
+            if self.token == token:
+                self.token = None
+                self.stats['invalidated'] += 1
+            self.prefetch()
+
+    def close(self):
+        """ Discards held tokens and cancels the fetches not yet started. """
+        with self.lock:
+            self.token = None
+            for future in self.pending:
+                future.cancel()
+            self.pending.clear()
+
+class SingleFlight:
+    """ Coalesces concurrent calls for the same key into a single call, attaching later callers to the
+        result of the call in flight. Successful results are kept for the lifetime of the object, so
+        that a key is resolved only once per run, unless the kept result is no longer valid. """
+
+    def __init__(self) -> None:
+        self.results  = {}
+        self.inflight = {}
+        self.stats    = collections.Counter()
+        self.lock     = threading.Lock()
+
+    async def run(self, key, factory, valid=None):
+        """ Returns the result for a key, calling the factory only if no call for the key is in flight or done.
+
+        Args:
+            key (Hashable): Key identifying the call.
+            factory (() -> Awaitable): Function creating the awaitable to compute the result.
+            valid ((any) -> bool, optional): Checks if a kept result can still be used. Defaults to None.
+
+        Returns:
+            any: Result of the call. None results are not kept.
+        """
+        loop = asyncio.get_running_loop()
+        with self.lock:
+            if key in self.results and (valid is None or valid(self.results[key])):
+                self.stats['reused'] += 1
+                return self.results[key]
+            future = self.inflight.get(key)
+            # Futures are bound to their event loop, and cannot be shared across runs of different loops.
+            owner  = future is None or future.get_loop() is not loop
+            if owner:
+                future = self.inflight[key] = loop.create_future()
+            else:
+                self.stats['coalesced'] += 1
+
+        if not owner:
+            return await asyncio.shield(future)
+
+        try:
+            result = await factory()
+        except BaseException as exc:
+            future.set_exception(exc)
+            future.exception() # Mark the exception as retrieved, in case no other caller waits.
+            raise
+        else:
+            future.set_result(result)
+            with self.lock:
+                if result is not None:
+                    self.results[key] = result
+                self.stats['called'] += 1
+            return result
+        finally:
+            with self.lock:
+                if self.inflight.get(key) is future:
+                    del self.inflight[key]
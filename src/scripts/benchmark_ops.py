@@ -2,6 +2,7 @@ import re
 import os
 import timeit
 import asyncio
+import argparse
 import cProfile
 import tempfile
 import itertools
@@ -120,7 +121,7 @@ async def get_download_size_stats_impl(urls):
 def get_download_size_stats(urls):
     asyncio.run(get_download_size_stats_impl(urls))
 
-if __name__ == "__main__":
+def run_benchmarks():
     queries = [ "trade marks" ]
     counts  = [ 10, 25, 100, 150 ]
     numbers = [ 10, 10, 5, 5 ]
@@ -131,4 +132,22 @@ if __name__ == "__main__":
         get_download_size_stats(urls)
         benchmark(download_judgments_sync, urls, number=number)
         benchmark(download_judgments_async, urls, number=number)
-        print()
\ No newline at end of file
+        print()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="benchmark synchronous and asynchronous judgment downloads")
+    parser.add_argument("--mock", action="store_true",
+                        help="benchmark against a local mock server instead of the live website")
+    parser.add_argument("--latency", type=float, default=0.05, help="response latency of the mock server")
+    parser.add_argument("--jitter", type=float, default=0.05, help="response jitter of the mock server")
+
+    args = parser.parse_args()
+
+    if args.mock:
+        from src.scripts.mock_court_server import MockCourtServer
+        with MockCourtServer(judgments=200, latency=args.latency, jitter=args.jitter) as server:
+            DHCJudgmentRetriever.set_base_url(server.base_url)
+            run_benchmarks()
+            print("mock server requests:", dict(server.stats))
+    else:
+        run_benchmarks()
\ No newline at end of file
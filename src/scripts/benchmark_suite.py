@@ -0,0 +1,446 @@
+"""
+Offline benchmark suite for the hot paths of the pipeline, run over a synthetic corpus.
+Results are stored as JSON baselines, which later runs can be compared against to flag regressions.
+
+    python3 -m src.scripts.benchmark_suite run -o dumps/benchmark_baseline.json
+    python3 -m src.scripts.benchmark_suite compare dumps/benchmark_baseline.json --threshold 0.1
+"""
+
+import os
+import sys
+import glob
+import json
+import timeit
+import fnmatch
+import argparse
+import platform
+import datetime
+import functools
+import statistics
+import subprocess
+import collections
+import tempfile
+
+from src import utils
+from src.pipeline import preprocess, process, search_and_scrape
+from src.scripts import generate_corpus
+from src.scripts.benchmark_ops import time_unit
+
+COURT = "DHC"
+EXTRACTOR = "pdfminer_text"
+
+# Saved responses from the court websites, used by parser benchmarks.
+HTML_DIR = os.path.join("tests", "data", "html")
+
+# Registered benchmarks, by name, in order of execution.
+BENCHMARKS = {}
+
+def benchmark(name):
+    """ Registers a benchmark. The decorated function receives the corpus and returns
+        a function performing one iteration, along with the number of operations per iteration. """
+    def decorator(function):
+        BENCHMARKS[name] = function
+        return function
+    return decorator
+
+class BenchmarkCorpus:
+    """ Synthetic corpus used by benchmarks, with lazily loaded views over its contents. """
+
+    def __init__(self, root, scratch_dir) -> None:
+        """ Initializes the corpus.
+
+        Args:
+            root (str): Output directory the corpus was generated in.
+            scratch_dir (str): Directory for files written by benchmarks.
+        """
+        self.root        = root
+        self.scratch_dir = scratch_dir
+        self.output_dir  = os.path.join(root, "judgments", f"{COURT} Judgments")
+        self.json_dir    = os.path.join(root, "json", f"{COURT} Judgments")
+
+    @functools.cached_property
+    def json_files(self):
+        return sorted(glob.glob(os.path.join(self.json_dir, "*.json")))
+
+    @functools.cached_property
+    def pages(self):
+        return [ ( json_file, utils.fs.read_json(json_file) ) for json_file in self.json_files ]
+
+    @functools.cached_property
+    def judgments(self):
+        return [ judgment for _, data in self.pages for judgment in data['data'] ]
+
+    @functools.cached_property
+    def pdf_files(self):
+        return sorted(glob.glob(os.path.join(self.output_dir, "*.pdf")))
+
+    @functools.cached_property
+    def structured_data_files(self):
+        return sorted(glob.glob(os.path.join(self.output_dir, "extracted_adobe_api", "*.json")))
+
+    @functools.cached_property
+    def structured_data(self):
+        # pylint: disable-next=import-outside-toplevel
+        from src.segregators.adobe_json import AdobeJSONSegregator
+        # Elements are loaded as lists, as loaded elements are streamed from the file and can be iterated once.
+        return [
+            { 'elements': [ *AdobeJSONSegregator.iter_elements(file) ] } for file in self.structured_data_files
+        ]
+
+    @functools.cached_property
+    def paragraphs(self):
+        # pylint: disable-next=import-outside-toplevel
+        from src.segregators.adobe_json import AdobeJSONSegregator
+        return [
+            paragraph['content'] for data in self.structured_data[:100]
+            for paragraph in AdobeJSONSegregator.segregate(data)
+        ]
+
+    def make_batches(self):
+        """ Returns batches of unique documents per page, in the format used by the processing phase. """
+        extract_dir, seen, batches = os.path.join(self.output_dir, f"extracted_{EXTRACTOR}"), set(), []
+        for json_file, data in self.pages:
+            judgments = [
+                judgment for judgment in data['data']
+                if judgment['document_path'] not in seen and not seen.add(judgment['document_path'])
+            ]
+            batches.append(({
+                'json': json_file,
+                'judgments': [ judgment['document_path'] for judgment in judgments ],
+                'extractions': { EXTRACTOR: [
+                    [ os.path.join(extract_dir, os.path.splitext(os.path.basename(judgment['document_path']))[0] + ".txt") ]
+                    for judgment in judgments
+                ] }
+            }, judgments))
+        return batches
+
+# ==== Benchmarks
+
+@benchmark("file_digest")
+def bench_file_digest(corpus):
+    def run():
+        for file in corpus.pdf_files:
+            preprocess.file_digest(file)
+    return run, len(corpus.pdf_files)
+
+@benchmark("file_index.load_directory")
+def bench_file_index_load_directory(corpus):
+    def run():
+        preprocess.FileIndexStore().load_directory(corpus.output_dir, "*.pdf")
+    return run, len(corpus.pdf_files)
+
+@benchmark("file_index.get")
+def bench_file_index_get(corpus):
+    file_index = preprocess.FileIndexStore()
+    file_index.load_directory(corpus.output_dir, "*.pdf")
+    group = os.path.basename(corpus.output_dir)
+    def run():
+        for file in corpus.pdf_files:
+            file_index.get(file, group)
+    return run, len(corpus.pdf_files)
+
+@benchmark("judgment_index.get")
+def bench_judgment_index_get(corpus):
+    judgment_index = preprocess.JudgmentIndexStore()
+    for index, judgment in enumerate(corpus.judgments):
+        judgment_index.load(judgment, COURT, { 'index': index })
+    by_url = [ { 'document_href': judgment['document_href'] } for judgment in corpus.judgments ]
+    def run():
+        for judgment in corpus.judgments:
+            judgment_index.get(judgment, COURT)
+        for judgment in by_url:
+            judgment_index.get(judgment, COURT)
+    return run, 2 * len(corpus.judgments)
+
+@benchmark("remove_query_param")
+def bench_remove_query_param(corpus):
+    urls = [ judgment['document_href'] for judgment in corpus.judgments ]
+    def run():
+        for url in urls:
+            preprocess.remove_query_param(url, 'ID')
+    return run, len(urls)
+
+@benchmark("deduplicate_judgments")
+def bench_deduplicate_judgments(corpus):
+    def run():
+        judgment_index = preprocess.JudgmentIndexStore()
+        for json_file, data in corpus.pages:
+            search_and_scrape.deduplicate_judgments(judgment_index, COURT, data['data'], { 'json': json_file })
+    return run, len(corpus.judgments)
+
+@benchmark("deduplicate_by_content")
+def bench_deduplicate_by_content(corpus):
+    batches = corpus.make_batches()
+    def run():
+        file_index = preprocess.FileIndexStore()
+        for batch, judgments in batches:
+            process.deduplicate_by_content(file_index, EXTRACTOR, batch, judgments)
+    return run, sum(len(judgments) for _, judgments in batches)
+
+@benchmark("adobe_json.segregate")
+def bench_adobe_json_segregate(corpus):
+    # pylint: disable-next=import-outside-toplevel
+    from src.segregators.adobe_json import AdobeJSONSegregator
+    def run():
+        for data in corpus.structured_data:
+            collections.deque(AdobeJSONSegregator.segregate(data), maxlen=0)
+    return run, len(corpus.structured_data)
+
+@benchmark("adobe_json.segregate_file")
+def bench_adobe_json_segregate_file(corpus):
+    # pylint: disable-next=import-outside-toplevel
+    from src.segregators.adobe_json import AdobeJSONSegregator
+    def run():
+        for file in corpus.structured_data_files:
+            collections.deque(AdobeJSONSegregator.segregate_file(file), maxlen=0)
+    return run, len(corpus.structured_data_files)
+
+@benchmark("sent_count.evaluate")
+def bench_sent_count_evaluate(corpus):
+    # pylint: disable-next=import-outside-toplevel
+    from src.filters.sent_count_filter import SentenceCountFilter
+    sent_count_filter = SentenceCountFilter()
+    sent_count_filter.set_options()
+    def run():
+        sent_count_filter.evaluate(corpus.paragraphs)
+    return run, len(corpus.paragraphs)
+
+def bench_parser(file_name, retriever_name, parser):
+    """ Returns a benchmark over a parser for responses, using saved HTML fixtures. """
+    def make_benchmark(_corpus):
+        # pylint: disable-next=import-outside-toplevel
+        from src import retrievers
+        with open(os.path.join(HTML_DIR, file_name), 'r', encoding='utf-8') as file:
+            text = file.read()
+        function = getattr(getattr(retrievers, retriever_name), parser)
+        return ( lambda: function(text) ), 1
+    return make_benchmark
+
+for backend in ( "lxml", "bs4" ):
+    benchmark(f"dhc.parse_search_results.{backend}")(
+        bench_parser("dhc_search_page_1.html", "DHCJudgmentRetriever", f"parse_search_results_{backend}")
+    )
+    benchmark(f"sc.parse_date_results.{backend}")(
+        bench_parser("sc_judgments_by_date.html", "SCJudgmentRetriever", f"parse_date_results_{backend}")
+    )
+    benchmark(f"sc.parse_text_results.{backend}")(
+        bench_parser("sc_judgments_by_text.html", "SCJudgmentRetriever", f"parse_text_results_{backend}")
+    )
+
+@benchmark("json.read")
+def bench_json_read(corpus):
+    def run():
+        for json_file in corpus.json_files:
+            utils.fs.read_json(json_file)
+    return run, len(corpus.json_files)
+
+@benchmark("json.write")
+def bench_json_write(corpus):
+    paths = [ os.path.join(corpus.scratch_dir, os.path.basename(json_file)) for json_file, _ in corpus.pages ]
+    def run():
+        for path, (_, data) in zip(paths, corpus.pages):
+            utils.fs.write_json(path, data)
+    return run, len(paths)
+
+@benchmark("json.write_compact")
+def bench_json_write_compact(corpus):
+    paths = [ os.path.join(corpus.scratch_dir, os.path.basename(json_file)) for json_file, _ in corpus.pages ]
+    def run():
+        for path, (_, data) in zip(paths, corpus.pages):
+            utils.fs.write_json(path, data, compact=True)
+    return run, len(paths)
+
+# ==== Suite execution
+
+def git_revision():
+    """ Returns the current git revision, if available. """
+    try:
+        return subprocess.run(
+            [ "git", "rev-parse", "--short", "HEAD" ], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def measure(function, ops, repeat):
+    """ Times repeated iterations of a benchmark, after a warmup iteration.
+
+    Returns:
+        dict: Per-operation timings (in seconds) over the iterations.
+    """
+    function()
+    timings = [ timing / ops for timing in timeit.Timer(function).repeat(repeat=repeat, number=1) ]
+    return {
+        'ops'   : ops,
+        'repeat': repeat,
+        'min'   : min(timings),
+        'median': statistics.median(timings),
+        'mean'  : statistics.fmean(timings),
+        'stdev' : statistics.stdev(timings) if len(timings) > 1 else 0.0
+    }
+
+def run_suite(prog, corpus_dir, judgments, repeat, patterns=None, seed=0):
+    """ Runs the benchmark suite, generating a corpus if one is not given.
+
+    Args:
+        prog (str): Program name, used for messages.
+        corpus_dir (str|None): Directory of an existing corpus, generated by `generate_corpus.py`.
+        judgments (int): Number of judgments to generate, if a corpus is not given.
+        repeat (int): Number of timed iterations per benchmark.
+        patterns (list[str], optional): Glob patterns selecting the benchmarks to run. Defaults to all.
+        seed (int, optional): Seed for the generated corpus. Defaults to 0.
+
+    Returns:
+        dict: Results of the run, with metadata describing the environment, and errors of failed benchmarks.
+    """
+    results, errors = {}, {}
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if corpus_dir is None:
+            corpus_dir = os.path.join(temp_dir, "corpus")
+            generate_corpus.generate(argparse.Namespace(
+                output_dir=corpus_dir, document_dir="judgments", courts=[ COURT ], judgments=judgments,
+                query="benchmark", page_size=10, duplicate_url_rate=0.05, duplicate_content_rate=0.05,
+                paragraphs=[ 10, 40 ], sentences=[ 1, 6 ], extractors=[ EXTRACTOR, "adobe_api" ], no_pdfs=False,
+                end_date=datetime.date(2022, 12, 31), compact_json=False, workers=None, seed=seed
+            ))
+        scratch_dir = os.path.join(temp_dir, "scratch")
+        os.makedirs(scratch_dir, exist_ok=True)
+        corpus = BenchmarkCorpus(corpus_dir, scratch_dir)
+
+        for name, make_benchmark in BENCHMARKS.items():
+            if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+                continue
+            print("> ", f"{name:30}", " ... ", sep='', end='', flush=True)
+            try:
+                function, ops = make_benchmark(corpus)
+                results[name] = measure(function, ops, repeat)
+                print(f"{time_unit(results[name]['median']):>12} per op ({ops} ops)")
+            except Exception as exc: # pylint: disable=broad-except
+                errors[name] = ' '.join(f"{type(exc).__name__}: {exc}".split())[:200]
+                print("failed")
+                print(prog, ": error: ", name, ": ", errors[name], sep='', file=sys.stderr)
+
+    return {
+        'meta': {
+            'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'revision'    : git_revision(),
+            'python'      : platform.python_version(),
+            'platform'    : platform.platform(),
+            'corpus'      : corpus_dir if os.path.exists(corpus_dir) else None,
+            'judgments'   : judgments,
+            'repeat'      : repeat,
+            'seed'        : seed
+        },
+        'results': results,
+        'errors' : errors
+    }
+
+def compare_results(baseline, current, threshold=0.1, metric='min', patterns=None):
+    """ Compares benchmark results against a baseline. Benchmarks of the baseline which failed or
+        did not run in the current results are reported as well, and count as regressions.
+
+    Args:
+        baseline (dict): Baseline results, as returned by `run_suite`.
+        current (dict): Current results, as returned by `run_suite`.
+        threshold (float, optional): Relative slowdown beyond which a benchmark is flagged. Defaults to 0.1.
+        metric (str, optional): Timing to compare, one of min, median or mean. Defaults to 'min'.
+        patterns (list[str], optional): Glob patterns selecting the benchmarks expected to have run.
+            Defaults to all benchmarks of the baseline.
+
+    Returns:
+        list[tuple[str, float, float | None, float | None, str]]: Rows of benchmark name, baseline and current
+            timings, relative change and status (one of ok, regression, improvement, failed, missing).
+    """
+    rows, errors = [], current.get('errors', {})
+    for name, result in baseline['results'].items():
+        if patterns and not any(fnmatch.fnmatch(name, pattern) for pattern in patterns):
+            continue
+        before = result[metric]
+        if name not in current['results']:
+            rows.append(( name, before, None, None, "failed" if name in errors else "missing" ))
+            continue
+        after  = current['results'][name][metric]
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append(( name, before, after, change, status ))
+    return rows
+
+def main():
+    """ Runs the benchmark suite or compares results, based on command-line options. """
+    parser = argparse.ArgumentParser(description="run offline benchmarks for hot paths of the pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser("run", help="run benchmarks and optionally save results")
+    run_parser.add_argument("-o", "--output", default=None, help="path to save results to, as JSON")
+
+    compare_parser = subparsers.add_parser("compare", help="compare results against a baseline")
+    compare_parser.add_argument("baseline", help="path to the baseline results")
+    compare_parser.add_argument("current", nargs='?', default=None,
+                                help="path to results to compare. If not given, runs the benchmarks")
+    compare_parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                                help="relative slowdown beyond which a benchmark is flagged as a regression")
+    compare_parser.add_argument("-m", "--metric", choices=[ 'min', 'median', 'mean' ], default='min',
+                                help="timing to compare")
+
+    for subparser in ( run_parser, compare_parser ):
+        subparser.add_argument("-n", "--judgments", type=int, default=500,
+                               help="number of judgments in the generated corpus")
+        subparser.add_argument("-c", "--corpus", default=None,
+                               help="directory of an existing corpus, generated by generate_corpus.py")
+        subparser.add_argument("-r", "--repeat", type=int, default=5, help="number of timed iterations")
+        subparser.add_argument("-k", "--benchmarks", nargs='*', default=None,
+                               help="glob patterns selecting benchmarks to run")
+        subparser.add_argument("--seed", type=int, default=0, help="seed for the generated corpus")
+
+    args = parser.parse_args()
+
+    if args.command == "run":
+        results = run_suite(parser.prog, args.corpus, args.judgments, args.repeat, args.benchmarks, args.seed)
+        # Results with failed benchmarks are incomplete, and are not saved as a baseline to compare against.
+        if results['errors']:
+            print(parser.prog, ": error: not saving results, as benchmarks failed: ",
+                  ', '.join(results['errors']), sep='', file=sys.stderr)
+            return 1
+        if args.output is not None:
+            os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+            with open(args.output, 'w+', encoding='utf-8') as file:
+                json.dump(results, file, indent=4)
+            print(parser.prog, ": saved results to ", args.output, sep='')
+        return 0
+
+    with open(args.baseline, 'r', encoding='utf-8') as file:
+        baseline = json.load(file)
+    if baseline.get('errors'):
+        print(parser.prog, ": error: baseline has failed benchmarks: ", ', '.join(baseline['errors']),
+              sep='', file=sys.stderr)
+        return 1
+    if args.current is not None:
+        with open(args.current, 'r', encoding='utf-8') as file:
+            current = json.load(file)
+    else:
+        meta = baseline['meta']
+        current = run_suite(
+            parser.prog, args.corpus, meta.get('judgments', args.judgments),
+            meta.get('repeat', args.repeat), args.benchmarks, meta.get('seed', args.seed)
+        )
+
+    rows = compare_results(baseline, current, args.threshold, args.metric, args.benchmarks)
+    print()
+    print(f"{'benchmark':30} {'baseline':>12} {'current':>12} {'change':>8}  status")
+    for name, before, after, change, status in rows:
+        after, change = ( time_unit(after), f"{change:+.1%}" ) if after is not None else ( '-', '-' )
+        print(f"{name:30} {time_unit(before):>12} {after:>12} {change:>8}  {status}")
+
+    regressions = [ row[0] for row in rows if row[-1] in ( "regression", "failed", "missing" ) ]
+    if regressions:
+        print(parser.prog, ": error: regressions beyond ", f"{args.threshold:.0%}",
+              " (or failed benchmarks): ", ', '.join(regressions), sep='', file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,31 @@
+"""
+Applies merge requests logged by earlier (possibly deferred) runs of the pipeline to the dataset JSON files.
+"""
+
+import os
+import argparse
+
+from src import utils
+from src.pipeline import preprocess, postprocess
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="apply pending merge requests from the merge request log to dataset JSON files"
+    )
+    parser.add_argument("-o", "--output-dir", default="data",
+                        help="root directory for storing judgments and metadata")
+    parser.add_argument("--compact-json", action="store_true",
+                        help="save JSON results without indentation")
+    parser.add_argument("-d", "--debug", action="store_true", help="enable tracebacks for errors")
+
+    args = parser.parse_args()
+    args.save_json = True
+
+    merge_log = preprocess.open_merge_log(parser.prog, args)
+    if not os.path.exists(merge_log.path) and not os.path.exists(merge_log.pending_path):
+        print(parser.prog, ": no pending merge requests", sep='')
+    else:
+        print(parser.prog, ": merging judgments with same data ...", sep='')
+        document_cache = utils.fs.DocumentCache(compact=args.compact_json)
+        count = postprocess.compact_merge_log(parser.prog, merge_log, document_cache, debug=args.debug)
+        print(parser.prog, ": updated ", count, " entries", sep='')
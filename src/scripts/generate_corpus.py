@@ -0,0 +1,216 @@
+"""
+Generates synthetic dataset trees in the layout produced by the pipeline: search result JSON
+files under `json/<court> Judgments`, judgment PDFs, `extracted_<extractor>` outputs and
+Adobe-style structured data, with controllable duplicate ratios and paragraph sizes.
+Useful for scaling tests of the indexes, de-duplication and segregation without network access.
+
+    python3 -m src.scripts.generate_corpus -o data/synthetic -n 100000 --duplicate-url-rate 0.05
+"""
+
+import os
+import json
+import time
+import argparse
+import datetime
+import concurrent.futures
+
+from src import registry, utils
+from src.scripts import synthetic
+
+# Outputs generated per extractor, by file extension.
+EXTRACTOR_OUTPUTS = {
+    'pdfminer_text': ( '.txt', ),
+    'parsr'        : ( '.txt', ),
+    'parsr_custom' : ( '.txt', ),
+    'adobe_api'    : ( '.json', '.txt' )
+}
+
+def make_document_href(court, judgment, base_url):
+    """ Returns the URL for a judgment document, in the format used by the court's retriever. """
+    if court == 'DHC':
+        return f"{base_url}/download.do?FILENAME={judgment['path']}&ID={judgment['id']}"
+    return f"{base_url}/{judgment['path']}"
+
+def plan_judgments(court, args):
+    """ Generates judgment entries for a court, marking the entries responsible for writing each document.
+
+    Returns:
+        list[dict]: Judgment entries, as returned by `synthetic.make_judgments`, with an additional
+            `title` for the document content, and an `owner` flag for the first entry of every document path.
+    """
+    judgments = synthetic.make_judgments(
+        court, args.judgments, args.end_date,
+        args.duplicate_url_rate, args.duplicate_content_rate, args.seed
+    )
+    paths, titles = set(), {}
+    for judgment in judgments:
+        judgment['content_title'] = titles.setdefault(judgment['content_key'], judgment['title'])
+        judgment['owner'] = judgment['path'] not in paths
+        paths.add(judgment['path'])
+    return judgments
+
+def write_document(judgment, output_dir, options):
+    """ Writes the PDF and extracted outputs for a judgment document.
+
+    Returns:
+        tuple[int, int]: Number of files and bytes written.
+    """
+    paragraphs = synthetic.make_document_paragraphs(
+        f"{options['seed']}-{judgment['content_key']}", options['paragraphs'], options['sentences']
+    )
+    title = judgment['content_title']
+    pages = synthetic.layout_pages(title, paragraphs)
+    stem  = os.path.splitext(os.path.basename(judgment['path']))[0]
+
+    outputs = []
+    if options['write_pdfs']:
+        outputs.append(( os.path.join(output_dir, stem + ".pdf"), synthetic.make_pdf(pages) ))
+    for extractor in options['extractors']:
+        extract_output_dir = os.path.join(output_dir, utils.fs.pathsafe("extracted_" + extractor))
+        for extension in EXTRACTOR_OUTPUTS[extractor]:
+            if extension == '.json':
+                content = json.dumps(synthetic.make_structured_data(title, paragraphs), ensure_ascii=False)
+            elif extractor == 'adobe_api':
+                content = '\n\n'.join(paragraph for paragraph in [ title, *(
+                    f"{number}. {paragraph}" for number, paragraph in enumerate(paragraphs, 1)
+                ) ])
+            else:
+                content = synthetic.make_text(pages)
+            outputs.append(( os.path.join(extract_output_dir, stem + extension), content.encode() ))
+
+    for path, content in outputs:
+        with open(path, 'wb') as file:
+            file.write(content)
+    return len(outputs), sum(len(content) for _, content in outputs)
+
+def write_page(task):
+    """ Writes a page of search results as a JSON file, along with the documents owned by its judgments.
+
+    Returns:
+        tuple[int, int]: Number of files and bytes written.
+    """
+    court, page, judgments, total, options = task
+    output_dir = os.path.join(options['output_dir'], options['document_dir'], f"{court} Judgments")
+    json_dir   = os.path.join(options['output_dir'], "json", f"{court} Judgments")
+
+    files, size, data = 0, 0, []
+    for judgment in judgments:
+        if judgment['owner']:
+            document_files, document_size = write_document(judgment, output_dir, options)
+            files, size = files + document_files, size + document_size
+        data.append({
+            'case_number'  : judgment['case_number'],
+            'title'        : judgment['title'],
+            'date'         : synthetic.format_date(judgment['date'], '/'),
+            'document_href': make_document_href(court, judgment, options['base_urls'][court]),
+            'document_path': os.path.join(output_dir, os.path.basename(judgment['path']))
+        })
+
+    page_size, start = options['page_size'], (page - 1) * options['page_size']
+    response = {
+        'entry_start'   : start + 1,
+        'entry_end'     : start + len(judgments),
+        'entry_total'   : total,
+        'page'          : page,
+        'page_total'    : -(-total // page_size),
+        'page_processed': page,
+        'saved_total'   : start + len(judgments),
+        'generated_at'  : options['generated_at']
+    }
+    if start + len(judgments) < total:
+        response['page_next'] = page + 1
+
+    json_filestem  = f"{court} {options['query']} page {page}"
+    json_file_path = os.path.join(json_dir, f"judgments {utils.fs.pathsafe(json_filestem)}.json")
+    utils.fs.write_json(json_file_path, {
+        'meta': {
+            'directory': output_dir,
+            'request'  : {
+                'query'     : options['query'],
+                'page'      : page,
+                'court'     : court,
+                'start_page': 1,
+                'req_pages' : None,
+                'req_total' : None,
+                'start_date': None,
+                'end_date'  : None
+            },
+            'response' : response
+        },
+        'data': data
+    }, compact=options['compact_json'])
+    return files + 1, size + os.stat(json_file_path).st_size
+
+def generate(args):
+    """ Generates the synthetic corpus for all requested courts. """
+    options = {
+        'output_dir'  : args.output_dir,
+        'document_dir': args.document_dir,
+        'query'       : args.query,
+        'page_size'   : args.page_size,
+        'paragraphs'  : tuple(args.paragraphs),
+        'sentences'   : tuple(args.sentences),
+        'extractors'  : args.extractors,
+        'write_pdfs'  : not args.no_pdfs,
+        'compact_json': args.compact_json,
+        'seed'        : args.seed,
+        'base_urls'   : { court: registry.RETRIEVERS[court].BASE_URL for court in args.courts },
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds')
+    }
+
+    with concurrent.futures.ProcessPoolExecutor(args.workers) as executor:
+        for court in args.courts:
+            start_time = time.perf_counter()
+            print("> generating ", args.judgments, " judgments for ", court, " ... ", sep='', end='', flush=True)
+
+            output_dir = os.path.join(args.output_dir, args.document_dir, f"{court} Judgments")
+            os.makedirs(os.path.join(args.output_dir, "json", f"{court} Judgments"), exist_ok=True)
+            for extractor in args.extractors:
+                os.makedirs(os.path.join(output_dir, utils.fs.pathsafe("extracted_" + extractor)), exist_ok=True)
+
+            judgments = plan_judgments(court, args)
+            tasks = (
+                ( court, page, judgments[start:start+args.page_size], len(judgments), options )
+                for page, start in enumerate(range(0, len(judgments), args.page_size), 1)
+            )
+            files, size = 0, 0
+            for task_files, task_size in executor.map(write_page, tasks, chunksize=64):
+                files, size = files + task_files, size + task_size
+
+            print("done")
+            print("  : ", sum(judgment['owner'] for judgment in judgments), " documents, ",
+                  len({ judgment['content_key'] for judgment in judgments }), " distinct contents, ",
+                  files, " files, ", f"{size / 2**20:.2f}", " MiB in ",
+                  f"{time.perf_counter() - start_time:.2f}", " s", sep='')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="generate a synthetic dataset of judgments for scaling tests and benchmarks"
+    )
+    parser.add_argument("-o", "--output-dir", default=os.path.join("data", "synthetic"),
+                        help="root directory for storing judgments and metadata")
+    parser.add_argument("--document-dir", default="judgments",
+                        help="directory for storing judgment documents, relative to the output directory")
+    parser.add_argument("-c", "--courts", nargs='*', default=['DHC'], choices=list(registry.RETRIEVERS),
+                        help="courts to generate judgments for")
+    parser.add_argument("-n", "--judgments", type=int, default=1000, help="number of judgments per court")
+    parser.add_argument("-q", "--query", default="synthetic", help="query recorded in the search results")
+    parser.add_argument("--page-size", type=int, default=10, help="number of judgments per JSON file")
+    parser.add_argument("--duplicate-url-rate", type=float, default=0.05,
+                        help="fraction of judgments referring to the document of an earlier judgment")
+    parser.add_argument("--duplicate-content-rate", type=float, default=0.05,
+                        help="fraction of judgments with a distinct document but the same content as an earlier one")
+    parser.add_argument("--paragraphs", type=int, nargs=2, default=[10, 40], metavar=('MIN', 'MAX'),
+                        help="range of paragraph counts per document")
+    parser.add_argument("--sentences", type=int, nargs=2, default=[1, 6], metavar=('MIN', 'MAX'),
+                        help="range of sentence counts per paragraph")
+    parser.add_argument("-e", "--extractors", nargs='*', default=['pdfminer_text', 'adobe_api'],
+                        choices=list(EXTRACTOR_OUTPUTS), help="extractors to generate outputs for")
+    parser.add_argument("--no-pdfs", action="store_true", help="skip generation of PDF documents")
+    parser.add_argument("--end-date", type=datetime.date.fromisoformat, default=datetime.date(2022, 12, 31),
+                        help="date of the latest judgment, in YYYY-MM-DD format")
+    parser.add_argument("--compact-json", action="store_true", help="save JSON results without indentation")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes")
+    parser.add_argument("--seed", type=int, default=0, help="seed for generated content")
+
+    generate(parser.parse_args())
@@ -0,0 +1,58 @@
+"""
+Reports the cold-start import cost of modules, as measured by `python -X importtime`.
+"""
+
+import sys
+import argparse
+import subprocess
+import statistics
+import collections
+
+def measure(statement, python=sys.executable):
+    """ Executes a statement in a fresh interpreter and parses the import time report.
+
+    Args:
+        statement (str): Python statement to execute, such as an import.
+        python (str, optional): Interpreter to use. Defaults to the current interpreter.
+
+    Returns:
+        dict[str, tuple[int, int]]: Self and cumulative import times (in microseconds), keyed by module.
+    """
+    result = subprocess.run(
+        [ python, "-X", "importtime", "-c", statement ],
+        capture_output=True, text=True, check=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line: continue
+        self_time, cumulative_time, module = line[len("import time:"):].split('|')
+        timings[module.strip()] = ( int(self_time), int(cumulative_time) )
+    return timings
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="report import times for a statement, averaged over multiple cold starts"
+    )
+    parser.add_argument("statement", nargs='?', default="import paracurate",
+                        help="statement to measure, defaults to importing the driver script")
+    parser.add_argument("-n", "--runs", type=int, default=5, help="number of runs to average over")
+    parser.add_argument("-t", "--top", type=int, default=15, help="number of top-level packages to report")
+
+    args = parser.parse_args()
+
+    totals, packages = [], collections.defaultdict(list)
+    for _ in range(args.runs):
+        timings = measure(args.statement)
+        totals.append(sum(self_time for self_time, _ in timings.values()))
+        per_package = collections.defaultdict(int)
+        for module, (self_time, _) in timings.items():
+            per_package[module.split('.')[0]] += self_time
+        for package, self_time in per_package.items():
+            packages[package].append(self_time)
+
+    print(f"{args.statement!r}: {statistics.median(totals) / 1e3:.1f} ms (median of {args.runs} runs)")
+    print()
+    print(f"{'package':30} {'time (ms)':>10}")
+    ranked = sorted(packages.items(), key=lambda item: statistics.median(item[1]), reverse=True)
+    for package, times in ranked[:args.top]:
+        print(f"{package:30} {statistics.median(times) / 1e3:10.2f}")
@@ -0,0 +1,391 @@
+"""
+Offline stand-in for the websites of the Delhi High Court and the Supreme Court, serving
+recorded or synthetic search results, captchas and judgment PDFs. Latency, error rates and
+duplicate-URL behaviour are configurable, for reproducible benchmarks without network access.
+
+Retrievers can be pointed at a running server via `set_base_url()`, or through the
+`--court-url` option of paracurate.py:
+
+    python3 -m src.scripts.mock_court_server --port 8080 --latency 0.05 --error-rate 0.01
+    python3 paracurate.py "trade marks" --court-url DHC=http://127.0.0.1:8080 ...
+"""
+
+import os
+import html
+import random
+import asyncio
+import argparse
+import datetime
+import threading
+import collections
+
+from aiohttp import web
+
+from src.scripts import synthetic
+
+DHC_PAGE_SIZE = 10
+
+def parse_date(date_string: str):
+    """ Parses a date in DD-MM-YYYY format. """
+    return datetime.datetime.strptime(date_string.strip(), "%d-%m-%Y").date()
+
+class MockCourtServer:
+    """ Configurable mock server for the court websites supported by the retrievers. """
+
+    def __init__(
+        self, judgments=200, latency=0.0, jitter=0.0, error_rate=0.0, junk_rate=0.0,
+        duplicate_url_rate=0.0, duplicate_content_rate=0.0, paragraphs=(10, 40),
+        sc_result_cap=None, captcha_uses=None, end_date=None, fixtures_dir=None, seed=0
+    ) -> None:
+        """ Initializes the server state and generates the synthetic judgment collections.
+
+        Args:
+            judgments (int, optional): Number of judgments to generate per court. Defaults to 200.
+            latency (float, optional): Delay (in seconds) added to every response. Defaults to 0.
+            jitter (float, optional): Maximum random delay (in seconds) added over the latency. Defaults to 0.
+            error_rate (float, optional): Fraction of requests failing with HTTP 500. Defaults to 0.
+            junk_rate (float, optional): Fraction of document requests answered with an HTML
+                error page (HTTP 200) instead of the PDF. Defaults to 0.
+            duplicate_url_rate (float, optional): Fraction of judgments referring to the document of an
+                earlier judgment, through the same path with a different `ID=` parameter. Defaults to 0.
+            duplicate_content_rate (float, optional): Fraction of judgments with a distinct document
+                path but the same content as the document of an earlier judgment. Defaults to 0.
+            paragraphs (tuple[int, int], optional): Range of paragraph counts per document. Defaults to (10, 40).
+            sc_result_cap (int, optional): Maximum number of results returned per SC search. Defaults to None.
+            captcha_uses (int, optional): Number of searches a captcha is valid for. Defaults to None (unlimited).
+            end_date (datetime.date, optional): Date of the latest judgment. Defaults to today.
+            fixtures_dir (str, optional): Directory with recorded responses to serve instead of
+                synthetic ones: `dhc_search_page_<n>.html`, `sc_judgments_by_date.html` and
+                `sc_judgments_by_text.html`. Defaults to None.
+            seed (int, optional): Seed for generated content and injected faults. Defaults to 0.
+        """
+        self.latency, self.jitter = latency, jitter
+        self.error_rate, self.junk_rate = error_rate, junk_rate
+        self.sc_result_cap = sc_result_cap
+        self.captcha_uses  = captcha_uses
+        self.fixtures_dir  = fixtures_dir
+        self.paragraphs    = paragraphs
+        self.seed          = seed
+
+        self.lock     = threading.Lock()
+        self.random   = random.Random(seed)
+        self.captchas = {}
+        self.stats    = collections.Counter()
+        self.pdf_cache = {}
+
+        end_date = end_date or datetime.date.today()
+        self.dhc_judgments = synthetic.make_judgments(
+            'DHC', judgments, end_date, duplicate_url_rate, duplicate_content_rate, seed
+        )
+        self.sc_judgments = synthetic.make_judgments(
+            'SC', judgments, end_date, duplicate_url_rate, duplicate_content_rate, seed
+        )
+
+        self.runner, self.thread, self.loop, self.base_url = None, None, None, None
+
+    # ==== Synthetic data
+
+    def make_document(self, content_key, title):
+        """ Returns the (cached) PDF document generated for a content key. """
+        with self.lock:
+            if content_key not in self.pdf_cache:
+                paragraphs = synthetic.make_document_paragraphs(content_key, self.paragraphs)
+                self.pdf_cache[content_key] = synthetic.make_pdf(synthetic.layout_pages(title, paragraphs))
+            return self.pdf_cache[content_key]
+
+    def load_fixture(self, name):
+        """ Returns the contents of a recorded response, if available. """
+        if self.fixtures_dir is not None:
+            path = os.path.join(self.fixtures_dir, name)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as file:
+                    return file.read()
+        return None
+
+    # ==== Request handling
+
+    @web.middleware
+    async def fault_injection(self, request, handler):
+        """ Middleware adding latency and errors to responses, and collecting request statistics. """
+        resource = request.match_info.route.resource
+        with self.lock:
+            self.stats[resource.canonical if resource is not None else request.path] += 1
+            delay = self.latency + self.random.uniform(0, self.jitter)
+            fail  = self.random.random() < self.error_rate
+            if fail: self.stats['errors'] += 1
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if fail:
+            raise web.HTTPInternalServerError(text="Internal Server Error")
+        return await handler(request)
+
+    async def dhc_search(self, request):
+        """ Handles DHC free text search requests, returning 10 judgments per page. """
+        form = await request.post()
+        page = max(int(form.get('PAGE_NO') or 1), 1)
+        if (fixture := self.load_fixture(f"dhc_search_page_{page}.html")) is not None:
+            return web.Response(text=fixture, content_type='text/html')
+
+        total = len(self.dhc_judgments)
+        start = (page - 1) * DHC_PAGE_SIZE
+        rows  = []
+        for number, judgment in enumerate(self.dhc_judgments[start:start+DHC_PAGE_SIZE], start + 1):
+            href = html.escape(f"download.do?FILENAME={judgment['path']}&ID={judgment['id']}")
+            rows.append(
+                f'<tr bgcolor="{"#C8E9F9" if number % 2 else "#FFFFFF"}">'
+                f'<td align="center" class="tabletxt">{number}</td>'
+                f'<td align="center" class="tabletxt">{html.escape(judgment["case_number"])}</td>'
+                f'<td align="center">{html.escape(judgment["title"])}</td>'
+                f'<td align="center" class="tabletxt">{synthetic.format_date(judgment["date"], "/")}</td>'
+                f'<td align="center" class="tabletxt"><a href="{href}" target="_blank">'
+                f'<img border="0" src="img/pdf.png"/></a></td></tr>'
+            )
+        summary = ''
+        if rows:
+            summary = (
+                '<tr><td align="center" colspan="5"><h3><em><strong>'
+                f'(Showing {start + 1} to {start + len(rows)} records from total {total} records )'
+                '</strong></em></h3></td></tr>'
+            )
+        page_html = (
+            '<html><head><title>Delhi High Court</title></head><body>'
+            '<form action="/FreeText/GetSearchResult.do" method="post" name="globalForm">'
+            '<div class="wrapper"><h3>Freetext Search in Judgments/Orders</h3></div>'
+            '<table align="center" class="stylenew"><tr><td align="center" colspan="6"></td></tr></table>'
+            '<table align="center" width="600"><tr><td align="center" colspan="6">'
+            f'<input id="Selected_page" name="Selected_page" type="hidden" value="{page}"/>'
+            f'<input id="total_no_page" name="total_no_page" type="hidden" value="{-(-total // DHC_PAGE_SIZE)}"/>'
+            f'<table align="left" width="600">{summary}'
+            '<tr><td class="bluebg">No.</td><td class="bluebg">Case No.</td><td class="bluebg">Title</td>'
+            '<td class="bluebg" colspan="2">Judgment/Order Date</td></tr>'
+            f'{"".join(rows)}</table></td></tr></table></form></body></html>'
+        )
+        return web.Response(text=page_html, content_type='text/html')
+
+    async def dhc_download(self, request):
+        """ Handles DHC intermediate download pages, which redirect to the document via script. """
+        file_name = request.query.get('FILENAME')
+        if not file_name:
+            raise web.HTTPNotFound()
+        # The actual site reports a broken host in the URL, fixed by the retriever.
+        target = f"http://dhcappl.nic.in:8080/FreeText/documents/{file_name}"
+        page_html = (
+            '<html><head><script type="text/javascript">'
+            f"window.open('{target}', '_self');"
+            '</script></head><body></body></html>'
+        )
+        return web.Response(text=page_html, content_type='text/html')
+
+    async def document(self, request, judgments, prefix):
+        """ Serves a judgment PDF, or occasionally an HTML error page in place of one. """
+        path = request.path[len(prefix):].lstrip('/')
+        for judgment in judgments:
+            if judgment['path'] == path:
+                break
+        else:
+            raise web.HTTPNotFound()
+        with self.lock:
+            junk = self.random.random() < self.junk_rate
+            if junk: self.stats['junk'] += 1
+        if junk:
+            return web.Response(text="<html><body>Service Unavailable</body></html>", content_type='text/html')
+        body = self.make_document(judgment['content_key'], judgment['title'])
+        return web.Response(body=body, content_type='application/pdf')
+
+    async def dhc_document(self, request):
+        """ Serves DHC judgment documents. """
+        return await self.document(request, self.dhc_judgments, "/FreeText/documents")
+
+    async def sc_document(self, request):
+        """ Serves SC judgment documents. """
+        return await self.document(request, self.sc_judgments, "")
+
+    async def sc_captcha(self, _request):
+        """ Issues a new captcha token. """
+        with self.lock:
+            token = self.random.randrange(10, 10**6)
+            while token in self.captchas:
+                token = self.random.randrange(10, 10**6)
+            self.captchas[token] = self.captcha_uses
+        return web.Response(text=str(token), content_type='text/html')
+
+    def consume_captcha(self, token):
+        """ Validates a captcha token, consuming one of its uses. """
+        with self.lock:
+            try:
+                token = int(token)
+            except (TypeError, ValueError):
+                return False
+            if token not in self.captchas:
+                return False
+            if self.captchas[token] is not None:
+                self.captchas[token] -= 1
+                if self.captchas[token] <= 0:
+                    del self.captchas[token]
+            return True
+
+    def sc_select(self, form, prefix):
+        """ Selects SC judgments within the requested date range, oldest first. """
+        start_date = parse_date(form[f'{prefix}from_date'])
+        end_date   = parse_date(form[f'{prefix}to_date'])
+        judgments  = [
+            judgment for judgment in reversed(self.sc_judgments)
+            if start_date <= judgment['date'] <= end_date
+        ]
+        if self.sc_result_cap is not None:
+            judgments = judgments[:self.sc_result_cap]
+        return judgments
+
+    async def sc_judgments_by_date(self, request):
+        """ Handles SC searches by judgment date. """
+        form = await request.post()
+        if not self.consume_captcha(form.get('ansCaptcha')):
+            return web.Response(text="invalid_key", content_type='text/html')
+        if (fixture := self.load_fixture("sc_judgments_by_date.html")) is not None:
+            return web.Response(text=fixture, content_type='text/html')
+
+        judgments = self.sc_select(form, 'JBJ')
+        if not judgments:
+            return web.Response(text="<center>No Record Found!</center>", content_type='text/html')
+        records = []
+        for number, judgment in enumerate(judgments, 1):
+            petitioner, respondent = judgment['title'].split(' VS ')
+            fields = (
+                ("Petitioner Name", petitioner), ("Respondent Name", respondent),
+                ("Petitioner's Advocate", "ADVOCATE A"), ("Respondent's Advocate", "ADVOCATE B"),
+                ("Bench", "HON'BLE MR. JUSTICE X, HON'BLE MRS. JUSTICE Y"), ("Judgment By", "HON'BLE MR. JUSTICE X")
+            )
+            records.append(
+                f'<tr><td rowspan="8">S.No.  {number}</td><td>Diary Number</td>'
+                f'<td>{number} / {judgment["date"].year}</td><td width="20%">Judgment</td></tr>'
+                f'<tr style="height:100%;"><td>Case Number</td><td>{html.escape(judgment["case_number"])}</td>'
+                f'<td rowspan="5"><a href="/{judgment["path"]}" target="_blank"></a>'
+                f'<a href="/{judgment["path"]}" target="_blank">{synthetic.format_date(judgment["date"])}'
+                '<strong>(English)</strong></a><br/></td></tr>'
+                + ''.join(
+                    f'<tr style="height:100%;"><td>{html.escape(name)}</td><td>{html.escape(value)}</td></tr>'
+                    for name, value in fields
+                )
+                + '<tr><td colspan="4"></td></tr>'
+            )
+        return web.Response(
+            text=f'<table style="margin-left: auto;margin-right: auto;">{"".join(records)}</table>',
+            content_type='text/html'
+        )
+
+    async def sc_judgments_by_text(self, request):
+        """ Handles SC free text searches. """
+        form = await request.post()
+        if not self.consume_captcha(form.get('ansCaptcha')):
+            return web.Response(text="invalid_key", content_type='text/html')
+        if (fixture := self.load_fixture("sc_judgments_by_text.html")) is not None:
+            return web.Response(text=fixture, content_type='text/html')
+
+        options = [
+            f'<option value="{number}{judgment["date"].year}:odnt:{judgment["date"].isoformat()}:'
+            f'{judgment["path"]}">{html.escape(judgment["title"]).replace(" VS ", "<b> Vs </b>")}'
+            f' / {synthetic.format_date(judgment["date"])}</option>'
+            for number, judgment in enumerate(self.sc_select(form, 'FT_'), 1)
+        ]
+        return web.Response(
+            text=f'<select style="width: 100%" id="get_free_text_data" size="10">{"".join(options)}</select>',
+            content_type='text/html'
+        )
+
+    def make_app(self):
+        """ Creates the web application serving all routes. """
+        app = web.Application(middlewares=[ self.fault_injection ])
+        app.add_routes([
+            web.post('/FreeText/GetSearchResult.do', self.dhc_search),
+            web.get('/FreeText/download.do', self.dhc_download),
+            web.get('/FreeText/documents/{path:.+}', self.dhc_document),
+            web.get('/php/captcha_num.php', self.sc_captcha),
+            web.post('/php/v_judgments/getJBJ.php', self.sc_judgments_by_date),
+            web.post('/php/v_judgments/get_Text_Free.php', self.sc_judgments_by_text),
+            web.get('/supremecourt/{path:.+}', self.sc_document),
+        ])
+        return app
+
+    # ==== Server lifecycle
+
+    async def start(self, host="127.0.0.1", port=0):
+        """ Starts serving on the current event loop.
+
+        Returns:
+            str: The base URL of the server.
+        """
+        self.runner = web.AppRunner(self.make_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        host, port = self.runner.addresses[0][:2]
+        self.base_url = f"http://{host}:{port}"
+        return self.base_url
+
+    def start_in_thread(self, host="127.0.0.1", port=0):
+        """ Starts serving from a background thread with a dedicated event loop.
+
+        Returns:
+            str: The base URL of the server.
+        """
+        started = threading.Event()
+        self.loop = asyncio.new_event_loop()
+        def serve():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self.start(host, port))
+            started.set()
+            self.loop.run_forever()
+        self.thread = threading.Thread(target=serve, daemon=True)
+        self.thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop(self):
+        """ Stops a server started via `start_in_thread()`. """
+        if self.loop is not None:
+            asyncio.run_coroutine_threadsafe(self.runner.cleanup(), self.loop).result()
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join()
+            self.loop.close()
+            self.loop, self.thread = None, None
+
+    def __enter__(self):
+        self.start_in_thread()
+        return self
+
+    def __exit__(self, *_):
+        self.stop()
+
+def main():
+    """ Runs the mock server based on command-line options. """
+    parser = argparse.ArgumentParser(description="serve mock court websites for offline crawling and benchmarks")
+    parser.add_argument("--host", default="127.0.0.1", help="host to bind to")
+    parser.add_argument("--port", type=int, default=8080, help="port to bind to")
+    parser.add_argument("--judgments", type=int, default=200, help="number of judgments per court")
+    parser.add_argument("--latency", type=float, default=0.0, help="delay added to every response, in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="maximum random delay over the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with HTTP 500")
+    parser.add_argument("--junk-rate", type=float, default=0.0,
+                        help="fraction of document requests answered with an HTML page")
+    parser.add_argument("--duplicate-url-rate", type=float, default=0.0,
+                        help="fraction of judgments sharing the document path of an earlier judgment")
+    parser.add_argument("--duplicate-content-rate", type=float, default=0.0,
+                        help="fraction of judgments sharing the document content of an earlier judgment")
+    parser.add_argument("--sc-result-cap", type=int, default=None, help="maximum results per SC search")
+    parser.add_argument("--captcha-uses", type=int, default=None, help="number of searches per captcha")
+    parser.add_argument("--fixtures", default=None, help="directory of recorded responses to serve")
+    parser.add_argument("--seed", type=int, default=0, help="seed for generated content and faults")
+
+    args = parser.parse_args()
+
+    server = MockCourtServer(
+        judgments=args.judgments, latency=args.latency, jitter=args.jitter,
+        error_rate=args.error_rate, junk_rate=args.junk_rate,
+        duplicate_url_rate=args.duplicate_url_rate, duplicate_content_rate=args.duplicate_content_rate,
+        sc_result_cap=args.sc_result_cap, captcha_uses=args.captcha_uses,
+        fixtures_dir=args.fixtures, seed=args.seed
+    )
+    web.run_app(server.make_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+"""
+Helpers to synthesize judgment-like content (case details, paragraphs and PDF documents)
+for offline testing and benchmarking of the pipeline.
+"""
+
+import random
+import datetime
+
+WORDS = (
+    "the", "petitioner", "respondent", "court", "trade", "mark", "patent", "design", "infringement",
+    "plaintiff", "defendant", "section", "act", "order", "appeal", "learned", "counsel", "submitted",
+    "that", "of", "and", "in", "is", "was", "has", "been", "by", "on", "for", "with", "under", "copyright",
+    "licence", "agreement", "registration", "goods", "services", "deceptively", "similar", "passing", "off",
+    "injunction", "relief", "evidence", "judgment", "honourable", "bench", "held", "therefore", "dismissed",
+    "allowed", "suit", "claim", "prior", "user", "proprietor", "application", "opposition", "rectification"
+)
+
+PARTIES = (
+    "M/S ACME PHARMACEUTICALS LTD.", "UNION OF INDIA", "TELEFONAKTIEBOLAGET LM ERICSSON",
+    "INTEX TECHNOLOGIES (INDIA) LTD.", "ITC LIMITED", "REGISTRAR OF TRADE MARKS", "KAL RADIO LIMITED",
+    "PREETHI KITCHEN APPLIANCES PVT. LTD.", "SARINE TECHNOLOGIES LIMITED", "N. RANGA RAO AND SONS PRIVATE LTD."
+)
+
+CASE_TYPES = ( "CS(COMM)", "C.A.(COMM.IPD-TM)", "FAO(OS)", "W.P.(C)", "RFA", "CRL.M.C." )
+
+def make_sentence(rng: random.Random, min_words=6, max_words=24):
+    """ Generates a pseudo-legal sentence of random words. """
+    return ' '.join(rng.choices(WORDS, k=rng.randint(min_words, max_words))).capitalize() + '.'
+
+def make_paragraphs(rng: random.Random, count=20, min_sents=1, max_sents=6):
+    """ Generates a list of paragraph texts, without paragraph numbers. """
+    return [
+        ' '.join(make_sentence(rng) for _ in range(rng.randint(min_sents, max_sents)))
+        for _ in range(count)
+    ]
+
+def make_case(rng: random.Random, index, date: datetime.date):
+    """ Generates case details for a judgment.
+
+    Returns:
+        dict: Case number, title and date for the judgment.
+    """
+    petitioner, respondent = rng.sample(PARTIES, 2)
+    return {
+        'case_number': f"{rng.choice(CASE_TYPES)} {index}/{date.year}",
+        'title'      : f"{petitioner} VS {respondent}",
+        'date'       : date
+    }
+
+def format_date(date_object: datetime.date, sep='-'):
+    """ Formats a date in DD-MM-YYYY format. """
+    return date_object.strftime(f"%d{sep}%m{sep}%Y")
+
+def make_judgments(court, count, end_date: datetime.date, duplicate_url_rate=0.0, duplicate_content_rate=0.0, seed=0):
+    """ Generates judgment entries for a court, ordered from the latest to the oldest.
+
+    Args:
+        court (str): Court to generate judgments for, which decides the layout of document paths.
+        count (int): Number of judgments to generate.
+        end_date (datetime.date): Date of the latest judgment.
+        duplicate_url_rate (float, optional): Fraction of judgments referring to the document of an
+            earlier judgment, through the same path with a different ID. Defaults to 0.
+        duplicate_content_rate (float, optional): Fraction of judgments with a distinct document
+            path but the same content as the document of an earlier judgment. Defaults to 0.
+        seed (int, optional): Seed for the generated entries. Defaults to 0.
+
+    Returns:
+        list[dict]: Case details along with the document `path`, the `content_key`
+            deciding the document content, and a per-entry `id`.
+    """
+    rng, judgments = random.Random(f"{seed}-{court}"), []
+    date = end_date
+    for index in range(count):
+        case = make_case(rng, index + 1, date)
+        if court == 'SC':
+            path = f"supremecourt/{date.year}/{index}/{index}_{date.year}_Judgement_{format_date(date)}.pdf"
+        else:
+            path = f"dhc/MCK/judgement/{format_date(date)}//MCK{format_date(date, '')}{index}_{index:06d}.pdf"
+        judgment = { **case, 'path': path, 'content_key': path, 'id': f"{rng.randrange(10**9)}_{index}" }
+        if judgments and rng.random() < duplicate_url_rate:
+            original = rng.choice(judgments)
+            judgment.update(path=original['path'], content_key=original['content_key'])
+        elif judgments and rng.random() < duplicate_content_rate:
+            judgment['content_key'] = rng.choice(judgments)['content_key']
+        judgments.append(judgment)
+        if rng.random() < 0.4:
+            date -= datetime.timedelta(days=rng.randint(1, 3))
+    return judgments
+
+def make_document_paragraphs(content_key, paragraphs=(10, 40), sentences=(1, 6)):
+    """ Generates the paragraphs of a document, deterministically for a content key.
+
+    Args:
+        content_key (str): Key deciding the content. Equal keys give equal paragraphs.
+        paragraphs (tuple[int, int], optional): Range of paragraph counts. Defaults to (10, 40).
+        sentences (tuple[int, int], optional): Range of sentence counts per paragraph. Defaults to (1, 6).
+
+    Returns:
+        list[str]: Paragraph texts, without paragraph numbers.
+    """
+    rng = random.Random(content_key)
+    return make_paragraphs(rng, rng.randint(*paragraphs), *sentences)
+
+def wrap(text, width=90):
+    """ Wraps text into lines of at most `width` characters, breaking only at spaces.
+        A faster alternative to `textwrap.wrap` for generated text, which has no long words. """
+    lines, line, length = [], [], -1
+    for word in text.split(' '):
+        if length + len(word) + 1 > width and line:
+            lines.append(' '.join(line))
+            line, length = [], -1
+        line.append(word)
+        length += len(word) + 1
+    if line:
+        lines.append(' '.join(line))
+    return lines
+
+def layout_pages(title, paragraphs, width=90, lines_per_page=48):
+    """ Lays out numbered paragraphs as lines of text over pages.
+
+    Returns:
+        list[list[str]]: Lines of text for every page.
+    """
+    lines = [ title, "" ]
+    for number, paragraph in enumerate(paragraphs, 1):
+        lines.extend(wrap(f"{number}. {paragraph}", width))
+        lines.append("")
+    return [ lines[i:i+lines_per_page] for i in range(0, len(lines), lines_per_page) ] or [ [] ]
+
+def _escape_pdf_text(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)').encode('latin-1', 'replace')
+
+def make_pdf(pages):
+    """ Builds a minimal, valid PDF document with text laid out as given.
+
+    Args:
+        pages (list[list[str]]): Lines of text for every page.
+
+    Returns:
+        bytes: The PDF document.
+    """
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_refs = []
+    for lines in pages:
+        stream = b"BT /F1 10 Tf 12 TL 50 800 Td " + b"".join(
+            b"(" + _escape_pdf_text(line) + b") Tj T* " for line in lines
+        ) + b"ET"
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % len(objects)
+        )
+        page_refs.append(b"%d 0 R" % len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(page_refs), len(page_refs))
+
+    document, offsets = bytearray(b"%PDF-1.4\n"), []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(document))
+        document += b"%d 0 obj\n%s\nendobj\n" % (number, obj)
+    xref_offset = len(document)
+    document += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    document += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    document += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    return bytes(document)
+
+def make_text(pages):
+    """ Renders pages of text the way pdfminer extracts them, with form feeds between pages. """
+    return ''.join('\n'.join(lines) + '\n\n\f' for lines in pages)
+
+def make_structured_data(title, paragraphs, lines_per_page=48, width=90):
+    """ Builds a document in the layout of the structured data returned by the Adobe PDF Services API.
+
+    Args:
+        title (str): Title of the document, emitted as a heading.
+        paragraphs (list[str]): Paragraph texts, without paragraph numbers.
+        lines_per_page (int, optional): Lines per page, used to assign (0-based) pages to elements. Defaults to 48.
+        width (int, optional): Width of a line, in characters. Defaults to 90.
+
+    Returns:
+        dict: The structured data, with `elements` and `extended_metadata`.
+    """
+    elements = [ { 'Path': "//Document/H1", 'Page': 0, 'Text': title + ' ' } ]
+    line = 2
+    for number, paragraph in enumerate(paragraphs, 1):
+        elements.append({
+            'Path': f"//Document/P[{number}]" if number > 1 else "//Document/P",
+            'Page': line // lines_per_page,
+            'Text': f"{number}. {paragraph} "
+        })
+        line += len(wrap(f"{number}. {paragraph}", width)) + 1
+    return {
+        'version': { 'json_export': "161", 'page_segmentation': "1", 'schema': "1.0.0", 'structure': "1.0.0" },
+        'extended_metadata': { 'ID_instance': "", 'ID_permanent': "", 'pdf_version': "1.4",
+                               'pdfa_compliance_level': "", 'is_encrypted': False, 'has_acroform': False,
+                               'is_digitally_signed': False, 'pdfua_compliance_level': "",
+                               'page_count': (line - 1) // lines_per_page + 1, 'has_embedded_files': False,
+                               'is_certified': False, 'is_XFA': False, 'language': "en" },
+        'elements': elements,
+        'pages': []
+    }
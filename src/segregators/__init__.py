@@ -1,13 +1,22 @@
 from .. import logger as root_logger
 logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
+# pylint: disable-next=wrong-import-position
+from ..registry import lazy_exports
+# pylint: disable-next=wrong-import-position
 from .base import Segregator
-from .adobe_json import AdobeJSONSegregator
+
+# Segregators are imported on first access.
+__getattr__ = lazy_exports(__name__, {
+    'AdobeJSONSegregator': '.adobe_json',
+    'TextSegregator'     : '.text'
+})
 
 __version__ = "1.0.0"
 __author__  = "Kinshuk Vasisht"
 __all__     = [
     "Segregator",
     "AdobeJSONSegregator",
+    "TextSegregator",
     "logger"
 ]
\ No newline at end of file
@@ -1,63 +1,94 @@
-import json
 import regex
 
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from .. import utils
+from . import logger as root_logger
 from .base import Segregator
 
+logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
+
 class AdobeJSONSegregator(Segregator):
     """ Segregator to segregate paragraphs from Adobe's API JSON results """
 
+    # Errors raised when structured data is truncated or malformed, as noticed while streaming it.
+    MALFORMED_DATA_ERRORS = ( ValueError, EOFError, KeyError, TypeError, *( ( ijson.JSONError, ) if ijson else () ) )
+
     @classmethod
     def select(cls, files):
         for file in files:
-            if file.endswith('.json'):
+            if utils.fs.split_compression(file)[0].endswith('.json'):
                 return file
 
     @classmethod
     def load(cls, file_path):
+        """ Loads structured data from a file, streaming the elements one at a time as they are parsed,
+            so that memory use does not grow with the size of the document. The elements can be iterated once. """
         if file_path is None:
             return None
-        with open(file_path, 'r', encoding='utf-8') as file:
-            return json.load(file)
+        return { 'elements': cls.iter_elements(file_path) }
+
+    @staticmethod
+    def iter_elements(file_path):
+        """ Yields the elements from a file of structured data, parsed incrementally. """
+        if ijson is not None:
+            with utils.fs.open_file(file_path, 'rb') as file:
+                yield from ijson.items(file, 'elements.item', use_float=True)
+        else:
+            with utils.fs.open_file(file_path, 'r', encoding='utf-8') as file:
+                yield from utils.fs.iter_json_array(file, 'elements')
+
+    @classmethod
+    def segregate_file(cls, file):
+        """ Segregates paragraphs from a file of structured data. As the file is parsed while paragraphs are
+            segregated, files found to be malformed partway are logged and yield no paragraphs at all. """
+        if not isinstance(file, str):
+            file = cls.select(file)
+        try:
+            return [ *cls.segregate(cls.load(file)) ]
+        except cls.MALFORMED_DATA_ERRORS:
+            logger.exception("%s: malformed structured data, skipping", file)
+            return []
 
     @classmethod
     def segregate(cls, data):
         if data is None: return
-        try:
-            elements = data['elements']
-            current_page, para_num, page_start, valid_content = 0, 1, 0, False
-            extended_para_starter_regex = regex.compile(r"(?ui)^\p{Z}*((?:\p{N}+\p{Z}*\.)+)")
-            paragraph_starter_regex = regex.compile(r"(?ui)^\p{Z}*\p{N}+\p{Z}*\.")
-            header_path_regex       = regex.compile(r"(?u)\/H\d+")
-            content = []
-
-            for element in elements:
-                if 'Text' in element:
-                    if 'Table' in element['Path']:
-                        # TODO: Decide how to deal with text elements from tables.
-                        continue
-                    is_paragraph_starter = paragraph_starter_regex.match(element['Text'])
-                    is_heading           = header_path_regex.search(element['Path'])
-                    if element['Page'] != current_page and (is_heading or is_paragraph_starter):
-                        current_page = element['Page']
-                    if is_paragraph_starter:
-                        if len(content) > 0:
-                            para_ref = None
-                            if match := extended_para_starter_regex.search(content[0]):
-                                para_ref = para_ref = regex.sub(r"(?ui)\p{Z}+", "", match[1])
-                                content[0] = content[0][:match.start()] + content[0][match.end():]
-                            yield {
-                                # Add +1 to page, as Adobe JSON result uses 0-based indexing.
-                                'page': page_start + 1,
-                                'paragraph_number': para_num,
-                                'content': ' '.join(content).strip(),
-                                'reference': para_ref
-                            }
-                            para_num += 1
-                        if not valid_content:
-                            valid_content = True
-                        content.clear()
-                        page_start = current_page
-                    if not is_heading and valid_content:
-                        content.append(element['Text'])
-        except:
-            return
+        elements = data['elements']
+        current_page, para_num, page_start, valid_content = 0, 1, 0, False
+        extended_para_starter_regex = regex.compile(r"(?ui)^\p{Z}*((?:\p{N}+\p{Z}*\.)+)")
+        paragraph_starter_regex = regex.compile(r"(?ui)^\p{Z}*\p{N}+\p{Z}*\.")
+        header_path_regex       = regex.compile(r"(?u)\/H\d+")
+        content = []
+
+        for element in elements:
+            if 'Text' in element:
+                if 'Table' in element['Path']:
+                    # TODO: Decide how to deal with text elements from tables.
+                    continue
+                is_paragraph_starter = paragraph_starter_regex.match(element['Text'])
+                is_heading           = header_path_regex.search(element['Path'])
+                if element['Page'] != current_page and (is_heading or is_paragraph_starter):
+                    current_page = element['Page']
+                if is_paragraph_starter:
+                    if len(content) > 0:
+                        para_ref = None
+                        if match := extended_para_starter_regex.search(content[0]):
+                            para_ref = para_ref = regex.sub(r"(?ui)\p{Z}+", "", match[1])
+                            content[0] = content[0][:match.start()] + content[0][match.end():]
+                        yield {
+                            # Add +1 to page, as Adobe JSON result uses 0-based indexing.
+                            'page': page_start + 1,
+                            'paragraph_number': para_num,
+                            'content': ' '.join(content).strip(),
+                            'reference': para_ref
+                        }
+                        para_num += 1
+                    if not valid_content:
+                        valid_content = True
+                    content.clear()
+                    page_start = current_page
+                if not is_heading and valid_content:
+                    content.append(element['Text'])
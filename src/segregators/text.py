@@ -0,0 +1,84 @@
+import re
+
+from .. import utils
+from .base import Segregator
+
+class TextSegregator(Segregator):
+    """ Segregator to segregate paragraphs from plain text extractions (such as from pdfminer or Parsr).
+        Pages are expected to be separated by form feeds, and paragraphs to begin on a new line with
+        their number (such as '12.' or '3.1.'). """
+
+    # Number of characters to read from a file at a time.
+    BLOCK_SIZE = 2**20
+    # Largest step between the numbers of consecutive paragraphs, tolerating paragraphs lost in extraction.
+    MAX_NUMBER_STEP = 3
+
+    # Matches the number at the start of a paragraph, such as '12.' or '3. 1.'.
+    paragraph_starter_regex = re.compile(r"^\s*((?:\d+[^\S\n]*\.)+)(?=\s|$)")
+    # Matches lines to leave out of paragraphs, such as bare page numbers.
+    noise_regex             = re.compile(r"^\s*(?:\d+|page\s+\d+(?:\s+of\s+\d+)?)\s*$", re.IGNORECASE)
+    whitespace_regex        = re.compile(r"\s+")
+
+    @classmethod
+    def select(cls, files):
+        for file in files or ():
+            if utils.fs.split_compression(file)[0].endswith('.txt'):
+                return file
+
+    @classmethod
+    def load(cls, file_path):
+        """ Loads lines of text from a file, reading it in large blocks as the lines are consumed. """
+        if file_path is None:
+            return None
+        return cls.iter_lines(file_path)
+
+    @classmethod
+    def iter_lines(cls, file_path):
+        """ Yields the lines from a file, without line terminators. Form feeds are retained. """
+        with utils.fs.open_file(file_path, 'r', encoding='utf-8') as file:
+            remainder = ''
+            while block := file.read(cls.BLOCK_SIZE):
+                lines = (remainder + block).split('\n')
+                remainder = lines.pop()
+                yield from lines
+            if remainder:
+                yield remainder
+
+    @classmethod
+    def segregate(cls, data):
+        if data is None: return
+        current_page, para_num, page_start, para_ref, last_number = 1, 1, 1, None, 0
+        content = []
+
+        for line in data:
+            if '\f' in line:
+                current_page += line.count('\f')
+                line = line.replace('\f', '')
+            if match := cls.paragraph_starter_regex.match(line):
+                reference = cls.whitespace_regex.sub('', match[1])
+                number    = int(reference.split('.', maxsplit=1)[0])
+                # Only numbers following that of the current paragraph (or sub-paragraphs of it) begin paragraphs.
+                # Others are taken to be lists within it, or numbers wrapped onto a new line (such as years).
+                if last_number < number <= last_number + cls.MAX_NUMBER_STEP or \
+                        (number == last_number and reference.count('.') > 1):
+                    if para_ref is not None:
+                        yield {
+                            'page': page_start,
+                            'paragraph_number': para_num,
+                            'content': ' '.join(content),
+                            'reference': para_ref
+                        }
+                        para_num += 1
+                    content.clear()
+                    para_ref, last_number, page_start = reference, number, current_page
+                    line = line[match.end():]
+            if para_ref is not None and line.strip() and not cls.noise_regex.match(line):
+                content.append(line.strip())
+
+        if para_ref is not None:
+            yield {
+                'page': page_start,
+                'paragraph_number': para_num,
+                'content': ' '.join(content),
+                'reference': para_ref
+            }
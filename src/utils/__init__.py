@@ -2,11 +2,12 @@ import timeit
 import logging
 import threading
 import functools
+from urllib.parse import urlencode, urlparse, urlunparse, parse_qs
 
 from .. import logger as root_logger
 _logger = root_logger.getChild(__name__.rsplit('.', maxsplit=1)[-1])
 
-from . import fs
+from . import fs, executors
 from .progress import ProgressBar, IndeterminateProgressCycle, ProgressBarManager
 
 def constrain(string, width=30):
@@ -80,6 +81,22 @@ def iter_progress(iterable):
         yield value
         progress_callback()
 
+def remove_query_param(url, key):
+    """ Removes a key from the query segment of a URL.
+
+    Args:
+        url (str): The URL to remove from.
+        key (str): The key to remove.
+
+    Returns:
+        str: The new URL with the reduced query segment.
+    """
+    url_res = urlparse(url)
+    query = parse_qs(url_res.query, keep_blank_values=True)
+    query.pop(key, None)
+    url_res = url_res._replace(query=urlencode(query, True))
+    return urlunparse(url_res)
+
 def merge_dicts(dict1, dict2):
     """ Merges two dictionaries into one, extending the keys upon clash. """
     merged_dict = dict1.copy()
@@ -162,6 +179,7 @@ __version__ = "1.0.0"
 __author__  = "Kinshuk Vasisht"
 __all__     = [
     "fs",
+    "executors",
     "ProgressBar",
     "ProgressBarManager",
     "IndeterminateProgressCycle",
@@ -171,5 +189,6 @@ __all__     = [
     "show_indeterminate_progress",
     "iter_progress",
     "as_list",
+    "remove_query_param",
     "Pipeline"
 ]
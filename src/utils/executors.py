@@ -0,0 +1,183 @@
+"""
+    Provides pipeline-wide executors, shared by all phases instead of short-lived per-task pools.
+"""
+
+import os
+import time
+import threading
+import concurrent.futures
+
+# Executors known to the registry, as the kind of pool and its default size.
+EXECUTOR_KINDS = {
+    # Threads for disk and other blocking I/O, and for work sharing in-process state.
+    'io' : ( concurrent.futures.ThreadPoolExecutor , min(32, (os.cpu_count() or 1) + 4) ),
+    # Processes for CPU-bound work.
+    'cpu': ( concurrent.futures.ProcessPoolExecutor, os.cpu_count() or 1 ),
+    # Threads for calls to external services, such as extraction APIs.
+    'api': ( concurrent.futures.ThreadPoolExecutor , 8 ),
+    # Threads for requests issued ahead of use, such as searches for upcoming result pages.
+    'prefetch': ( concurrent.futures.ThreadPoolExecutor, 4 ),
+    # Threads for tokens fetched ahead of use, such as captchas. Kept apart from prefetched requests,
+    # which may wait on tokens, so that those requests can never occupy the workers fetching them.
+    'tokens': ( concurrent.futures.ThreadPoolExecutor, 2 ),
+}
+
+# Name of the executor the current thread is a worker of, if any.
+_worker = threading.local()
+
+def current_executor():
+    """ Returns the name of the executor the current thread is a worker of, or None. """
+    return getattr(_worker, 'name', None)
+
+def _timed_call(name, function, *args, **kwargs):
+    """ Runs a function as a worker of the named executor, returning the start time along with the result. """
+    _worker.name, started = name, time.time()
+    try:
+        return started, function(*args, **kwargs)
+    finally:
+        _worker.name = None
+
+class InstrumentedExecutor(concurrent.futures.Executor):
+    """ Executor wrapping a thread or process pool, recording the depth of its queue and its utilisation.
+        Mapping over the executor from a worker of any shared executor runs inline, so that pools never
+        nest: waiting on tasks queued behind the calling worker could otherwise deadlock a fully occupied pool. """
+
+    def __init__(self, name, executor: concurrent.futures.Executor, workers) -> None:
+        """ Initializes the executor.
+
+        Args:
+            name (str): Name of the executor, as registered.
+            executor (concurrent.futures.Executor): The underlying pool.
+            workers (int): Number of workers of the pool.
+        """
+        self.name     = name
+        self.executor = executor
+        self.workers  = workers
+        self.created  = time.time()
+        self.lock     = threading.Lock()
+        self.stats    = dict(submitted=0, completed=0, failed=0, pending=0, peak_pending=0,
+                             wait_time=0.0, busy_time=0.0)
+
+    def submit(self, fn, /, *args, **kwargs):
+        submitted = time.time()
+        future    = concurrent.futures.Future()
+        inner     = self.executor.submit(_timed_call, self.name, fn, *args, **kwargs)
+        with self.lock:
+            self.stats['submitted'] += 1
+            self.stats['pending']   += 1
+            self.stats['peak_pending'] = max(self.stats['peak_pending'], self.stats['pending'])
+
+        def complete(inner: concurrent.futures.Future):
+            finished = time.time()
+            with self.lock:
+                self.stats['pending'] -= 1
+                if inner.cancelled() or inner.exception() is not None:
+                    self.stats['failed'] += 1
+                else:
+                    self.stats['completed'] += 1
+                    started = inner.result()[0]
+                    self.stats['wait_time'] += max(started - submitted, 0.0)
+                    self.stats['busy_time'] += max(finished - started, 0.0)
+            if not future.set_running_or_notify_cancel():
+                return
+            if inner.cancelled():
+                future.set_exception(concurrent.futures.CancelledError())
+            elif (exc := inner.exception()) is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(inner.result()[1])
+
+        future.add_done_callback(lambda future: future.cancelled() and inner.cancel())
+        inner.add_done_callback(complete)
+        return future
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        if current_executor() is not None:
+            return map(fn, *iterables)
+        return super().map(fn, *iterables, timeout=timeout, chunksize=chunksize)
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.executor.shutdown(wait=wait, cancel_futures=cancel_futures)
+
+    def metrics(self):
+        """ Returns statistics for the executor, with the average queueing delay and utilisation of workers.
+
+        Returns:
+            dict: Counts of submitted, completed, failed and pending tasks, the peak queue depth,
+                the average wait in the queue (in seconds) and the fraction of worker time spent busy.
+        """
+        with self.lock:
+            stats   = dict(self.stats)
+        elapsed = max(time.time() - self.created, 1e-9)
+        return {
+            'workers'    : self.workers,
+            **{ key: stats[key] for key in ( 'submitted', 'completed', 'failed', 'pending', 'peak_pending' ) },
+            'avg_wait'   : stats['wait_time'] / stats['completed'] if stats['completed'] else 0.0,
+            'utilisation': min(stats['busy_time'] / (elapsed * self.workers), 1.0)
+        }
+
+class ExecutorRegistry:
+    """ Registry of named executors shared across the pipeline, created when first used. """
+
+    def __init__(self, sizes: dict = None) -> None:
+        """ Initializes the registry.
+
+        Args:
+            sizes (dict[str, int], optional): Number of workers per executor, keyed by name.
+                Defaults to the sizes in `EXECUTOR_KINDS`.
+        """
+        self.sizes        = { name: size for name, ( _, size ) in EXECUTOR_KINDS.items() }
+        self.initializers = {}
+        self.executors    = {}
+        self.lock      = threading.Lock()
+        self.configure(**(sizes or {}))
+
+    def configure(self, initializers: dict = None, **sizes):
+        """ Sets the number of workers and the initializers for executors, effective for executors created afterwards.
+
+        Args:
+            initializers (dict[str, tuple], optional): Callable and arguments run once by every worker
+                when started, keyed by executor name. Initializers given as None are removed.
+            **sizes: Number of workers, keyed by executor name. Sizes given as None are left unchanged.
+        """
+        for name in ( *(initializers or {}), *sizes ):
+            if name not in EXECUTOR_KINDS:
+                raise KeyError(f"unknown executor: {name}")
+        for name, initializer in (initializers or {}).items():
+            if initializer is None:
+                self.initializers.pop(name, None)
+            else:
+                self.initializers[name] = initializer
+        for name, size in sizes.items():
+            if size is not None:
+                self.sizes[name] = max(int(size), 1)
+
+    def get(self, name) -> InstrumentedExecutor:
+        """ Returns the named executor, creating it if not running. """
+        with self.lock:
+            if name not in self.executors:
+                pool_class, _ = EXECUTOR_KINDS[name]
+                options = { 'thread_name_prefix': f"{name}-executor" } \
+                    if pool_class is concurrent.futures.ThreadPoolExecutor else {}
+                if name in self.initializers:
+                    options['initializer'], options['initargs'] = self.initializers[name]
+                self.executors[name] = InstrumentedExecutor(
+                    name, pool_class(self.sizes[name], **options), self.sizes[name]
+                )
+            return self.executors[name]
+
+    def metrics(self):
+        """ Returns the metrics of running executors, keyed by name. """
+        with self.lock:
+            executors = dict(self.executors)
+        return { name: executor.metrics() for name, executor in executors.items() }
+
+    def shutdown(self, wait=True):
+        """ Shuts down all running executors. Executors are created afresh if used again. """
+        with self.lock:
+            executors, self.executors = self.executors, {}
+        for executor in executors.values():
+            executor.shutdown(wait=wait)
+
+# Executors shared by the pipeline.
+EXECUTORS = ExecutorRegistry()
@@ -2,19 +2,370 @@
     Provides filesystem and IO-specific functions.
 """
 
+import os
 import re
+import gzip
 import json
+import shutil
+import struct
+import hashlib
+import threading
+
+# File extensions of supported compression formats.
+COMPRESSION_EXTENSIONS = {
+    'gzip': '.gz',
+    'zstd': '.zst'
+}
 
 def read_json(file_path):
     """ Loads data from a JSON file. """
     with open(file_path, 'r+', encoding='utf-8') as file:
         return json.load(file)
 
-def write_json(file_path, data):
-    """ Dumps data to a JSON file. """
+def write_json(file_path, data, compact=False):
+    """ Dumps data to a JSON file. If compact, the data is written without indentation. """
     with open(file_path, 'w+', encoding='utf-8') as file:
-        json.dump(data, file, indent=4, ensure_ascii=False)
+        if compact:
+            json.dump(data, file, ensure_ascii=False, separators=(',', ':'))
+        else:
+            json.dump(data, file, indent=4, ensure_ascii=False)
+
+def split_compression(path):
+    """ Splits the extension of a compression format from a path.
+
+    Returns:
+        tuple[str, str | None]: The path without the compression extension, and the format (None if uncompressed).
+    """
+    for compression, extension in COMPRESSION_EXTENSIONS.items():
+        if path.endswith(extension):
+            return path[:-len(extension)], compression
+    return path, None
+
+def with_compression(path, compression=None):
+    """ Returns the path of a file compressed in a given format (or the path itself if uncompressed). """
+    return path + COMPRESSION_EXTENSIONS[compression] if compression else path
+
+def find_variant(path):
+    """ Returns the path of an existing file for a path, as is or compressed in any supported format,
+        or None if no such file exists. """
+    base, _ = split_compression(path)
+    for variant in ( path, base, *( base + extension for extension in COMPRESSION_EXTENSIONS.values() ) ):
+        if os.path.exists(variant):
+            return variant
+    return None
+
+def open_file(path, mode='rb', encoding=None, compression=None):
+    """ Opens a file, transparently (de)compressing it as a stream if compressed.
+
+    Args:
+        path (str): Path of the file to open.
+        mode (str, optional): Mode to open the file in, as for `open`. Defaults to 'rb'.
+        encoding (str, optional): Encoding for text modes. Defaults to None.
+        compression (str, optional): Compression format, one of `COMPRESSION_EXTENSIONS`.
+            Defaults to None, which infers the format from the file extension.
+
+    Returns:
+        IO: The file object.
+    """
+    compression = compression or split_compression(path)[1]
+    if 'b' not in mode and 't' not in mode and compression:
+        mode += 't'
+    if compression == 'gzip':
+        return gzip.open(path, mode, encoding=encoding)
+    if compression == 'zstd':
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            import zstandard
+        except ImportError as exc:
+            raise ImportError("zstd compression requires the 'zstandard' package") from exc
+        return zstandard.open(path, mode, encoding=encoding)
+    return open(path, mode, encoding=encoding) # pylint: disable=consider-using-with,unspecified-encoding
+
+def content_size(path):
+    """ Returns the size of the content of a file, uncompressed if the file is compressed.
+        The size is read from the trailer of a (single-member) gzip file, modulo 4 GiB, or from the header
+        of a zstd frame if recorded there, and the file is decompressed to measure it otherwise. """
+    compression = split_compression(path)[1]
+    if compression is None:
+        return os.stat(path).st_size
+    if compression == 'gzip':
+        with open(path, 'rb') as file:
+            if file.seek(0, os.SEEK_END) >= 18:
+                file.seek(-4, os.SEEK_END)
+                return struct.unpack('<I', file.read(4))[0]
+    elif compression == 'zstd':
+        try:
+            # pylint: disable-next=import-outside-toplevel
+            import zstandard
+        except ImportError as exc:
+            raise ImportError("zstd compression requires the 'zstandard' package") from exc
+        with open(path, 'rb') as file:
+            # Frame headers span at most 18 bytes.
+            header = file.read(18)
+        try:
+            if (size := zstandard.frame_content_size(header)) >= 0:
+                return size
+        except zstandard.ZstdError:
+            pass
+    size = 0
+    with open_file(path, 'rb') as file:
+        while chunk := file.read(2**16):
+            size += len(chunk)
+    return size
+
+def iter_json_array(file, key, chunk_size=2**16):
+    """ Yields the items of an array under a top-level key of a JSON object, parsing the file incrementally.
+        Only the item being parsed (and other top-level values, when skipped) is held in memory.
+
+    Args:
+        file (IO): File object opened in text mode, positioned at the start of the JSON object.
+        key (str): Key of the array to stream items from.
+        chunk_size (int, optional): Number of characters to read at a time. Defaults to 64 KiB.
+
+    Raises:
+        ValueError: If the file does not contain a JSON object, or the value under the key is not an array.
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r'[ \t\n\r]*')
+    buffer, pos, eof = '', 0, False
+
+    def fill(size=chunk_size):
+        nonlocal buffer, pos, eof
+        chunk = file.read(size)
+        buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+        return not eof
+
+    def peek():
+        nonlocal pos
+        while True:
+            pos = whitespace.match(buffer, pos).end()
+            if pos < len(buffer): return buffer[pos]
+            if not fill(): raise ValueError("unexpected end of JSON data")
+
+    def expect(token):
+        nonlocal pos
+        if peek() != token:
+            raise ValueError(f"expected {token!r} at {buffer[pos:pos+20]!r}")
+        pos += 1
+
+    def decode():
+        nonlocal pos
+        peek()
+        size = chunk_size
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A value ending with the buffer may be incomplete (such as a number), so read ahead first.
+                if end < len(buffer) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof: raise
+            # Read ahead geometrically, to avoid re-parsing large values once per chunk.
+            fill(size)
+            size *= 2
+
+    expect('{')
+    if peek() == '}': return
+    while True:
+        name = decode()
+        expect(':')
+        if name == key:
+            expect('[')
+            if peek() != ']':
+                while True:
+                    yield decode()
+                    if peek() != ',': break
+                    pos += 1
+            expect(']')
+            return
+        decode()
+        if peek() != ',': break
+        pos += 1
+    expect('}')
 
 def pathsafe(filename):
     """ Returns a santized, path-safe version of a filename. """
     return re.sub(r'[:/\\|*]', '-', re.sub(r'[?\"<>]', '', filename))
+
+class DocumentCache:
+    """ Write-back cache of JSON documents. Documents are loaded on first access,
+        modified in memory and written to disk when flushed or checkpointed. """
+
+    def __init__(self, compact=False, defer=False, eager=False) -> None:
+        """ Initializes a new, empty DocumentCache.
+
+        Args:
+            compact (bool, optional): If true, documents are serialized without indentation. Defaults to False.
+            defer (bool, optional): If true, checkpoints are skipped, and documents are held in memory
+                until flushed. Defaults to False.
+            eager (bool, optional): If true, documents are written at every checkpoint, instead of only
+                at final ones. Defaults to False.
+        """
+        self.compact   = compact
+        self.defer     = defer
+        self.eager     = eager
+        self.lock      = threading.RLock()
+        self.documents = {}
+        self.dirty     = set()
+
+    def get(self, file_path):
+        """ Returns the document stored at a path, loading it from disk if not already cached.
+
+        Args:
+            file_path (str): Path to the JSON document.
+
+        Returns:
+            any: The cached document.
+        """
+        key = os.path.normpath(file_path)
+        with self.lock:
+            if key not in self.documents:
+                self.documents[key] = read_json(file_path)
+            return self.documents[key]
+
+    def put(self, file_path, data):
+        """ Stores a document against a path, marking it for a write upon the next flush.
+
+        Args:
+            file_path (str): Path to the JSON document.
+            data (any): Document to store.
+        """
+        key = os.path.normpath(file_path)
+        with self.lock:
+            self.documents[key] = data
+            self.dirty.add(key)
+
+    def mark_dirty(self, file_path):
+        """ Marks a cached document as modified, to be written upon the next flush.
+
+        Args:
+            file_path (str): Path to the JSON document.
+        """
+        key = os.path.normpath(file_path)
+        with self.lock:
+            if key not in self.documents:
+                raise KeyError(f"document not cached: {file_path}")
+            self.dirty.add(key)
+
+    def is_dirty(self, file_path):
+        """ Checks whether a document has pending modifications. """
+        return os.path.normpath(file_path) in self.dirty
+
+    def flush(self, file_paths=None, evict=False):
+        """ Writes modified documents to disk.
+
+        Args:
+            file_paths (Iterable[str], optional): Paths of documents to write, used to checkpoint
+                specific documents. Defaults to None, which writes all modified documents.
+            evict (bool, optional): If true, flushed documents are also dropped from the cache. Defaults to False.
+
+        Returns:
+            int: The number of documents written.
+        """
+        with self.lock:
+            if file_paths is None:
+                keys = list(self.documents)
+            else:
+                keys = [ *map(os.path.normpath, file_paths) ]
+            written = 0
+            for key in keys:
+                if key in self.dirty:
+                    write_json(key, self.documents[key], compact=self.compact)
+                    self.dirty.discard(key)
+                    written += 1
+                if evict:
+                    self.documents.pop(key, None)
+            return written
+
+    def checkpoint(self, file_path, final=False):
+        """ Marks the point after which a document may be written. At final checkpoints, after which the document
+            is no longer modified, it is written if modified and dropped from the cache. Other checkpoints do
+            the same only for eager caches. Deferred caches skip checkpoints, writing documents when flushed.
+
+        Args:
+            file_path (str): Path to the JSON document.
+            final (bool, optional): If true, the document is not modified afterwards. Defaults to False.
+
+        Returns:
+            int: The number of documents written.
+        """
+        if self.defer or not (final or self.eager): return 0
+        return self.flush([ file_path ], evict=True)
+
+class ContentStore:
+    """ Content-addressed store of files. Every file is named by the digest of its content, under
+        directories named by prefixes of the digest (such as `ab/cd/abcd....pdf`), so that files with the
+        same content are stored once, and no directory grows too large to be listed quickly. """
+
+    def __init__(self, root, levels=2, width=2, algorithm='sha256') -> None:
+        """ Initializes the store over a root directory, created if missing.
+
+        Args:
+            root (str): Root directory of the store.
+            levels (int, optional): Number of directory levels to fan out files into. Defaults to 2.
+            width (int, optional): Number of digest characters naming a directory at each level. Defaults to 2.
+            algorithm (str, optional): Hash algorithm for digests, as supported by hashlib. Defaults to 'sha256'.
+        """
+        self.root      = root
+        self.levels    = levels
+        self.width     = width
+        self.algorithm = algorithm
+        self.lock      = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def digest(self, file_path, chunk_size=2**16):
+        """ Returns the hexadecimal digest of the contents of a file. """
+        hash_object = hashlib.new(self.algorithm)
+        with open(file_path, 'rb') as file:
+            while chunk := file.read(chunk_size):
+                hash_object.update(chunk)
+        return hash_object.hexdigest()
+
+    def directory_for(self, digest):
+        """ Returns the directory holding files with a given digest. """
+        return os.path.join(self.root, *(
+            digest[level * self.width:(level + 1) * self.width] for level in range(self.levels)
+        ))
+
+    def path_for(self, digest, extension=''):
+        """ Returns the path of the file with a given digest and extension in the store. """
+        return os.path.join(self.directory_for(digest), digest + extension)
+
+    def find(self, digest):
+        """ Returns the path of the file with a given digest, whatever its extension, or None if not stored. """
+        directory = self.directory_for(digest)
+        if os.path.isdir(directory):
+            for file_name in os.listdir(directory):
+                if os.path.splitext(file_name)[0] == digest:
+                    return os.path.join(directory, file_name)
+        return None
+
+    def glob(self, extension='*'):
+        """ Returns a glob pattern (relative to the root) matching stored files with an extension. """
+        return os.path.join(*( '?' * self.width for _ in range(self.levels) ), '*' + extension.lstrip('*'))
+
+    def add(self, file_path, move=True):
+        """ Adds a file to the store, keeping its extension.
+
+        Args:
+            file_path (str): Path of the file to add.
+            move (bool, optional): If true, the file is moved into the store, or removed if its
+                content is already stored. Otherwise, it is copied. Defaults to True.
+
+        Returns:
+            tuple[str, str, bool]: Path of the stored file, digest of its content, and whether it was newly added.
+        """
+        digest = self.digest(file_path)
+        target = self.path_for(digest, os.path.splitext(file_path)[1])
+        with self.lock:
+            if os.path.exists(target):
+                if move and os.path.abspath(file_path) != os.path.abspath(target):
+                    os.remove(file_path)
+                return target, digest, False
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if move:
+                shutil.move(file_path, target)
+            else:
+                shutil.copyfile(file_path, target)
+        return target, digest, True
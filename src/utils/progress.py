@@ -10,11 +10,14 @@ bars for representing progress across multiple threads or processes.
 
 """
 
+import typing
 import threading
-import multiprocessing.managers
 
 from math import floor
 
+if typing.TYPE_CHECKING:
+    import multiprocessing.managers
+
 class IndeterminateProgressCycle:
     """ Defines a single character progress cycle for indeterminate progress. """
 
@@ -101,7 +104,7 @@ class ProgressBar:
 class ProgressBarManager:
     """ Manager for synchonizing multiple progress bars spawned across multiple threads/processes. """
 
-    def __init__(self, size, process_manager: multiprocessing.managers.BaseManager = None) -> None:
+    def __init__(self, size, process_manager: 'multiprocessing.managers.BaseManager' = None) -> None:
         if process_manager is not None:
             self.lock = process_manager.Lock()
         else:
@@ -0,0 +1,191 @@
+"""
+Test suite for the filters applied over segregated paragraphs.
+"""
+
+import random
+
+import pytest
+
+from src.filters import analysis
+from src.filters.base import Filter
+from src.scripts import synthetic
+
+class WordCountFilter(Filter):
+    """ Filter accepting paragraphs with a minimum number of words, deciding paragraphs one by one. """
+
+    name = "word_count"
+
+    @classmethod
+    def get_option_list(cls):
+        return [ dict(name="min_words", default=20) ]
+
+    def refresh_state(self):
+        pass
+
+    def load(self, paragraph):
+        return len(paragraph.split())
+
+    def decision(self, paragraph_rep):
+        return paragraph_rep >= int(self.options['min_words'])
+
+class BatchWordCountFilter(WordCountFilter):
+    """ Filter accepting paragraphs with a minimum number of words, deciding a batch at once. """
+
+    def evaluate_batch(self, paragraphs):
+        min_words = int(self.options['min_words'])
+        return tuple(count >= min_words for count in map(len, map(str.split, paragraphs)))
+
+def has_nltk_data(*resources):
+    """ Returns true if the given NLTK resources are installed. """
+    nltk = pytest.importorskip("nltk")
+    try:
+        for resource in resources:
+            nltk.data.find(resource)
+        return True
+    except LookupError:
+        return False
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_evaluate_batch():
+    paragraphs = [
+        { 'content': paragraph } for paragraph in
+        synthetic.make_paragraphs(random.Random(0), count=200, min_sents=1, max_sents=4)
+    ]
+    filters = [ WordCountFilter(), BatchWordCountFilter() ]
+    for _filter in filters:
+        _filter.set_options({ 'min_words': 40 })
+
+    texts = [ paragraph['content'] for paragraph in paragraphs ]
+    assert list(filters[0].evaluate_batch(texts)) == list(filters[1].evaluate_batch(texts))
+
+    accepted = [ _filter.evaluate(paragraphs, value=lambda x: x['content']) for _filter in filters ]
+    assert accepted[0] == accepted[1] and 0 < len(accepted[0]) < len(paragraphs)
+    assert all(len(paragraph['content'].split()) >= 40 for paragraph in accepted[0])
+    assert filters[1].evaluate(iter(texts)) == [ paragraph['content'] for paragraph in accepted[1] ]
+
+    # Masks must be aligned with the paragraphs.
+    filters[1].evaluate_batch = lambda paragraphs: [ True ]
+    with pytest.raises(ValueError):
+        filters[1].evaluate(texts)
+
+class SharedWordCountFilter(WordCountFilter):
+    """ Filter accepting paragraphs with a minimum number of words, counted over shared tokens. """
+
+    artifacts = ( 'test_tokens', )
+
+    def load_analysis(self, analysis):
+        return len(analysis['test_tokens'])
+
+class LongWordFilter(SharedWordCountFilter):
+    """ Filter accepting paragraphs with a minimum number of long words, counted over shared tokens. """
+
+    name = "long_word_count"
+
+    def load_analysis(self, analysis):
+        return sum(len(token) > 8 for token in analysis['test_tokens'])
+
+@pytest.fixture
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def tokenizer_calls(monkeypatch):
+    calls = []
+    def tokenize(analysis):
+        calls.append(analysis.text)
+        return analysis.text.split()
+    monkeypatch.setitem(analysis.PRODUCERS, 'test_tokens', tokenize)
+    monkeypatch.setattr(analysis, 'ANALYSES', analysis.AnalysisCache())
+    monkeypatch.setattr("src.filters.base.ANALYSES", analysis.ANALYSES)
+    yield calls
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_shared_analysis(tokenizer_calls):
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=100, min_sents=1, max_sents=4)
+    paragraphs += paragraphs[:10]
+
+    filters = [ SharedWordCountFilter(), LongWordFilter() ]
+    for _filter in filters:
+        _filter.set_options({ 'min_words': 5 })
+    accepted = paragraphs
+    for _filter in filters:
+        accepted = _filter.evaluate(accepted)
+
+    # Every distinct paragraph is tokenized once, whatever the filter chain.
+    assert sorted(tokenizer_calls) == sorted(set(paragraphs))
+    assert accepted == [
+        paragraph for paragraph in paragraphs
+        if len(paragraph.split()) >= 5 and sum(len(word) > 8 for word in paragraph.split()) >= 5
+    ]
+    assert analysis.ANALYSES.stats['misses'] == len(set(paragraphs))
+
+    cache = analysis.AnalysisCache(max_entries=2)
+    for paragraph in paragraphs[:3]:
+        cache.analyze(paragraph)
+    assert len(cache.analyses) == 2 and cache.stats['evictions'] == 1
+
+@pytest.fixture
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def offline_nltk(monkeypatch):
+    nltk = pytest.importorskip("nltk")
+    # An untrained Punkt model splits sentences without the punkt data, for both sentences and words.
+    tokenizer = nltk.tokenize.punkt.PunktSentenceTokenizer()
+    word_tokenize = nltk.tokenize.word_tokenize
+    monkeypatch.setattr("src.filters.sent_count_filter.load_tokenizer", lambda path: tokenizer)
+    monkeypatch.setattr("src.filters.sent_count_filter.load_stopwords", lambda: frozenset((
+        "a", "an", "and", "as", "by", "for", "in", "is", "it", "of", "on", "the", "to", "was", "with"
+    )))
+    calls = []
+    def tokenize_words(text, language="english", preserve_line=False):
+        calls.append(( text, preserve_line ))
+        return [
+            token for sentence in ( [ text ] if preserve_line else tokenizer.tokenize(text) )
+            for token in word_tokenize(sentence, language, preserve_line=True)
+        ]
+    monkeypatch.setattr(nltk.tokenize, "word_tokenize", tokenize_words)
+    yield calls
+
+@pytest.mark.parametrize("min_sents,min_words", [ (3, 30), (2, 10), (5, 60) ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sent_count_fast_parity(offline_nltk, min_sents, min_words):
+    # pylint: disable-next=import-outside-toplevel
+    from src.filters.sent_count_filter import SentenceCountFilter
+
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=500, min_sents=1, max_sents=6)
+    paragraphs += [ "Mr. Smith's co-owner didn't sign 12.5% of it... Really?! \"Yes.\" (see S. 3)", "", "1." ]
+
+    filters = {}
+    for fast in ( False, True ):
+        filters[fast] = SentenceCountFilter()
+        filters[fast].set_options(dict(min_sents=min_sents, min_words=min_words, tokenizer_path=None, fast=fast))
+    for paragraph in paragraphs:
+        assert filters[True].decision(filters[True].load(paragraph)) == \
+            filters[False].decision(filters[False].load(paragraph))
+
+    # Counted in full, both modes tokenize sentences and words alike.
+    filters[True].min_sents = filters[True].min_words = 10**6
+    for paragraph in paragraphs:
+        offline_nltk.clear()
+        sentences, words = filters[False].load(paragraph)
+        full_calls = [ *offline_nltk ]
+        offline_nltk.clear()
+        assert filters[True].count(paragraph) == ( len(sentences), len(words) )
+        assert offline_nltk == full_calls
+
+@pytest.mark.skipif(
+    not has_nltk_data("tokenizers/punkt", "corpora/stopwords"),
+    reason="requires the NLTK punkt and stopwords data"
+)
+@pytest.mark.parametrize("min_sents,min_words", [ (3, 30), (2, 10), (5, 60) ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sent_count_fast(min_sents, min_words):
+    # pylint: disable-next=import-outside-toplevel
+    from src.filters.sent_count_filter import SentenceCountFilter
+
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=500, min_sents=1, max_sents=6)
+    paragraphs += [ "Mr. Smith's co-owner didn't sign 12.5% of it... Really?! \"Yes.\" (see S. 3)", "", "1." ]
+
+    decisions = []
+    for fast in ( False, True ):
+        _filter = SentenceCountFilter()
+        _filter.set_options(dict(min_sents=min_sents, min_words=min_words, tokenizer_path=None, fast=fast))
+        decisions.append([ _filter.decision(_filter.load(paragraph)) for paragraph in paragraphs ])
+
+    assert decisions[0] == decisions[1]
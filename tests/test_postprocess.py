@@ -0,0 +1,53 @@
+"""
+Test suite for the postprocessing stage of the pipeline.
+"""
+
+import os
+import argparse
+
+from src import utils, retrievers
+from src.pipeline import preprocess, postprocess
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_compact_merge_log(tmp_path):
+    json_file = os.path.join(tmp_path, "judgments.json")
+    utils.fs.write_json(json_file, { 'data': [
+        { 'case_number': 'A 1', 'document_href': 'a', 'document_path': 'a.pdf' },
+        { 'case_number': 'B 1', 'document_href': 'b', 'document_path': 'b.pdf' },
+    ] })
+
+    merge_log = preprocess.MergeRequestLog(os.path.join(tmp_path, "merge_requests.jsonl"))
+    merge_log.append(json_file, 1, { 'case_number': 'B 2', 'document_href': 'b2' })
+    merge_log.extend({ json_file: [ { 'index': 1, 'data': { 'case_number': 'B 3', 'document_href': 'b3' } } ] })
+    merge_log.extend({ os.path.join(tmp_path, "missing.json"): [ { 'index': 0, 'data': {} } ] })
+    # Requests for entries no longer in the file are discarded.
+    merge_log.append(json_file, 5, { 'case_number': 'C 1', 'document_href': 'c' })
+
+    document_cache = utils.fs.DocumentCache()
+    assert postprocess.compact_merge_log("test", merge_log, document_cache) == 1
+
+    data = utils.fs.read_json(json_file)
+    assert data['data'][0] == { 'case_number': 'A 1', 'document_href': 'a', 'document_path': 'a.pdf' }
+    assert data['data'][1]['case_number'] == [ 'B 1', 'B 2', 'B 3' ]
+    assert data['data'][1]['document_path'] == 'b.pdf'
+
+    # Requests for the missing file are retained for a later compaction.
+    assert not os.path.exists(merge_log.path)
+    assert [ *merge_log.read_pending().keys() ] == [ os.path.join(tmp_path, "missing.json") ]
+
+    merge_log.append(json_file, 0, { 'case_number': 'A 2', 'document_href': 'a2' })
+    merge_log.rotate()
+    assert sum(
+        len(entries) for merge_dict in merge_log.read_pending().values()
+        for entries in merge_dict.values()
+    ) == 2
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_close_response_cache(tmp_path):
+    args = argparse.Namespace(output_dir=str(tmp_path), http_cache=True, http_cache_ttl=1, http_cache_size=1)
+    response_cache = preprocess.open_response_cache("test", args)
+    assert retrievers.JudgmentRetriever.CACHE is response_cache
+
+    # Retrievers stop using the cache once closed.
+    assert postprocess.close_response_cache("test", args, [], response_cache=response_cache) == {}
+    assert retrievers.JudgmentRetriever.CACHE is None
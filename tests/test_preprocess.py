@@ -3,11 +3,14 @@ Test suite for preprocessing stage of the pipeline.
 """
 
 import os
+import gzip
 import argparse
+import datetime
 
 import pytest
 
 from src.pipeline import preprocess
+from src.scripts import generate_corpus
 
 @pytest.fixture(scope="session")
 # pylint: disable-next=redefined-outer-name,missing-function-docstring
@@ -153,3 +156,37 @@ def test_file_index(file_index, file_key, meta):
     filepath, group = file_key
     _meta = file_index.get(filepath, group)
     assert _meta == meta
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_load_indexes_synthetic(prog, tmp_path):
+    corpus_args = argparse.Namespace(
+        output_dir=str(tmp_path), document_dir="judgments", courts=[ "DHC" ], judgments=60,
+        query="synthetic", page_size=10, duplicate_url_rate=0.1, duplicate_content_rate=0.1,
+        paragraphs=[ 5, 10 ], sentences=[ 1, 3 ], extractors=[ "pdfminer_text" ], no_pdfs=False,
+        end_date=datetime.date(2022, 12, 31), compact_json=False, workers=1, seed=0
+    )
+    generate_corpus.generate(corpus_args)
+    judgments = generate_corpus.plan_judgments("DHC", corpus_args)
+
+    file_index, judgment_index = preprocess.load_indexes(prog, argparse.Namespace(
+        courts=[ "DHC" ], extractors=[ "pdfminer_text" ], output_dir=str(tmp_path),
+        document_dir="judgments", debug=False
+    ))
+
+    num_contents = len({ judgment['content_key'] for judgment in judgments })
+    assert len(judgment_index.data['DHC']['data']) == len(judgments)
+    assert len(file_index.data['DHC Judgments']['hash']) == num_contents
+    assert len(file_index.data['extracted_pdfminer_text']['hash']) == num_contents
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_compressed_file_index(tmp_path):
+    content = b"1. Paragraph of an extracted judgment.\n\f" * 64
+    with open(tmp_path / "plain.txt", 'wb') as file:
+        file.write(content)
+    with gzip.open(tmp_path / "compressed.txt.gz", 'wb') as file:
+        file.write(content)
+
+    file_index = preprocess.FileIndexStore()
+    plain      = file_index.get_indexing_info(str(tmp_path / "plain.txt"))
+    compressed = file_index.get_indexing_info(str(tmp_path / "compressed.txt.gz"))
+    assert plain == compressed and plain['size'] == len(content)
@@ -0,0 +1,299 @@
+"""
+Test suite for judgment retrievers, run against the offline mock court server.
+"""
+
+import os
+import asyncio
+import datetime
+import collections
+
+import pytest
+import aiohttp
+
+from src.retrievers import JudgmentRetriever, DHCJudgmentRetriever, SCJudgmentRetriever
+from src.retrievers.cache import ResponseCache
+from src.retrievers.utils import download_file, InvalidDocumentError, AsyncFileWriter
+from src.utils import remove_query_param, executors
+from src.scripts.mock_court_server import MockCourtServer
+
+END_DATE = datetime.date(2022, 10, 1)
+
+HTML_DIR = os.path.join("tests", "data", "html")
+
+parser_test_data = [
+    ( "dhc_search_page_1.html", DHCJudgmentRetriever, "parse_search_results", 10 ),
+    ( "sc_judgments_by_date.html", SCJudgmentRetriever, "parse_date_results", 54 ),
+    ( "sc_judgments_by_text.html", SCJudgmentRetriever, "parse_text_results", 10 )
+]
+
+@pytest.fixture(scope="module")
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def mock_server():
+    dhc_urls = ( DHCJudgmentRetriever.BASE_NETLOC, DHCJudgmentRetriever.BASE_URL, DHCJudgmentRetriever.FREE_TEXT_SEARCH_URL )
+    sc_urls  = ( SCJudgmentRetriever.BASE_URL, SCJudgmentRetriever.ENDPOINTS )
+
+    with MockCourtServer(judgments=25, end_date=END_DATE, seed=0) as server:
+        DHCJudgmentRetriever.set_base_url(server.base_url)
+        SCJudgmentRetriever.set_base_url(server.base_url)
+        yield server
+
+    DHCJudgmentRetriever.BASE_NETLOC, DHCJudgmentRetriever.BASE_URL, DHCJudgmentRetriever.FREE_TEXT_SEARCH_URL = dhc_urls
+    SCJudgmentRetriever.BASE_URL, SCJudgmentRetriever.ENDPOINTS = sc_urls
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_dhc_retriever(mock_server, tmp_path):
+    judgments, metadata = DHCJudgmentRetriever.get_judgments("trade marks", page=1)
+
+    assert len(judgments) == 10
+    assert metadata['entry_total'] == 25
+    assert metadata['page_next'] == 2
+    assert all(judgment['document_href'].startswith(DHCJudgmentRetriever.BASE_URL) for judgment in judgments)
+
+    paths = DHCJudgmentRetriever.save_documents(judgments[:3], output_dir=tmp_path)
+    for path in paths:
+        with open(path, 'rb') as file:
+            assert file.read(5) == b"%PDF-"
+
+    assert mock_server.stats['/FreeText/GetSearchResult.do'] >= 1
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_dhc_date_range(mock_server):
+    start_date = end_date = END_DATE - datetime.timedelta(days=2)
+    expected = [
+        judgment['case_number'] for judgment in mock_server.dhc_judgments
+        if start_date <= judgment['date'] <= end_date
+    ]
+
+    searches, page, case_numbers = mock_server.stats['/FreeText/GetSearchResult.do'], 1, []
+    while page is not None:
+        judgments, metadata = DHCJudgmentRetriever.get_judgments(
+            "trade marks", page=page, start_date=start_date, end_date=end_date
+        )
+        case_numbers.extend(judgment['case_number'] for judgment in judgments)
+        page = metadata.get('page_next')
+
+    assert case_numbers and case_numbers == expected
+    assert mock_server.stats['/FreeText/GetSearchResult.do'] - searches == 1
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_retriever(mock_server, tmp_path):
+    start_date = END_DATE - datetime.timedelta(days=30)
+    judgments, _ = SCJudgmentRetriever.get_judgments("", start_date=start_date, end_date=END_DATE)
+
+    assert judgments
+    assert all(judgment['document_href'].startswith(SCJudgmentRetriever.BASE_URL) for judgment in judgments)
+
+    paths = SCJudgmentRetriever.save_documents(judgments[:2], output_dir=tmp_path)
+    for path in paths:
+        with open(path, 'rb') as file:
+            assert file.read(5) == b"%PDF-"
+
+@pytest.mark.parametrize("file_name, retriever, parser, count", parser_test_data)
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_parser_parity(file_name, retriever, parser, count):
+    with open(os.path.join(HTML_DIR, file_name), 'r', encoding='utf-8') as file:
+        text = file.read()
+
+    judgments, metadata = getattr(retriever, parser + "_lxml")(text)
+    assert len(judgments) == count
+    assert ( judgments, metadata ) == getattr(retriever, parser + "_bs4")(text)
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_parser_fallback():
+    with open(os.path.join(HTML_DIR, "dhc_search_page_1.html"), 'r', encoding='utf-8') as file:
+        text = file.read()
+
+    def truncated_parser(text):
+        judgments, metadata = DHCJudgmentRetriever.parse_search_results_lxml(text)
+        return judgments[:-1], metadata
+
+    judgments, _ = DHCJudgmentRetriever.parse_response(
+        text, truncated_parser, DHCJudgmentRetriever.parse_search_results_bs4,
+        DHCJudgmentRetriever.validate_search_results
+    )
+    assert len(judgments) == 10
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_windows():
+    windows = SCJudgmentRetriever.make_windows(datetime.date(2022, 1, 1), datetime.date(2022, 1, 10), 4)
+    assert windows == [
+        ( datetime.date(2022, 1, 1), datetime.date(2022, 1, 4) ),
+        ( datetime.date(2022, 1, 5), datetime.date(2022, 1, 8) ),
+        ( datetime.date(2022, 1, 9), datetime.date(2022, 1, 10) )
+    ]
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_windowed_search(mock_server):
+    start_date = END_DATE - datetime.timedelta(days=90)
+    expected = sorted(
+        judgment['case_number'] for judgment in mock_server.sc_judgments
+        if start_date <= judgment['date'] <= END_DATE
+    )
+
+    # Results are truncated beyond the cap, and are complete only if no single day exceeds it.
+    result_cap = max(collections.Counter(judgment['date'] for judgment in mock_server.sc_judgments).values()) + 1
+
+    mock_server.sc_result_cap, page, case_numbers = result_cap, 1, []
+    try:
+        while page is not None:
+            judgments, metadata = SCJudgmentRetriever.get_judgments(
+                "", start_date=start_date, end_date=END_DATE, page=page, window_days=30, window_limit=result_cap
+            )
+            case_numbers.extend(judgment['case_number'] for judgment in judgments)
+            page = metadata.get('page_next')
+    finally:
+        mock_server.sc_result_cap = None
+
+    assert metadata['page_total'] == 4
+    assert sorted(case_numbers) == expected
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_prefetch_cleanup(mock_server):
+    start_date = END_DATE - datetime.timedelta(days=90)
+
+    # Searches stopping early drop the windows fetched ahead for them.
+    SCJudgmentRetriever.get_judgments("", start_date=start_date, end_date=END_DATE, window_days=7, workers=3)
+    assert SCJudgmentRetriever._prefetched # pylint: disable=protected-access
+    SCJudgmentRetriever.end_search("")
+    assert not SCJudgmentRetriever._prefetched # pylint: disable=protected-access
+
+    # Windows fetched ahead are searched on the shared prefetch executor, and dropped on shutdown.
+    judgments, _ = SCJudgmentRetriever.get_judgments(
+        "", start_date=start_date, end_date=END_DATE, page=2, window_days=7, workers=2
+    )
+    assert judgments is not None and executors.EXECUTORS.metrics()['prefetch']['submitted'] >= 2
+    SCJudgmentRetriever.shutdown()
+    assert not SCJudgmentRetriever._prefetched # pylint: disable=protected-access
+    executors.EXECUTORS.shutdown()
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_captcha_reuse(mock_server):
+    start_date = END_DATE - datetime.timedelta(days=60)
+    captchas, searches = mock_server.stats['/php/captcha_num.php'], mock_server.stats['/php/v_judgments/getJBJ.php']
+
+    # Every captcha is accepted for two searches, after which it is rejected and has to be replaced.
+    # Windows are searched one at a time, as concurrent searches may keep losing captchas to each other.
+    mock_server.captcha_uses, page = 2, 1
+    SCJudgmentRetriever.captcha_pool().close()
+    try:
+        while page is not None:
+            judgments, metadata = SCJudgmentRetriever.get_judgments(
+                "", start_date=start_date, end_date=END_DATE, page=page, window_days=7, workers=1
+            )
+            assert all(judgment['case_number'] for judgment in judgments)
+            page = metadata.get('page_next')
+    finally:
+        mock_server.captcha_uses = None
+
+    captchas = mock_server.stats['/php/captcha_num.php'] - captchas
+    searches = mock_server.stats['/php/v_judgments/getJBJ.php'] - searches
+    assert metadata['page_total'] == 9
+    assert captchas < searches
+    assert SCJudgmentRetriever.captcha_pool().stats['invalidated'] > 0
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_response_cache(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=-1, max_size=25)
+    try:
+        key_1 = cache.make_key('POST', "http://court/search", { 'query': "x", 'page': 1 })
+        assert key_1 == cache.make_key('post', "http://court/search", { 'page': 1, 'query': "x" })
+
+        cache.put(key_1, "search results")
+        assert cache.get(key_1) is None
+        assert cache.stats['expired'] == 1
+
+        cache.put("a", "0123456789", expires=False)
+        cache.put("b", "0123456789", expires=False)
+        assert cache.get("a") is not None
+        cache.put("c", "0123456789", expires=False)
+        assert cache.get("b") is None
+        assert cache.get("a") == cache.get("c") == "0123456789"
+        assert cache.stats['evictions'] == 1
+    finally:
+        cache.close()
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_dhc_response_validation():
+    with open(os.path.join(HTML_DIR, "dhc_search_page_1.html"), 'r', encoding='utf-8') as file:
+        assert DHCJudgmentRetriever.is_valid_response(file.read())
+    assert not DHCJudgmentRetriever.is_valid_response("<html><body>Service Unavailable</body></html>")
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_cached_retrieval(mock_server, tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite3"), ttl=3600)
+    JudgmentRetriever.set_cache(cache)
+    try:
+        for iteration in range(2):
+            searches = mock_server.stats['/FreeText/GetSearchResult.do']
+            resolutions = mock_server.stats['/FreeText/download.do']
+            judgments, _ = DHCJudgmentRetriever.get_judgments("trade marks", page=2)
+            os.makedirs(tmp_path / str(iteration))
+            DHCJudgmentRetriever.save_documents(judgments[:3], output_dir=tmp_path / str(iteration))
+
+        assert mock_server.stats['/FreeText/GetSearchResult.do'] == searches
+        assert mock_server.stats['/FreeText/download.do'] == resolutions
+        assert cache.stats['hits'] == 4
+    finally:
+        JudgmentRetriever.set_cache(None)
+        cache.close()
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_download_coalescing(tmp_path):
+    base_url = DHCJudgmentRetriever.BASE_URL
+    with MockCourtServer(judgments=30, end_date=END_DATE, duplicate_url_rate=0.5, seed=1) as server:
+        DHCJudgmentRetriever.set_base_url(server.base_url)
+        try:
+            judgments = [
+                judgment for page in ( 1, 2, 3 )
+                for judgment in DHCJudgmentRetriever.get_judgments("trade marks", page=page)[0]
+            ]
+            documents = { remove_query_param(judgment['document_href'], 'ID') for judgment in judgments }
+            assert len(documents) < len(judgments)
+
+            paths = DHCJudgmentRetriever.save_documents(judgments[:15], output_dir=tmp_path)
+            paths.extend(DHCJudgmentRetriever.save_documents(judgments[15:], output_dir=tmp_path))
+
+            assert all(paths) and len(set(paths)) == len(documents)
+            assert server.stats['/FreeText/download.do'] == len(documents)
+            assert server.stats['/FreeText/documents/{path}'] == len(documents)
+        finally:
+            DHCJudgmentRetriever.set_base_url(base_url)
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_download_validation(tmp_path):
+    async def download_all(urls, **kwargs):
+        async with aiohttp.ClientSession() as session:
+            return await asyncio.gather(*(
+                download_file(url, session, output_dir=tmp_path, retry_delay=0.01, **kwargs) for url in urls
+            ), return_exceptions=True)
+
+    with MockCourtServer(judgments=10, end_date=END_DATE, junk_rate=1.0, seed=0) as server:
+        urls = [ f"{server.base_url}/{judgment['path']}" for judgment in server.sc_judgments ]
+
+        results = asyncio.run(download_all(urls[:3], retries=1))
+        assert all(isinstance(result, InvalidDocumentError) for result in results)
+        assert server.stats['junk'] == 6
+        assert not os.listdir(tmp_path)
+
+        # Error pages are retried until a document arrives.
+        server.junk_rate = 0.3
+        paths = asyncio.run(download_all(urls, retries=8, suppress_exc=True))
+        assert all(paths) and len(os.listdir(tmp_path)) == len(urls)
+        for path in paths:
+            with open(path, 'rb') as file:
+                assert file.read(5) == b"%PDF-"
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_async_file_writer(tmp_path):
+    chunks = [ bytes([ index ]) * (index * 100) for index in range(1, 40) ]
+    path   = str(tmp_path / "file.bin")
+
+    async def write_all():
+        async with AsyncFileWriter(path, buffer_size=1000, size_hint=sum(map(len, chunks))) as writer:
+            for chunk in chunks:
+                await writer.write(chunk)
+        return writer.size
+
+    assert asyncio.run(write_all()) == sum(map(len, chunks))
+    with open(path, 'rb') as file:
+        assert file.read() == b"".join(chunks)
@@ -0,0 +1,133 @@
+"""
+Test suite for the search and scrape stage of the pipeline, run against the offline mock court server.
+"""
+
+import os
+import glob
+import argparse
+import datetime
+
+import pytest
+
+from src import utils
+from src.pipeline import preprocess, search_and_scrape
+from src.retrievers import DHCJudgmentRetriever, SCJudgmentRetriever
+from src.scripts.mock_court_server import MockCourtServer
+
+@pytest.fixture
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def mock_server():
+    dhc_urls = ( DHCJudgmentRetriever.BASE_NETLOC, DHCJudgmentRetriever.BASE_URL, DHCJudgmentRetriever.FREE_TEXT_SEARCH_URL )
+
+    with MockCourtServer(
+        judgments=50, end_date=datetime.date(2022, 10, 1), duplicate_content_rate=0.2, seed=0
+    ) as server:
+        yield server
+
+    DHCJudgmentRetriever.BASE_NETLOC, DHCJudgmentRetriever.BASE_URL, DHCJudgmentRetriever.FREE_TEXT_SEARCH_URL = dhc_urls
+
+@pytest.fixture
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def sc_mock_server():
+    sc_urls = ( SCJudgmentRetriever.BASE_URL, SCJudgmentRetriever.ENDPOINTS )
+
+    # Judgments up to the current date, as incremental searches do not go past it.
+    with MockCourtServer(judgments=30, end_date=datetime.date.today(), seed=0) as server:
+        yield server
+
+    SCJudgmentRetriever.BASE_URL, SCJudgmentRetriever.ENDPOINTS = sc_urls
+
+def make_args(mock_server, output_dir, **kwargs):
+    """ Returns arguments for the search and scrape stage, searching DHC judgments from the mock server. """
+    return argparse.Namespace(**{
+        'queries': [ "trade marks" ], 'courts': [ 'DHC' ], 'court_urls': { 'DHC': mock_server.base_url },
+        'output_dir': str(output_dir), 'document_dir': "judgments", 'save_json': True, 'skip_existing': False,
+        'page': 1, 'limit': None, 'pages': None, 'start_date': None, 'end_date': None,
+        'window_days': None, 'window_limit': None, 'window_workers': None,
+        'incremental': False, 'incremental_pages': 2, 'content_store': False, 'extractors': [], 'debug': False,
+        **kwargs
+    })
+
+def run_search(args):
+    """ Runs the search and scrape stage along with the pre-processing it depends on. """
+    data_indexes   = preprocess.load_indexes("test", args)
+    document_cache = utils.fs.DocumentCache()
+    merge_log      = preprocess.open_merge_log("test", args)
+    batches = search_and_scrape.search_and_scrape("test", args, data_indexes, document_cache, merge_log)
+    document_cache.flush()
+    return batches
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_latest_date():
+    judgments = [ { 'date': "01/10/2022" }, { 'date': "28/09/2022" }, { 'date': None } ]
+    assert search_and_scrape.latest_date(judgments) == "2022-10-01"
+    assert search_and_scrape.latest_date(judgments, { 'end_date': "2022-10-05" }) == "2022-10-05"
+    assert search_and_scrape.latest_date([], default="2022-01-01") == "2022-01-01"
+
+    # Date ranges extending into the future count only up to the current date.
+    today = datetime.date.today()
+    assert search_and_scrape.latest_date([], { 'end_date': str(today + datetime.timedelta(days=364)) }) == \
+        today.isoformat()
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_incremental_search(mock_server, tmp_path):
+    args = make_args(mock_server, tmp_path, incremental=True)
+    json_dir = os.path.join(tmp_path, "json", "DHC Judgments")
+
+    # Without a watermark, all pages are searched.
+    assert len(run_search(args)) == 5
+    watermark = utils.fs.read_json(os.path.join(tmp_path, "json", "watermarks.json"))['DHC']['trade marks']
+    assert watermark['latest_date'] == "2022-10-01" and watermark['pages'] == 5
+
+    # Once crawled, searches stop at pages of known judgments, without overwriting earlier results.
+    searches = mock_server.stats['/FreeText/GetSearchResult.do']
+    args.incremental_pages = 1
+    assert not run_search(args)
+    assert mock_server.stats['/FreeText/GetSearchResult.do'] - searches == 1
+    assert len(os.listdir(json_dir)) == 5
+
+    # Known judgments are recognized from the indexes of the dataset, even without a watermark.
+    os.remove(os.path.join(tmp_path, "json", "watermarks.json"))
+    searches = mock_server.stats['/FreeText/GetSearchResult.do']
+    assert not run_search(args)
+    assert mock_server.stats['/FreeText/GetSearchResult.do'] - searches == 1
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_sc_incremental_search(sc_mock_server, tmp_path):
+    args = make_args(
+        sc_mock_server, tmp_path, queries=[ "" ], courts=[ 'SC' ], court_urls={ 'SC': sc_mock_server.base_url },
+        incremental=True, incremental_pages=1
+    )
+    watermark_path, today = os.path.join(tmp_path, "json", "watermarks.json"), datetime.date.today()
+
+    # Searches span the past year up to the current date, which is recorded as the watermark.
+    assert run_search(args)
+    assert utils.fs.read_json(watermark_path)['SC']['']['latest_date'] == today.isoformat()
+
+    # Later searches start from the watermark, without moving it past the current date.
+    searches = sc_mock_server.stats['/php/v_judgments/getJBJ.php']
+    assert not run_search(args)
+    assert sc_mock_server.stats['/php/v_judgments/getJBJ.php'] - searches == 1
+    assert utils.fs.read_json(watermark_path)['SC']['']['latest_date'] == today.isoformat()
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_content_store(mock_server, tmp_path):
+    args = make_args(mock_server, tmp_path, content_store=True)
+    document_dir = os.path.join(tmp_path, "judgments", "DHC Judgments")
+    store = utils.fs.ContentStore(os.path.join(document_dir, "objects"))
+
+    batches = run_search(args)
+    files   = [ file for batch in batches for file in batch['judgments'] ]
+    stored  = glob.glob(store.glob(".pdf"), root_dir=store.root)
+
+    assert files and all(file.startswith(store.root) for file in files)
+    assert len(stored) == len(files) == len({ judgment['content_key'] for judgment in mock_server.dhc_judgments })
+    assert not glob.glob("*.pdf", root_dir=document_dir)
+
+    # Stored documents are indexed on later runs, and refer back to their judgments.
+    file_index, _ = preprocess.load_indexes("test", args)
+    for file in files:
+        meta = file_index.get(file, "DHC Judgments")
+        data = utils.fs.read_json(meta['json'])['data'][meta['index']]
+        assert data['document_path'] == file
+        assert data['document_digest'] == os.path.splitext(os.path.basename(file))[0]
@@ -0,0 +1,146 @@
+"""
+Test suite for the segregators used by the segregation stage of the pipeline.
+"""
+
+import json
+import random
+import argparse
+
+import pytest
+
+from src import utils, registry
+from src.filters.base import Filter
+from src.pipeline import segregate
+from src.scripts import synthetic
+from src.segregators.adobe_json import AdobeJSONSegregator
+from src.segregators.text import TextSegregator
+
+@pytest.mark.parametrize("compression", [ None, 'gzip' ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_adobe_json_streaming(tmp_path, compression):
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=60)
+    data = synthetic.make_structured_data("M/S ACME PHARMACEUTICALS LTD. VS UNION OF INDIA", paragraphs)
+    path = utils.fs.with_compression(str(tmp_path / "structuredData.json"), compression)
+    with utils.fs.open_file(path, 'w', encoding='utf-8') as file:
+        json.dump(data, file, ensure_ascii=False, indent=4)
+
+    assert AdobeJSONSegregator.select([ "document.txt", path ]) == path
+    streamed = list(AdobeJSONSegregator.segregate_file(path))
+    assert streamed == list(AdobeJSONSegregator.segregate(data))
+    assert len(streamed) == len(paragraphs) - 1
+
+@pytest.mark.parametrize("compression", [ None, 'gzip' ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_adobe_json_malformed(tmp_path, compression, caplog):
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=60)
+    data = synthetic.make_structured_data("M/S ACME PHARMACEUTICALS LTD. VS UNION OF INDIA", paragraphs)
+    text = json.dumps(data, ensure_ascii=False, indent=4).encode()
+    path = utils.fs.with_compression(str(tmp_path / "structuredData.json"), compression)
+    with utils.fs.open_file(path, 'wb') as file:
+        file.write(text)
+
+    # Truncated files yield no paragraphs rather than those parsed before the truncation, and are logged.
+    with open(path, 'rb') as file:
+        content = file.read()
+    with open(path, 'wb') as file:
+        file.write(content[:len(content) // 2])
+    assert AdobeJSONSegregator.segregate_file(path) == []
+    assert "malformed structured data" in caplog.text
+
+@pytest.mark.parametrize("block_size", [ 64, 2**20 ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_text_segregator(tmp_path, monkeypatch, block_size):
+    paragraphs = synthetic.make_paragraphs(random.Random(0), count=60)
+    paragraphs[5] += "\n1. A list within the paragraph."
+    pages = synthetic.layout_pages("M/S ACME PHARMACEUTICALS LTD. VS UNION OF INDIA", paragraphs)
+    path  = str(tmp_path / "document.txt")
+    with open(path, 'w', encoding='utf-8') as file:
+        file.write(synthetic.make_text(pages))
+
+    monkeypatch.setattr(TextSegregator, "BLOCK_SIZE", block_size)
+    assert TextSegregator.select([ path[:-4] + ".json", path ]) == path
+    segregated = list(TextSegregator.segregate_file(path))
+
+    assert [ paragraph['content'] for paragraph in segregated ] == [
+        ' '.join(line.strip() for line in paragraph.split('\n')) for paragraph in paragraphs
+    ]
+    for number, paragraph in enumerate(segregated, 1):
+        assert paragraph['paragraph_number'] == number and paragraph['reference'] == f"{number}."
+        assert any(line.startswith(f"{number}. ") for line in pages[paragraph['page'] - 1])
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_text_segregator_numbering():
+    lines = [
+        "1. The suit was filed on 12.03.", "2019. The suit was dismissed.",
+        "2. The appeal was filed.", "2.1. The appeal was admitted.", "1. A list within the paragraph.",
+        "5. The appeal was allowed.", "40. Not a paragraph."
+    ]
+    assert [ ( paragraph['reference'], paragraph['content'] ) for paragraph in TextSegregator.segregate(lines) ] == [
+        ( "1."  , "The suit was filed on 12.03. 2019. The suit was dismissed." ),
+        ( "2."  , "The appeal was filed." ),
+        ( "2.1.", "The appeal was admitted. 1. A list within the paragraph." ),
+        ( "5."  , "The appeal was allowed. 40. Not a paragraph." ),
+    ]
+
+class MinWordsFilter(Filter):
+    """ Filter accepting paragraphs with a minimum number of words, for testing. """
+
+    name = "min_words"
+    instances = 0
+
+    def __init__(self) -> None:
+        super().__init__()
+        MinWordsFilter.instances += 1
+
+    @classmethod
+    def get_option_list(cls):
+        return [ dict(name="count", default=20) ]
+
+    def refresh_state(self):
+        pass
+
+    def load(self, paragraph):
+        return len(paragraph.split())
+
+    def decision(self, paragraph_rep):
+        return paragraph_rep >= int(self.options['count'])
+
+@pytest.fixture
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def min_words_filter():
+    # Worker processes are started afresh, to inherit the registered filter.
+    utils.executors.EXECUTORS.shutdown()
+    registry.FILTERS.register(MinWordsFilter.name, f"{__name__}:MinWordsFilter")
+    segregate._filter_instances.clear() # pylint: disable=protected-access
+    MinWordsFilter.instances = 0
+    yield MinWordsFilter.name
+    del registry.FILTERS.entries[MinWordsFilter.name]
+    utils.executors.EXECUTORS.shutdown()
+
+@pytest.mark.parametrize("filters", [ [], [ "min_words" ] ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_process_segregation(tmp_path, min_words_filter, filters):
+    batches = []
+    for i in range(3):
+        files = []
+        for j in range(5):
+            pages = synthetic.layout_pages("TITLE", synthetic.make_document_paragraphs(f"{i}-{j}"))
+            files.append(str(tmp_path / f"{i}-{j}.txt"))
+            with open(files[-1], 'w', encoding='utf-8') as file:
+                file.write(synthetic.make_text(pages))
+        batches.append({ 'judgments': files, 'extractions': { 'pdfminer_text': files, 'parsr': files[::-1] } })
+
+    results = []
+    for workers in ( None, 2 ):
+        args = argparse.Namespace(
+            extractors=[ 'pdfminer_text', 'parsr' ], filters=filters, segregate_workers=workers,
+            min_words_count=25, save_json=False, debug=False
+        )
+        results.append([ batch['paragraphs'] for batch in segregate.segregate("test", args, batches, None) ])
+
+    assert results[0] == results[1]
+    # Filters are built once for the run, and inherited by worker processes.
+    assert MinWordsFilter.instances == len(filters)
+    assert results[0][0]['pdfminer_text'][0] == results[0][0]['parsr'][-1] != []
+    if filters:
+        assert all(len(para['content'].split()) >= 25 for paras in results[0][0]['parsr'] for para in paras)
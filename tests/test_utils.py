@@ -2,6 +2,10 @@
 Test suite for utility functions.
 """
 
+import io
+import os
+import json
+import glob
 import collections
 
 import pytest
@@ -80,3 +84,130 @@ def test_pipeline():
         '_post1': (3, 3),
         '_post2': (3, [ 'p1', 'p2', 'p3' ])
     }
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_document_cache(tmp_path):
+    path = os.path.join(tmp_path, "doc.json")
+    utils.fs.write_json(path, { 'data': [ 1 ] })
+
+    cache = utils.fs.DocumentCache(compact=True)
+    data = cache.get(path)
+    data['data'].append(2)
+    assert cache.get(path) is data
+    assert not cache.is_dirty(path)
+    assert utils.fs.read_json(path) == { 'data': [ 1 ] }
+
+    cache.mark_dirty(path)
+    cache.put(os.path.join(tmp_path, "new.json"), { 'data': [] })
+    assert cache.flush([ path ]) == 1
+    with open(path, 'r', encoding='utf-8') as file:
+        assert file.read() == '{"data":[1,2]}'
+    assert not os.path.exists(os.path.join(tmp_path, "new.json"))
+
+    assert cache.flush(evict=True) == 1
+    assert utils.fs.read_json(os.path.join(tmp_path, "new.json")) == { 'data': [] }
+    assert cache.flush() == 0
+    assert not cache.documents
+
+    # Final checkpoints write and evict documents, as do all checkpoints of eager caches, unless writes are deferred.
+    for options, final, written in (
+        ( {}, False, False ), ( {}, True, True ), ( { 'eager': True }, False, True ), ( { 'defer': True }, True, False )
+    ):
+        utils.fs.write_json(path, { 'data': [ 1 ] })
+        cache = utils.fs.DocumentCache(**options)
+        cache.get(path)['data'] = [ 1, 3 ]
+        cache.mark_dirty(path)
+        assert cache.checkpoint(path, final=final) == int(written)
+        assert utils.fs.read_json(path)['data'] == ( [ 1, 3 ] if written else [ 1 ] )
+        assert bool(cache.documents) != written
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_content_store(tmp_path):
+    store = utils.fs.ContentStore(str(tmp_path / "objects"))
+    for name, content in ( ( "a.pdf", b"first" ), ( "b.pdf", b"second" ), ( "c.pdf", b"first" ) ):
+        with open(tmp_path / name, 'wb') as file:
+            file.write(content)
+
+    path_a, digest_a, new_a = store.add(str(tmp_path / "a.pdf"))
+    path_b, digest_b, new_b = store.add(str(tmp_path / "b.pdf"))
+    path_c, digest_c, new_c = store.add(str(tmp_path / "c.pdf"))
+
+    assert new_a and new_b and not new_c
+    assert path_a == path_c and digest_a == digest_c != digest_b
+    assert path_a == os.path.join(store.root, digest_a[:2], digest_a[2:4], digest_a + ".pdf")
+    assert not any(( tmp_path / name ).exists() for name in ( "a.pdf", "b.pdf", "c.pdf" ))
+    assert store.find(digest_b) == path_b
+    assert sorted(glob.glob(store.glob(".pdf"), root_dir=store.root)) == sorted(
+        os.path.relpath(path, store.root) for path in ( path_a, path_b )
+    )
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_compressed_files(tmp_path, monkeypatch):
+    path = str(tmp_path / "document.json")
+    compressed = utils.fs.with_compression(path, 'gzip')
+    assert utils.fs.split_compression(compressed) == ( path, 'gzip' )
+    assert utils.fs.find_variant(path) is None
+
+    with utils.fs.open_file(compressed, 'w', encoding='utf-8') as file:
+        file.write('{"elements": [ "τέστ" ]}')
+    with utils.fs.open_file(compressed, 'r', encoding='utf-8') as file:
+        assert file.read() == '{"elements": [ "τέστ" ]}'
+
+    assert utils.fs.find_variant(path) == compressed
+    size = utils.fs.content_size(compressed)
+    assert size == len('{"elements": [ "τέστ" ]}'.encode()) != os.stat(compressed).st_size
+
+    # Sizes of gzip files are read from their trailers, without decompressing them.
+    with monkeypatch.context() as patch:
+        patch.setattr(utils.fs, "open_file", None)
+        assert utils.fs.content_size(compressed) == size
+
+@pytest.mark.parametrize("chunk_size", [ 1, 7, 2**16 ])
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_iter_json_array(chunk_size):
+    data = {
+        'version': { 'schema': "1.0.0" }, 'count': 12345, 'escaped': "a \"[quoted]\" ], {value}",
+        'elements': [ { 'Text': "1. First ", 'Page': 0 }, 123, 4.5e-3, "]", [], None, True ],
+        'pages': [ { 'page_number': 0 } ]
+    }
+    text = json.dumps(data, indent=4)
+    assert list(utils.fs.iter_json_array(io.StringIO(text), 'elements', chunk_size)) == data['elements']
+    assert list(utils.fs.iter_json_array(io.StringIO(text), 'missing', chunk_size)) == []
+    assert list(utils.fs.iter_json_array(io.StringIO('{"elements":[]}'), 'elements', chunk_size)) == []
+    with pytest.raises(ValueError):
+        list(utils.fs.iter_json_array(io.StringIO(text), 'version', chunk_size))
+    with pytest.raises(ValueError):
+        list(utils.fs.iter_json_array(io.StringIO(text[:len(text) // 2]), 'pages', chunk_size))
+
+# pylint: disable-next=redefined-outer-name,missing-function-docstring
+def test_executor_registry():
+    executors = utils.executors.ExecutorRegistry({ 'io': 1 })
+    pool = executors.get('io')
+    assert executors.get('io') is pool and pool.workers == 1
+
+    # Nested maps run inline, instead of deadlocking on the single worker.
+    def square_all(values):
+        return [ *pool.map(lambda value: value * value, values) ]
+    assert [ *pool.map(square_all, [ [ 1, 2 ], [ 3 ] ]) ] == [ [ 1, 4 ], [ 9 ] ]
+
+    with pytest.raises(ZeroDivisionError):
+        pool.submit(divmod, 1, 0).result()
+
+    metrics = executors.metrics()['io']
+    assert metrics['submitted'] == 3 and metrics['completed'] == 2 and metrics['failed'] == 1
+    assert metrics['pending'] == 0 and 1 <= metrics['peak_pending'] <= 3
+    assert 0.0 <= metrics['utilisation'] <= 1.0
+
+    executors.configure(cpu=2)
+    assert [ *executors.get('cpu').map(abs, range(-20, 0)) ] == [ *range(20, 0, -1) ]
+    executors.shutdown()
+    assert not executors.metrics() and executors.get('io') is not pool
+    executors.shutdown()
+
+    # Initializers run once in every worker of executors created afterwards.
+    started = []
+    executors.configure(initializers={ 'io': ( started.append, ( 'io', ) ) })
+    assert executors.get('io').submit(len, started).result() == 1 and started == [ 'io' ]
+    executors.shutdown()
+    with pytest.raises(KeyError):
+        executors.configure(initializers={ 'unknown': ( print, () ) })